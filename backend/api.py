@@ -7,7 +7,10 @@ Author: HH Holdings / Bevans Real Estate
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from clerk_scraper import BosqueClerkScraper
+from clerk_scraper import SEARCH_DEADLINE_SECONDS, BosqueClerkScraper
+from clerk_cache import DEFAULT_MAX_BYTES, ResponseCache
+from clerk_index import SYNC_INTERVAL_SECONDS, ClerkIndex, ClerkSync
+from clerk_http import DEFAULT_RATE, MAX_RETRIES, ClerkHTTPClient
 import json
 from datetime import datetime
 import os
@@ -25,8 +28,37 @@ CORS(app, resources={
     }
 })
 
-# Initialize scraper
-scraper = BosqueClerkScraper()
+# Initialize scraper, caching portal responses (CLERK_CACHE_DB adds a
+# SQLite tier that survives restarts and is shared by gunicorn workers)
+cache = ResponseCache(
+    max_bytes=int(os.environ.get('CLERK_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+    disk_path=os.environ.get('CLERK_CACHE_DB') or None
+)
+
+# CLERK_INDEX_DB keeps a local mirror of clerk records, synced in the
+# background; searches are answered from it once the first sync is done
+index = ClerkIndex(os.environ['CLERK_INDEX_DB']) if os.environ.get('CLERK_INDEX_DB') else None
+
+# Portal requests per second (and burst) allowed per host, shared by every
+# search thread; 429/5xx answers are retried with exponential backoff
+http = ClerkHTTPClient(
+    default_rate=(float(os.environ.get('CLERK_RATE_LIMIT', DEFAULT_RATE[0])),
+                  int(os.environ.get('CLERK_RATE_BURST', DEFAULT_RATE[1]))),
+    max_retries=int(os.environ.get('CLERK_MAX_RETRIES', MAX_RETRIES))
+)
+
+scraper = BosqueClerkScraper(
+    cache=cache,
+    deadline=float(os.environ.get('CLERK_SEARCH_DEADLINE', SEARCH_DEADLINE_SECONDS)),
+    index=index,
+    http=http
+)
+
+sync = None
+if index is not None:
+    sync = ClerkSync(scraper, index,
+                     interval=float(os.environ.get('CLERK_SYNC_INTERVAL', SYNC_INTERVAL_SECONDS)))
+    sync.start()
 
 
 @app.route('/api/health', methods=['GET'])
@@ -65,6 +97,7 @@ def search_by_name():
                 'type': record_type
             },
             'results': results,
+            'timed_out': results.timed_out,
             'timestamp': datetime.now().isoformat()
         })
 
@@ -101,6 +134,7 @@ def search_by_property():
                 'address': address
             },
             'results': results,
+            'timed_out': results.timed_out,
             'timestamp': datetime.now().isoformat()
         })
 
@@ -143,6 +177,50 @@ def search_by_date():
             'timestamp': datetime.now().isoformat()
         })
 
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/clerk/search/instrument', methods=['GET'])
+def search_by_instrument():
+    """
+    Search clerk records by instrument number or volume/page (local index)
+
+    Query params:
+        number: Instrument number (optional)
+        volume, page: Volume and page (optional, together)
+    """
+    number = request.args.get('number')
+    volume = request.args.get('volume')
+    page = request.args.get('page')
+
+    if not number and not (volume and page):
+        return jsonify({'error': 'Either number or volume and page are required'}), 400
+
+    try:
+        results = scraper.search_by_instrument(number, volume, page)
+
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'query': {
+                'number': number,
+                'volume': volume,
+                'page': page
+            },
+            'results': results,
+            'timestamp': datetime.now().isoformat()
+        })
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -215,6 +293,39 @@ def get_statistics():
         }), 500
 
 
+@app.route('/api/clerk/cache', methods=['GET'])
+def get_cache_metrics():
+    """Get response cache hit/miss/eviction metrics"""
+    return jsonify({
+        'success': True,
+        'cache': scraper.cache.metrics(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/api/clerk/http', methods=['GET'])
+def get_http_metrics():
+    """Get portal request, retry, coalescing and throttling metrics"""
+    return jsonify({
+        'success': True,
+        'http': scraper.http.metrics(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/api/clerk/sync', methods=['GET'])
+def get_sync_status():
+    """Get local index size and background sync status"""
+    if sync is None:
+        return jsonify({'success': True, 'sync': None})
+
+    return jsonify({
+        'success': True,
+        'sync': sync.status(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -237,8 +348,12 @@ if __name__ == '__main__':
     print(f"   GET  /api/clerk/search/name?name=<name>&type=<type>")
     print(f"   GET  /api/clerk/search/property?property_id=<id>&address=<addr>")
     print(f"   GET  /api/clerk/search/date?start_date=<date>&end_date=<date>")
+    print(f"   GET  /api/clerk/search/instrument?number=<number>&volume=<vol>&page=<page>")
     print(f"   GET  /api/clerk/document/<id>?source=<source>")
     print(f"   GET  /api/clerk/types")
     print(f"   GET  /api/clerk/stats")
+    print(f"   GET  /api/clerk/cache")
+    print(f"   GET  /api/clerk/http")
+    print(f"   GET  /api/clerk/sync")
 
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Clerk Page Parser Benchmark
+Records/second of each ClerkPageParser backend on saved portal pages
+
+Usage:
+    python benchmark_parser.py [--seconds 2] [--page fixtures/texasfile_search.html]
+
+Compares the original full-page BeautifulSoup parse (nine find calls
+per record) with the strained html.parser fallback and lxml, after
+checking that every path extracts the same records.
+
+Author: HH Holdings / Bevans Real Estate
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+from clerk_parser import ClerkPageParser, etree
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_records(html: str) -> List[Dict[str, str]]:
+    """Record fields as the scraper read them before ClerkPageParser"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return [{
+        'data-id': record.get('data-id', ''),
+        'doc-type': record.find('span', class_='doc-type').text.strip(),
+        'instrument': record.find('span', class_='instrument').text.strip(),
+        'filed-date': record.find('span', class_='filed-date').text.strip(),
+        'grantor': record.find('span', class_='grantor').text.strip(),
+        'grantee': record.find('span', class_='grantee').text.strip(),
+        'legal-desc': record.find('div', class_='legal-desc').text.strip(),
+        'volume': record.find('span', class_='volume').text.strip(),
+        'page': record.find('span', class_='page').text.strip(),
+    } for record in soup.find_all('div', class_='record-item')]
+
+
+def pages_per_second(parse: Callable[[str], List], html: str, seconds: float) -> float:
+    parse(html)
+    pages = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        parse(html)
+        pages += 1
+    return pages / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark clerk page parsing throughput')
+    parser.add_argument('--page', default=os.path.join(FIXTURES, 'texasfile_search.html'),
+                        help='Saved search results page')
+    parser.add_argument('--seconds', type=float, default=2.0, help='Time spent per parser')
+    args = parser.parse_args(argv)
+
+    with open(args.page, encoding='utf-8') as f:
+        html = f.read()
+
+    runs = [('BeautifulSoup (original)', legacy_records),
+            ('html.parser + strainer', ClerkPageParser('html.parser').records)]
+    if etree is not None:
+        runs.append(('lxml', ClerkPageParser('lxml').records))
+    else:
+        print("⚠️  lxml not installed - only the fallback parser is measured")
+
+    reference = legacy_records(html)
+    for label, parse in runs[1:]:
+        if parse(html) != reference:
+            print(f"❌ {label} records differ from the original parser")
+            return 1
+
+    print(f"{len(reference)} records per page ({len(html) / 1024:.0f} KB)\n")
+    print(f"{'Parser':<26}{'Pages/s':>10}{'Records/s':>12}{'Speedup':>10}")
+    baseline = None
+    for label, parse in runs:
+        rate = pages_per_second(parse, html, args.seconds)
+        baseline = baseline or rate
+        print(f"{label:<26}{rate:>10,.1f}{rate * len(reference):>12,.0f}{rate / baseline:>9.1f}x")
+
+    print("\n✓ All parsers extracted identical records")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Clerk Records Response Cache
+In-memory LRU cache with an optional SQLite tier for clerk portal lookups
+
+Author: HH Holdings / Bevans Real Estate
+Purpose: Avoid re-fetching TexasFile/KoFile results for repeated searches
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+# Seconds a cached response stays fresh, per source
+DEFAULT_TTLS = {
+    'texasfile': 15 * 60,             # Name searches: new filings show up daily
+    'kofile': 24 * 60 * 60,           # Historical volumes rarely change
+    'texasfile_document': 7 * 24 * 60 * 60,  # Recorded documents are immutable
+}
+DEFAULT_TTL = 15 * 60
+
+# Memory tier size (serialized JSON bytes)
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def normalize(value) -> str:
+    """Case- and whitespace-insensitive form of a query parameter"""
+    if value is None:
+        return ''
+    return ' '.join(str(value).split()).lower()
+
+
+def cache_key(source: str, **params) -> str:
+    """Cache key for a source lookup, independent of parameter order and spacing"""
+    return json.dumps([source, sorted((name, normalize(value)) for name, value in params.items())],
+                      separators=(',', ':'))
+
+
+class ResponseCache:
+    """
+    Parsed clerk responses, cached per source and normalized query
+
+    The memory tier evicts least recently used entries once the
+    serialized responses exceed max_bytes. With a disk_path, responses
+    are also kept in SQLite, so they survive restarts and are shared by
+    API worker processes. Values are stored as JSON; every get returns
+    a fresh copy.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttls: Optional[Dict[str, float]] = None,
+                 disk_path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            max_bytes: Memory tier size limit in bytes
+            ttls: Seconds to keep responses, by source (merged over DEFAULT_TTLS)
+            disk_path: SQLite file for the persistent tier (None: memory only)
+            clock: Time source (seconds since the epoch)
+        """
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        # key -> (source, expires, payload, size)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+        self.disk_path = disk_path
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=10)
+            self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                             'key TEXT PRIMARY KEY, source TEXT, expires REAL, payload TEXT)')
+            self._db.execute('DELETE FROM responses WHERE expires <= ?', (self.clock(),))
+            self._db.commit()
+
+    def ttl(self, source: str) -> float:
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    def _count(self, source: str, event: str):
+        counts = self._counts.setdefault(source, {'hits': 0, 'disk_hits': 0, 'misses': 0})
+        counts[event] += 1
+
+    def get(self, source: str, **params):
+        """
+        The cached response for a lookup, or None
+
+        Args:
+            source: Source the response came from (texasfile, kofile, ...)
+            params: Query parameters of the lookup
+        """
+        key = cache_key(source, **params)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._count(source, 'hits')
+                    return json.loads(entry[2])
+                self._discard(key)
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute('SELECT expires, payload FROM responses WHERE key = ?',
+                                       (key,)).fetchone()
+                if row is not None and row[0] > now:
+                    self._remember(key, source, row[0], row[1])
+                    self._count(source, 'disk_hits')
+                    return json.loads(row[1])
+                if row is not None:
+                    self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._db.commit()
+                    self.expirations += 1
+
+            self._count(source, 'misses')
+            return None
+
+    def put(self, source: str, value, **params):
+        """Cache a response (any JSON-serializable value) for a lookup"""
+        key = cache_key(source, **params)
+        payload = json.dumps(value, separators=(',', ':'))
+        expires = self.clock() + self.ttl(source)
+        with self._lock:
+            self._remember(key, source, expires, payload)
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                                 (key, source, expires, payload))
+                self._db.commit()
+
+    def _remember(self, key: str, source: str, expires: float, payload: str):
+        if key in self._entries:
+            self._discard(key)
+        size = _entry_size(key, payload)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (source, expires, payload, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def _discard(self, key: str):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def clear(self):
+        """Drop every cached response, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute('DELETE FROM responses')
+                self._db.commit()
+
+    def metrics(self) -> Dict:
+        """Hit/miss/eviction counts and cache size"""
+        with self._lock:
+            by_source = {source: dict(counts) for source, counts in self._counts.items()}
+            hits = sum(c['hits'] + c['disk_hits'] for c in by_source.values())
+            misses = sum(c['misses'] for c in by_source.values())
+            metrics = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'by_source': by_source,
+                'disk': None,
+            }
+            if self._db is not None:
+                rows, size = self._db.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM responses').fetchone()
+                metrics['disk'] = {'path': self.disk_path, 'entries': rows, 'bytes': size}
+            return metrics
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _entry_size(key: str, payload: str) -> int:
+    return len(key.encode()) + len(payload.encode())
@@ -0,0 +1,269 @@
+"""
+Clerk Portal HTTP Client
+Shared, polite HTTP layer for the county clerk record portals
+
+Author: HH Holdings / Bevans Real Estate
+Purpose: Pooled connections, per-host rate limits, retries, conditional
+         requests and coalescing of identical in-flight requests
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Connection pool: hosts kept, connections per host
+POOL_HOSTS = 8
+POOL_CONNECTIONS = 16
+
+# Requests per second and burst size allowed per host
+DEFAULT_RATE = (2.0, 4)
+
+# Attempts after the first, and the first backoff delay (doubled each retry)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Responses remembered for ETag / Last-Modified revalidation
+CONDITIONAL_CACHE_SIZE = 256
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, in bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting for one if the bucket is empty
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The caller's deadline passed before a response arrived"""
+
+
+class _Call:
+    """A request in flight, shared by every caller asking for the same URL"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+
+
+class ClerkHTTPClient:
+    """
+    GET client shared by the clerk scraper and its sync job
+
+    - One requests.Session with a connection pool sized for the search
+      threads
+    - A token bucket per host, so bursts of API traffic are spread out
+      instead of hammering the county portals
+    - Exponential backoff retries on 429/5xx and connection errors,
+      honouring Retry-After
+    - If-None-Match / If-Modified-Since revalidation of earlier
+      responses; a 304 returns the stored response
+    - Identical GETs already in flight are sent once and their response
+      shared (callers must treat responses as read-only)
+    - An optional deadline caps the whole call, retries and waits
+      included, so callers can stop work they no longer need
+    """
+
+    def __init__(self, rates: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_rate: Tuple[float, int] = DEFAULT_RATE, max_retries: int = MAX_RETRIES,
+                 backoff: float = BACKOFF_SECONDS, pool_connections: int = POOL_CONNECTIONS,
+                 session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rates: (requests per second, burst) by host name
+            default_rate: Rate for hosts not in `rates`
+            max_retries: Retries after the first attempt
+            backoff: First retry delay in seconds, doubled on each retry
+            pool_connections: Pooled connections kept per host
+            session: Session to send requests with (default: a new one)
+            sleep: Delay function (for tests)
+        """
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_connections,
+                              max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._inflight: Dict[str, _Call] = {}
+        # url -> (ETag, Last-Modified, response)
+        self._validators: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._counts = {'requests': 0, 'retries': 0, 'coalesced': 0, 'not_modified': 0}
+        self._throttled_seconds = 0.0
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.rates.get(host, self.default_rate)
+                bucket = self._buckets[host] = TokenBucket(rate, burst, sleep=self.sleep)
+            return bucket
+
+    def _count(self, event: str):
+        with self._lock:
+            self._counts[event] += 1
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout: float = 10,
+            deadline: Optional[float] = None) -> requests.Response:
+        """
+        GET a portal page
+
+        Args:
+            timeout: Connect/read timeout of each attempt
+            deadline: time.monotonic() after which no attempt is started or
+                      waited on; socket timeouts are capped to the time left
+
+        Raises:
+            DeadlineExceeded: The deadline passed before a response arrived
+            requests.RequestException: Every attempt failed to connect
+        """
+        url = requests.Request('GET', url, params=params).prepare().url
+
+        while True:
+            with self._lock:
+                call = self._inflight.get(url)
+                leader = call is None
+                if leader:
+                    call = self._inflight[url] = _Call()
+                else:
+                    self._counts['coalesced'] += 1
+            if leader:
+                break
+
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not call.done.wait(wait):
+                raise DeadlineExceeded(f"Deadline passed waiting for {url}")
+            if isinstance(call.error, DeadlineExceeded):
+                continue  # The leader's deadline, not ours: try again
+            if call.error is not None:
+                raise call.error
+            return call.response
+
+        try:
+            call.response = self._fetch(url, timeout, deadline)
+            return call.response
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            call.done.set()
+
+    def _fetch(self, url: str, timeout: float, deadline: Optional[float]) -> requests.Response:
+        bucket = self._bucket(url)
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.acquire()
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"Deadline passed before requesting {url}")
+                timeout = min(timeout, remaining)
+            headers = {}
+            with self._lock:
+                self._throttled_seconds += waited
+                self._counts['requests'] += 1
+                stored = self._validators.get(url)
+            if stored is not None:
+                etag, modified, _ = stored
+                if etag:
+                    headers['If-None-Match'] = etag
+                if modified:
+                    headers['If-Modified-Since'] = modified
+
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeadlineExceeded(f"Deadline passed requesting {url}") from e
+                if attempt == self.max_retries or not self._retry_wait(attempt, None, deadline):
+                    raise
+                continue
+
+            if (response.status_code in RETRY_STATUSES and attempt < self.max_retries
+                    and self._retry_wait(attempt, response.headers.get('Retry-After'), deadline)):
+                continue
+
+            if response.status_code == 304 and stored is not None:
+                self._count('not_modified')
+                with self._lock:
+                    self._validators.move_to_end(url)
+                return stored[2]
+
+            if response.status_code == 200:
+                self._remember(url, response)
+            return response
+
+    def _retry_wait(self, attempt: int, retry_after: Optional[str],
+                    deadline: Optional[float]) -> bool:
+        """Sleep before a retry; False (no sleep) when it would end past the deadline"""
+        delay = self.backoff * 2 ** attempt
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass  # An HTTP date; keep the exponential delay
+        delay = min(delay, MAX_BACKOFF_SECONDS)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        self._count('retries')
+        self.sleep(delay)
+        return True
+
+    def _remember(self, url: str, response: requests.Response):
+        etag = response.headers.get('ETag')
+        modified = response.headers.get('Last-Modified')
+        if not etag and not modified:
+            return
+        with self._lock:
+            self._validators[url] = (etag, modified, response)
+            self._validators.move_to_end(url)
+            while len(self._validators) > CONDITIONAL_CACHE_SIZE:
+                self._validators.popitem(last=False)
+
+    def metrics(self) -> Dict:
+        """Requests sent, retries, coalesced and revalidated requests, throttling"""
+        with self._lock:
+            return dict(self._counts, throttled_seconds=round(self._throttled_seconds, 3),
+                        hosts=sorted(self._buckets))
@@ -0,0 +1,382 @@
+"""
+Bosque County Clerk Records Index
+Local, indexed mirror of scraped clerk records and the job that syncs it
+
+Author: HH Holdings / Bevans Real Estate
+Purpose: Answer clerk record searches locally instead of from remote portals
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+# Filed-date formats seen on clerk portals, normalized to YYYY-MM-DD
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m-%d-%Y', '%Y/%m/%d', '%m/%d/%y')
+
+# Listing pages fetched per sync run at most
+SYNC_PAGE_LIMIT = 500
+
+# Seconds between background sync runs
+SYNC_INTERVAL_SECONDS = 60 * 60
+
+# Seconds a sync lease is held without renewal; renewed before every page
+SYNC_LEASE_SECONDS = 5 * 60
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT PRIMARY KEY,
+    source TEXT,
+    document_type TEXT,
+    instrument_number TEXT,
+    filed_date TEXT,
+    volume TEXT,
+    page TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS records_filed ON records (filed_date);
+CREATE INDEX IF NOT EXISTS records_instrument ON records (instrument_number);
+CREATE INDEX IF NOT EXISTS records_volume_page ON records (volume, page);
+CREATE TABLE IF NOT EXISTS tokens (
+    field TEXT,
+    token TEXT,
+    key TEXT,
+    PRIMARY KEY (field, token, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tokens_key ON tokens (key);
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at REAL,
+    lease_until REAL,
+    cursor TEXT
+);
+'''
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall((text or '').lower())
+
+
+def iso_date(text: str) -> str:
+    """A filed date as YYYY-MM-DD, or '' when it cannot be read"""
+    text = (text or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return ''
+
+
+def type_key(document_type: str) -> str:
+    """'Deed of Trust' -> 'deed_of_trust', as listed by get_record_types"""
+    return '_'.join(tokenize(document_type))
+
+
+class ClerkIndex:
+    """
+    SQLite store of clerk records, indexed for every search endpoint
+
+    Names (grantor/grantee) and legal descriptions are split into
+    tokens; a search matches records holding every query token.
+    Instrument number, filed date and volume/page are indexed columns.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        Args:
+            path: SQLite database file (':memory:' for a throwaway index)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.executescript(SCHEMA)
+
+        # Indexes created before resumable syncs lack the cursor column
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(sync_state)')}
+        if 'cursor' not in columns:
+            with self._db:
+                self._db.execute('ALTER TABLE sync_state ADD COLUMN cursor TEXT')
+
+    def add_records(self, records: Iterable[Dict]) -> int:
+        """
+        Insert or update parsed records (as from _parse_texasfile_record)
+
+        Records are keyed on source and id (or instrument number);
+        records with neither are skipped.
+
+        Returns:
+            Number of records stored
+        """
+        stored = 0
+        with self._lock, self._db:
+            for record in records:
+                ident = record.get('id') or record.get('instrument_number')
+                if not ident:
+                    continue
+                key = f"{record.get('source', '')}:{ident}"
+                self._db.execute('DELETE FROM tokens WHERE key = ?', (key,))
+                self._db.execute(
+                    'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, record.get('source', ''), type_key(record.get('document_type', '')),
+                     (record.get('instrument_number') or '').strip().lower(),
+                     iso_date(record.get('filed_date', '')),
+                     (record.get('volume') or '').strip().lower(),
+                     (record.get('page') or '').strip().lower(),
+                     json.dumps(record)))
+                tokens = {('name', token) for field in ('grantor', 'grantee')
+                          for token in tokenize(record.get(field, ''))}
+                tokens.update(('legal', token) for token in tokenize(record.get('legal_description', '')))
+                self._db.executemany('INSERT INTO tokens VALUES (?, ?, ?)',
+                                     [(field, token, key) for field, token in tokens])
+                stored += 1
+        return stored
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def _select(self, where: str, params: List, record_type: str = 'all') -> List[Dict]:
+        if record_type and record_type != 'all':
+            where += ' AND document_type = ?'
+            params = params + [type_key(record_type)]
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT record FROM records WHERE {where} ORDER BY filed_date DESC, key',
+                params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _token_match(self, field: str, text: str, record_type: str) -> List[Dict]:
+        tokens = sorted(set(tokenize(text)))
+        if not tokens:
+            return []
+        marks = ', '.join('?' * len(tokens))
+        return self._select(
+            f'key IN (SELECT key FROM tokens WHERE field = ? AND token IN ({marks}) '
+            f'GROUP BY key HAVING COUNT(*) = ?)',
+            [field, *tokens, len(tokens)], record_type)
+
+    def search_name(self, name: str, record_type: str = 'all') -> List[Dict]:
+        """Records whose grantor or grantee names contain every word of `name`"""
+        return self._token_match('name', name, record_type)
+
+    def search_legal(self, text: str, record_type: str = 'all') -> List[Dict]:
+        """Records whose legal description contains every word of `text`"""
+        return self._token_match('legal', text, record_type)
+
+    def search_date_range(self, start_date: str, end_date: str,
+                          record_type: str = 'all') -> List[Dict]:
+        """Records filed between two dates (inclusive), newest first"""
+        start, end = iso_date(start_date), iso_date(end_date)
+        if not start or not end:
+            raise ValueError("Dates must be YYYY-MM-DD")
+        return self._select('filed_date BETWEEN ? AND ?', [start, end], record_type)
+
+    def search_instrument(self, instrument_number: str) -> List[Dict]:
+        return self._select('instrument_number = ?', [instrument_number.strip().lower()])
+
+    def search_volume_page(self, volume: str, page: str) -> List[Dict]:
+        return self._select('volume = ? AND page = ?',
+                            [volume.strip().lower(), page.strip().lower()])
+
+    def watermark(self, source: str) -> Optional[str]:
+        """Newest filed date synced from a source, or None before the first sync"""
+        with self._lock:
+            row = self._db.execute('SELECT watermark FROM sync_state WHERE source = ?',
+                                   (source,)).fetchone()
+        return row[0] if row else None
+
+    def claim_sync(self, source: str, seconds: float) -> bool:
+        """
+        Take the sync lease for a source, so one process syncs at a time
+
+        Returns:
+            True when the lease was free (or expired) and is now held
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute('INSERT OR IGNORE INTO sync_state (source) VALUES (?)', (source,))
+            claimed = self._db.execute(
+                'UPDATE sync_state SET lease_until = ? WHERE source = ? '
+                'AND (lease_until IS NULL OR lease_until < ?)',
+                (now + seconds, source, now)).rowcount
+        return claimed == 1
+
+    def renew_sync(self, source: str, seconds: float):
+        """Extend a sync lease taken by claim_sync and not yet finished"""
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE sync_state SET lease_until = ? WHERE source = ? '
+                'AND lease_until IS NOT NULL', (time.time() + seconds, source))
+
+    def sync_cursor(self, source: str) -> Optional[Dict]:
+        """
+        Where an unfinished sync stopped, or None
+
+        Returns:
+            {'since', 'page', 'newest', 'started'}: the listing's watermark,
+            next page, newest filed date seen and the day it began
+        """
+        with self._lock:
+            row = self._db.execute('SELECT cursor FROM sync_state WHERE source = ?',
+                                   (source,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def finish_sync(self, source: str, watermark: Optional[str], cursor: Optional[Dict] = None):
+        """
+        Record a sync run and release its lease
+
+        Args:
+            watermark: New watermark (a completed run), or None to keep it
+            cursor: Where to resume an unfinished run, or None
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE sync_state SET watermark = COALESCE(?, watermark), synced_at = ?, '
+                'lease_until = NULL, cursor = ? WHERE source = ?',
+                (watermark, time.time(), json.dumps(cursor) if cursor else None, source))
+
+    def status(self) -> Dict:
+        with self._lock:
+            count = self._db.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+            sources = {source: {'watermark': watermark, 'synced_at': synced_at,
+                                'resume': json.loads(cursor) if cursor else None}
+                       for source, watermark, synced_at, cursor in self._db.execute(
+                           'SELECT source, watermark, synced_at, cursor FROM sync_state')}
+        return {'records': count, 'sources': sources}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ClerkSync:
+    """
+    Background job mirroring TexasFile records into a ClerkIndex
+
+    Each run asks for records filed on or after the watermark (the
+    newest filed date already stored), page by page, and stops at an
+    empty page or one holding nothing newer. Records filed on the
+    watermark day are fetched again and de-duplicated by the index.
+
+    A run that stops early (page_limit reached, or an error) leaves the
+    watermark alone and saves a cursor; the next run continues the same
+    listing from that page. Filings added in between only push records
+    to later pages, so resuming re-reads some records but skips none.
+    Records whose filed date cannot be read are kept. A completed listing
+    without a single readable date sets the watermark to the day the
+    listing began.
+
+    The sync lease is renewed before every page, so a long run is never
+    overlapped by a sync started in another process.
+    """
+
+    SOURCE = 'texasfile'
+
+    def __init__(self, scraper, index: ClerkIndex, interval: float = SYNC_INTERVAL_SECONDS,
+                 page_limit: int = SYNC_PAGE_LIMIT, lease: float = SYNC_LEASE_SECONDS):
+        """
+        Args:
+            scraper: BosqueClerkScraper used to fetch listing pages
+            index: Index to store records in
+            interval: Seconds between runs of the background thread
+            page_limit: Listing pages fetched per run at most
+            lease: Seconds the sync lease lasts between page fetches
+        """
+        self.scraper = scraper
+        self.index = index
+        self.interval = interval
+        self.page_limit = page_limit
+        self.lease = lease
+        self.last_run: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict:
+        """
+        Fetch and store records newer than the watermark
+
+        Returns:
+            Summary: pages and records fetched, records stored, whether
+            the listing was completed, watermark
+        """
+        summary = {'pages': 0, 'fetched': 0, 'stored': 0, 'skipped': False, 'error': None}
+        started = datetime.now().date().isoformat()
+        if not self.index.claim_sync(self.SOURCE, self.lease):
+            summary['skipped'] = True  # Another process is syncing
+            self.last_run = summary
+            return summary
+
+        cursor = self.index.sync_cursor(self.SOURCE)
+        if cursor:
+            since, first_page, newest = cursor['since'], cursor['page'], cursor['newest']
+            started = cursor.get('started', started)
+        else:
+            since = newest = self.index.watermark(self.SOURCE)
+            first_page = 1
+
+        page = first_page
+        completed = False
+        try:
+            while page < first_page + self.page_limit:
+                self.index.renew_sync(self.SOURCE, self.lease)
+                records = self.scraper._crawl_texasfile(since, page)
+                summary['pages'] += 1
+                summary['fetched'] += len(records)
+                dated = [(iso_date(r.get('filed_date', '')), r) for r in records]
+                newer = [r for filed, r in dated if filed and (not since or filed >= since)]
+                undated = [r for filed, r in dated if not filed]
+                summary['stored'] += self.index.add_records(newer + undated)
+                for filed, _ in dated:
+                    if filed and (newest is None or filed > newest):
+                        newest = filed
+                page += 1
+                if not records or (not newer and len(undated) < len(records)):
+                    completed = True
+                    break
+        except Exception as e:
+            print(f"Clerk sync error: {e}")
+            summary['error'] = str(e)
+        finally:
+            # Listings run newest first, so only a completed run may move the
+            # watermark; an unfinished one resumes from the next page
+            if completed:
+                # With no readable filed date, the listing still covered
+                # everything filed before it began
+                self.index.finish_sync(self.SOURCE, newest or started)
+            else:
+                self.index.finish_sync(self.SOURCE, None, {'since': since, 'page': page,
+                                                           'newest': newest, 'started': started})
+
+        summary['completed'] = completed
+        summary['watermark'] = self.index.watermark(self.SOURCE)
+        self.last_run = summary
+        return summary
+
+    def start(self):
+        """Run sync in a daemon thread every `interval` seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='clerk-sync', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict:
+        return {'running': self._thread is not None and self._thread.is_alive(),
+                'interval': self.interval, 'last_run': self.last_run, **self.index.status()}
+
@@ -0,0 +1,172 @@
+"""
+Clerk Portal Page Parser
+Extracts clerk records and document details from portal HTML
+
+Author: HH Holdings / Bevans Real Estate
+Purpose: Fast parsing for bulk crawls, with lxml when it is installed
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - exercised on installs without lxml
+    etree = None
+
+
+# (tag, class) of each field inside a record-item, keyed by class
+RECORD_FIELDS = {
+    'doc-type': 'span',
+    'instrument': 'span',
+    'filed-date': 'span',
+    'grantor': 'span',
+    'grantee': 'span',
+    'legal-desc': 'div',
+    'volume': 'span',
+    'page': 'span',
+}
+
+
+def _class_pattern(*names: str):
+    """Matches a class attribute listing any of `names` (strainers see the raw attribute)"""
+    return re.compile(r'(^|\s)(%s)(\s|$)' % '|'.join(re.escape(name) for name in names))
+
+
+# Only these nodes are kept when the fallback parser reads a page
+RECORD_STRAINER = SoupStrainer('div', attrs={'class': _class_pattern('record-item')})
+DOCUMENT_STRAINER = SoupStrainer(attrs={'class': _class_pattern('document-text', 'doc-image',
+                                                                'metadata')})
+
+
+# lxml refuses str input that declares an encoding (common on XHTML pages)
+XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+def _class_xpath(tag: str, css_class: str) -> str:
+    return f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+
+class ClerkPageParser:
+    """
+    Portal page parser with an lxml backend and a BeautifulSoup fallback
+
+    Both backends return the same values. lxml parses the page in C and
+    reads only record-item / document nodes via XPath; the fallback
+    builds BeautifulSoup trees for those nodes alone (SoupStrainer).
+    Each record's fields are collected in one walk over its elements.
+    """
+
+    BACKENDS = ('lxml', 'html.parser')
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Args:
+            backend: 'lxml' or 'html.parser' (default: lxml when installed)
+
+        Raises:
+            ValueError: Unknown backend, or lxml requested but not installed
+        """
+        if backend is None:
+            backend = 'lxml' if etree is not None else 'html.parser'
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown parser backend: {backend}")
+        if backend == 'lxml' and etree is None:
+            raise ValueError("lxml is not installed")
+        self.backend = backend
+
+        if backend == 'lxml':
+            self._records = etree.XPath(_class_xpath('div', 'record-item'))
+            self._document_text = etree.XPath(_class_xpath('div', 'document-text'))
+            self._images = etree.XPath(_class_xpath('img', 'doc-image'))
+            self._metadata = etree.XPath(_class_xpath('table', 'metadata'))
+            self._text = etree.XPath('string()')
+
+    def records(self, html: str) -> List[Dict[str, str]]:
+        """
+        Fields of every record-item on a search page
+
+        Returns:
+            Per record: 'data-id' and the text of each field found, keyed
+            by its class (doc-type, instrument, filed-date, grantor,
+            grantee, legal-desc, volume, page)
+        """
+        if self.backend == 'lxml':
+            root = self._lxml_root(html)
+            if root is None:
+                return []
+            return [self._lxml_fields(record) for record in self._records(root)]
+
+        soup = BeautifulSoup(html, 'html.parser', parse_only=RECORD_STRAINER)
+        return [self._soup_fields(record) for record in soup.find_all('div', class_='record-item')]
+
+    @staticmethod
+    def _lxml_root(html: str):
+        if not html or not html.strip():
+            return None
+        return etree.HTML(XML_DECLARATION.sub('', html, count=1))
+
+    def _lxml_fields(self, record) -> Dict[str, str]:
+        fields = {'data-id': record.get('data-id', '')}
+        for element in record.iter('span', 'div'):
+            for css_class in (element.get('class') or '').split():
+                if RECORD_FIELDS.get(css_class) == element.tag and css_class not in fields:
+                    fields[css_class] = self._text(element).strip()
+        return fields
+
+    @staticmethod
+    def _soup_fields(record) -> Dict[str, str]:
+        fields = {'data-id': record.get('data-id', '')}
+        for element in record.find_all(['span', 'div'], class_=True):
+            for css_class in element.get('class'):
+                if RECORD_FIELDS.get(css_class) == element.name and css_class not in fields:
+                    fields[css_class] = element.text.strip()
+        return fields
+
+    def document(self, html: str) -> Dict:
+        """
+        Full text, page images and metadata table of a document page
+
+        Returns:
+            {'full_text', 'images', 'metadata'}, or {} when the page has
+            no document text
+        """
+        if self.backend == 'lxml':
+            root = self._lxml_root(html)
+            texts = self._document_text(root) if root is not None else []
+            if not texts:
+                return {}
+            tables = self._metadata(root)
+            return {
+                'full_text': self._text(texts[0]).strip(),
+                'images': [img.get('src') for img in self._images(root) if img.get('src') is not None],
+                'metadata': _metadata_rows(
+                    [[self._text(td) for td in row.iter('td')] for row in tables[0].iter('tr')]
+                    if tables else []),
+            }
+
+        soup = BeautifulSoup(html, 'html.parser', parse_only=DOCUMENT_STRAINER)
+        text = soup.find('div', class_='document-text')
+        if text is None:
+            return {}
+        table = soup.find('table', class_='metadata')
+        return {
+            'full_text': text.text.strip(),
+            'images': [img['src'] for img in soup.find_all('img', class_='doc-image')
+                       if img.has_attr('src')],
+            'metadata': _metadata_rows(
+                [[td.text for td in row.find_all('td')] for row in table.find_all('tr')]
+                if table else []),
+        }
+
+
+def _metadata_rows(rows: List[List[str]]) -> Dict[str, str]:
+    """Two-cell metadata rows as {'field_name': 'value'}"""
+    metadata = {}
+    for cells in rows:
+        if len(cells) == 2:
+            key = cells[0].strip().lower().replace(' ', '_')
+            metadata[key] = cells[1].strip()
+    return metadata
@@ -6,20 +6,62 @@ Author: HH Holdings / Bevans Real Estate
 Purpose: Background scraping of clerk records from Bosque County portals
 """
 
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
 import json
+import logging
 import time
 from datetime import datetime
 import re
 
+from clerk_cache import ResponseCache
+from clerk_http import ClerkHTTPClient, DeadlineExceeded
+from clerk_index import ClerkIndex, iso_date
+from clerk_parser import ClerkPageParser
+
+
+logger = logging.getLogger(__name__)
+
+# Source queries run at once across all searches
+SEARCH_WORKERS = 4
+
+# Seconds a multi-source search waits before returning what it has
+SEARCH_DEADLINE_SECONDS = 8.0
+
+
+class SearchResults(list):
+    """Records from a multi-source search; timed_out names sources that missed the deadline"""
+
+    def __init__(self, records=(), timed_out: Optional[List[str]] = None):
+        super().__init__(records)
+        self.timed_out = timed_out or []
+
 
 class BosqueClerkScraper:
     """Scraper for Bosque County clerk records from multiple sources"""
 
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, cache: Optional[ResponseCache] = None, max_workers: int = SEARCH_WORKERS,
+                 deadline: float = SEARCH_DEADLINE_SECONDS, index: Optional[ClerkIndex] = None,
+                 parser: Optional[ClerkPageParser] = None, http: Optional[ClerkHTTPClient] = None):
+        """
+        Args:
+            cache: Response cache for portal lookups (default: in-memory)
+            max_workers: Threads querying sources concurrently (they share
+                         one HTTP client and its connection pool)
+            deadline: Seconds a multi-source search waits for its sources
+            index: Local record index (filled by ClerkSync); once synced,
+                   searches are answered from it instead of the portals
+            parser: Page parser (default: lxml when installed)
+            http: Rate-limited, retrying HTTP client for the portals
+        """
+        self.cache = cache if cache is not None else ResponseCache()
+        self.index = index
+        self.parser = parser or ClerkPageParser()
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='clerk-search')
+        self.http = http or ClerkHTTPClient()
+        self.session = self.http.session
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
@@ -32,50 +74,89 @@ class BosqueClerkScraper:
             'county_official': 'https://www.bosquecounty.gov/171/County-Clerk--Recording-lifes-events-sin'
         }
 
-    def search_by_name(self, name: str, record_type: str = 'all') -> List[Dict]:
+    def search_by_name(self, name: str, record_type: str = 'all',
+                       deadline: Optional[float] = None) -> SearchResults:
         """
         Search clerk records by name
 
+        TexasFile and KoFile are queried concurrently.
+
         Args:
             name: Person or entity name to search
             record_type: Type of record (deed, mortgage, lien, marriage, etc.)
+            deadline: Seconds to wait for the sources (default: self.deadline)
 
         Returns:
-            List of matching records
+            Matching records from every source that answered in time
         """
-        results = []
-
-        # Try TexasFile search
-        texasfile_results = self._search_texasfile(name, record_type)
-        results.extend(texasfile_results)
+        if self._index_ready():
+            return SearchResults(self.index.search_name(name, record_type))
 
-        # Try KoFile search
-        kofile_results = self._search_kofile(name, record_type)
-        results.extend(kofile_results)
+        return self._fan_out([
+            ('texasfile', self._search_texasfile, (name, record_type)),
+            ('kofile', self._search_kofile, (name, record_type)),
+        ], deadline)
 
-        return results
-
-    def search_by_property(self, property_id: str = None, address: str = None) -> List[Dict]:
+    def search_by_property(self, property_id: str = None, address: str = None,
+                           deadline: Optional[float] = None) -> SearchResults:
         """
         Search clerk records by property identifier
 
         Args:
             property_id: Property/parcel ID
             address: Property address
+            deadline: Seconds to wait for the sources (default: self.deadline)
 
         Returns:
-            List of matching records
+            Matching records from every source that answered in time
         """
-        results = []
+        queries = []
 
         if property_id:
-            results.extend(self._search_by_property_id(property_id))
+            queries.append(('property_id', self._search_by_property_id, (property_id,)))
 
         if address:
-            results.extend(self._search_by_address(address))
+            queries.append(('address', self._search_by_address, (address,)))
+
+        return self._fan_out(queries, deadline)
+
+    def _fan_out(self, queries: List[Tuple[str, Callable, tuple]],
+                 deadline: Optional[float] = None) -> SearchResults:
+        """
+        Run source queries concurrently and combine their records in query order
+
+        Each query is called as query(*args, deadline=<time.monotonic()
+        cut-off>) and must stop its portal requests by then, so a slow
+        source never holds a search thread past the search deadline.
+        Queries that have not started by the deadline are cancelled; they,
+        and queries that ran out of time (DeadlineExceeded), are reported
+        in timed_out.
+        """
+        timeout = self.deadline if deadline is None else deadline
+        cutoff = time.monotonic() + timeout
+        futures = [(source, self._executor.submit(query, *args, deadline=cutoff))
+                   for source, query, args in queries]
+        wait([future for _, future in futures], timeout=timeout)
+
+        results = SearchResults()
+        for source, future in futures:
+            try:
+                if not future.done():
+                    future.cancel()
+                    raise DeadlineExceeded(source)
+                results.extend(future.result())
+            except DeadlineExceeded:
+                logger.warning("%s search timed out; returning partial results", source)
+                results.timed_out.append(source)
+            except Exception as e:
+                logger.warning("%s search error: %s", source, e)
 
         return results
 
+    def close(self):
+        """Stop the search threads once running queries finish"""
+        self._executor.shutdown(wait=False)
+
     def search_by_date_range(self, start_date: str, end_date: str,
                             record_type: str = 'all') -> List[Dict]:
         """
@@ -87,15 +168,47 @@ class BosqueClerkScraper:
             record_type: Type of record
 
         Returns:
-            List of records filed in date range
+            List of records filed in date range (empty until the local
+            index has been synced)
+
+        Raises:
+            ValueError: A date cannot be read (whether or not the index
+                        has been synced)
         """
+        if not iso_date(start_date) or not iso_date(end_date):
+            raise ValueError("Dates must be YYYY-MM-DD")
+
         results = []
 
-        # Implementation would query date-indexed records
-        # This is a placeholder for the actual API implementation
+        if self._index_ready():
+            results.extend(self.index.search_date_range(start_date, end_date, record_type))
 
         return results
 
+    def search_by_instrument(self, instrument_number: str = None, volume: str = None,
+                             page: str = None) -> List[Dict]:
+        """
+        Search the local index by instrument number or volume/page
+
+        Returns:
+            List of matching records (empty until the index has been synced)
+        """
+        results = []
+
+        if not self._index_ready():
+            return results
+
+        if instrument_number:
+            results.extend(self.index.search_instrument(instrument_number))
+
+        if volume and page:
+            results.extend(self.index.search_volume_page(volume, page))
+
+        return results
+
+    def _index_ready(self) -> bool:
+        return self.index is not None and self.index.watermark('texasfile') is not None
+
     def get_document_details(self, document_id: str, source: str = 'texasfile') -> Dict:
         """
         Retrieve full details for a specific document
@@ -114,8 +227,13 @@ class BosqueClerkScraper:
         else:
             return {}
 
-    def _search_texasfile(self, name: str, record_type: str) -> List[Dict]:
-        """Search TexasFile system for records"""
+    def _search_texasfile(self, name: str, record_type: str,
+                          deadline: Optional[float] = None) -> List[Dict]:
+        """Search TexasFile system for records (giving up at `deadline`, a time.monotonic())"""
+        cached = self.cache.get('texasfile', name=name, type=record_type)
+        if cached is not None:
+            return cached
+
         results = []
 
         try:
@@ -128,97 +246,136 @@ class BosqueClerkScraper:
                 'type': record_type
             }
 
-            response = self.session.get(url, params=params, timeout=10)
+            response = self.http.get(url, params=params, timeout=10, deadline=deadline)
 
             if response.status_code == 200:
-                # Parse response (actual parsing would depend on API format)
-                soup = BeautifulSoup(response.text, 'html.parser')
-
                 # Extract records from HTML
-                records = soup.find_all('div', class_='record-item')
+                for fields in self.parser.records(response.text):
+                    results.append(self._parse_texasfile_record(fields))
 
-                for record in records:
-                    results.append(self._parse_texasfile_record(record))
+                self.cache.put('texasfile', results, name=name, type=record_type)
 
+        except DeadlineExceeded:
+            raise  # Reported by _fan_out as timed out
         except Exception as e:
             print(f"TexasFile search error: {e}")
 
         return results
 
-    def _search_kofile(self, name: str, record_type: str) -> List[Dict]:
-        """Search KoFile QuickLinks for records"""
+    def _search_kofile(self, name: str, record_type: str,
+                       deadline: Optional[float] = None) -> List[Dict]:
+        """Search KoFile QuickLinks for records (giving up at `deadline`, a time.monotonic())"""
+        cached = self.cache.get('kofile', name=name, type=record_type)
+        if cached is not None:
+            return cached
+
         results = []
 
         try:
             url = self.sources['kofile']
 
             # KoFile search implementation
-            response = self.session.get(url, timeout=10)
+            response = self.http.get(url, timeout=10, deadline=deadline)
 
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-
                 # Extract historical records
                 # Implementation depends on KoFile's actual structure
 
-                pass
+                # Until records are parsed, an empty list would pin the
+                # search to "no results" for KoFile's whole TTL
+                if results:
+                    self.cache.put('kofile', results, name=name, type=record_type)
 
+        except DeadlineExceeded:
+            raise  # Reported by _fan_out as timed out
         except Exception as e:
             print(f"KoFile search error: {e}")
 
         return results
 
-    def _search_by_property_id(self, property_id: str) -> List[Dict]:
-        """Search by property/parcel ID"""
+    def _search_by_property_id(self, property_id: str,
+                               deadline: Optional[float] = None) -> List[Dict]:
+        """Search by property/parcel ID (as cited in legal descriptions)"""
         results = []
 
-        # Implementation would query property-indexed records
+        if self._index_ready():
+            results.extend(self.index.search_legal(property_id))
 
         return results
 
-    def _search_by_address(self, address: str) -> List[Dict]:
-        """Search by property address"""
+    def _search_by_address(self, address: str, deadline: Optional[float] = None) -> List[Dict]:
+        """Search by property address (words of the legal description)"""
         results = []
 
-        # Implementation would query address-indexed records
+        if self._index_ready():
+            results.extend(self.index.search_legal(address))
 
         return results
 
-    def _parse_texasfile_record(self, record_element) -> Dict:
-        """Parse a TexasFile record element into structured data"""
+    def _crawl_texasfile(self, filed_after: Optional[str], page: int) -> List[Dict]:
+        """
+        One page of the TexasFile filing listing, newest first
+
+        Args:
+            filed_after: Only records filed on or after this date (YYYY-MM-DD)
+            page: Listing page, from 1
+
+        Raises:
+            requests.RequestException: The page could not be fetched
+        """
+        url = f"{self.sources['texasfile']}/search"
+        params = {
+            'county': 'Bosque',
+            'sort': 'filed_date_desc',
+            'page': page
+        }
+        if filed_after:
+            params['filed_after'] = filed_after
+
+        response = self.http.get(url, params=params, timeout=30)
+        response.raise_for_status()
+
+        records = [self._parse_texasfile_record(fields)
+                   for fields in self.parser.records(response.text)]
+        return [record for record in records if record]
+
+    def _parse_texasfile_record(self, fields: Dict[str, str]) -> Dict:
+        """Turn the fields of a TexasFile record-item (ClerkPageParser.records) into a record"""
         try:
             return {
-                'id': record_element.get('data-id', ''),
-                'document_type': record_element.find('span', class_='doc-type').text.strip(),
-                'instrument_number': record_element.find('span', class_='instrument').text.strip(),
-                'filed_date': record_element.find('span', class_='filed-date').text.strip(),
-                'grantor': record_element.find('span', class_='grantor').text.strip(),
-                'grantee': record_element.find('span', class_='grantee').text.strip(),
-                'legal_description': record_element.find('div', class_='legal-desc').text.strip(),
-                'volume': record_element.find('span', class_='volume').text.strip(),
-                'page': record_element.find('span', class_='page').text.strip(),
+                'id': fields.get('data-id', ''),
+                'document_type': fields['doc-type'],
+                'instrument_number': fields['instrument'],
+                'filed_date': fields['filed-date'],
+                'grantor': fields['grantor'],
+                'grantee': fields['grantee'],
+                'legal_description': fields['legal-desc'],
+                'volume': fields['volume'],
+                'page': fields['page'],
                 'source': 'TexasFile',
                 'county': 'Bosque'
             }
-        except Exception as e:
-            print(f"Parse error: {e}")
+        except KeyError as e:
+            print(f"Parse error: record has no {e} field")
             return {}
 
     def _get_texasfile_document(self, document_id: str) -> Dict:
         """Retrieve full document from TexasFile"""
+        cached = self.cache.get('texasfile_document', id=document_id)
+        if cached is not None:
+            return cached
+
         try:
             url = f"{self.sources['texasfile']}/document/{document_id}"
-            response = self.session.get(url, timeout=10)
+            response = self.http.get(url, timeout=10)
 
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                details = self.parser.document(response.text)
 
-                return {
-                    'id': document_id,
-                    'full_text': soup.find('div', class_='document-text').text.strip(),
-                    'images': [img['src'] for img in soup.find_all('img', class_='doc-image')],
-                    'metadata': self._extract_metadata(soup)
-                }
+                if details:
+                    document = {'id': document_id, **details}
+                    self.cache.put('texasfile_document', document, id=document_id)
+                    return document
 
         except Exception as e:
             print(f"Document retrieval error: {e}")
@@ -230,26 +387,6 @@ class BosqueClerkScraper:
         # Implementation for KoFile document retrieval
         return {}
 
-    def _extract_metadata(self, soup) -> Dict:
-        """Extract metadata from document page"""
-        metadata = {}
-
-        try:
-            meta_table = soup.find('table', class_='metadata')
-            if meta_table:
-                rows = meta_table.find_all('tr')
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) == 2:
-                        key = cols[0].text.strip().lower().replace(' ', '_')
-                        value = cols[1].text.strip()
-                        metadata[key] = value
-
-        except Exception as e:
-            print(f"Metadata extraction error: {e}")
-
-        return metadata
-
     def get_record_types(self) -> List[str]:
         """Get list of available record types"""
         return [
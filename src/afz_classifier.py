@@ -8,10 +8,43 @@ Identifies and classifies land parcels eligible for AFZ designation based on:
 - Existing grid access proximity
 """
 
-import json
-import math
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
+import copy
+import inspect
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Optional
+from dataclasses import dataclass
+
+from afz_export import ParcelGeoJSONWriter, ParcelJSONWriter
+from afz_query import ParcelQuery
+from afz_rules import InputColumns, RuleSet, StoreColumns, default_rules
+from afz_tiles import write_tiles
+from geodesy import haversine
+from infrastructure import InfrastructureLayer
+from parcel_store import ParcelStore
+from spatial_index import GeoGrid
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# classify_parcel argument -> AFZParcel field, where the names differ
+ARGUMENT_FIELDS = {
+    'parcel_id': 'id',
+    'lat': 'latitude',
+    'lon': 'longitude',
+    'avg_rainfall': 'avg_rainfall_inches',
+    'nearest_substation': 'nearest_substation_miles',
+    'nearest_transmission': 'nearest_transmission_miles',
+    'elevation': 'elevation_ft',
+}
+
+# Records gathered per step when classify_many reads an iterator
+CLASSIFY_CHUNK_ROWS = 50_000
+
+# Fields get_statistics counts parcels by (reported as 'by_<field>')
+STATISTICS_GROUP_BY = ('county', 'soil_quality')
 
 
 @dataclass
@@ -45,6 +78,130 @@ class AFZParcel:
     notes: str
 
 
+class AFZStatistics:
+    """
+    Running totals behind AFZClassifier.get_statistics
+
+    Parcels are added one at a time, so statistics for a stream of
+    chunks match get_statistics over all of them at once.
+    """
+
+    def __init__(self, min_score: int = 30, group_by: Tuple[str, ...] = STATISTICS_GROUP_BY):
+        self.min_score = min_score
+        self.group_by = tuple(group_by)
+        self.total_parcels = 0
+        self.eligible_parcels = 0
+        self.total_acres = 0
+        self.score_total = 0
+        self.by_criteria: Dict[str, int] = {}
+        self.by_group: Dict[str, Dict[str, int]] = {field: {} for field in self.group_by}
+        self.brownfield_count = 0
+        self.arid_region_count = 0
+        self.grid_access_count = 0
+
+        # Row (in add order) where each criterion / group value first appeared,
+        # so merged statistics list them as if every parcel were added in turn
+        self.first_seen: Dict[Tuple[str, str], int] = {}
+
+    def add(self, parcel: AFZParcel):
+        row = self.total_parcels
+        self.total_parcels += 1
+        if parcel.score < self.min_score:
+            return
+
+        self.eligible_parcels += 1
+        self.total_acres += parcel.acres
+        self.score_total += parcel.score
+        for criterion in parcel.afz_criteria:
+            if criterion not in self.by_criteria:
+                self.first_seen[('afz_criteria', criterion)] = row
+            self.by_criteria[criterion] = self.by_criteria.get(criterion, 0) + 1
+        for field, counts in self.by_group.items():
+            value = getattr(parcel, field)
+            if value not in counts:
+                self.first_seen[(field, value)] = row
+            counts[value] = counts.get(value, 0) + 1
+        self.brownfield_count += bool(parcel.is_brownfield)
+        self.arid_region_count += bool(parcel.is_arid)
+        self.grid_access_count += bool(parcel.has_grid_access)
+
+    def add_many(self, parcels: Iterable[AFZParcel]):
+        for parcel in parcels:
+            self.add(parcel)
+
+    def merge(self, other: 'AFZStatistics', rows: Sequence[int] = None):
+        """
+        Fold in statistics gathered separately (e.g. by a worker process)
+
+        Args:
+            other: Statistics with the same min_score and group_by
+            rows: Row of each of other's parcels in the combined order
+                  (default: after every parcel counted so far)
+        """
+        if (other.min_score, other.group_by) != (self.min_score, self.group_by):
+            raise ValueError("Only statistics with the same min_score and group_by can be merged")
+        if rows is None:
+            rows = range(self.total_parcels, self.total_parcels + other.total_parcels)
+
+        self.total_parcels += other.total_parcels
+        self.eligible_parcels += other.eligible_parcels
+        self.total_acres += other.total_acres
+        self.score_total += other.score_total
+        self.brownfield_count += other.brownfield_count
+        self.arid_region_count += other.arid_region_count
+        self.grid_access_count += other.grid_access_count
+
+        counts_by_field = {'afz_criteria': self.by_criteria, **self.by_group}
+        for (field, value), row in other.first_seen.items():
+            row = rows[row]
+            if self.first_seen.get((field, value), row) >= row:
+                self.first_seen[(field, value)] = row
+        for field, counts in (('afz_criteria', other.by_criteria), *other.by_group.items()):
+            merged = counts_by_field[field]
+            for value, count in counts.items():
+                merged[value] = merged.get(value, 0) + count
+
+    def _ordered(self, field: str, counts: Dict[str, int]) -> Dict[str, int]:
+        return dict(sorted(counts.items(), key=lambda item: self.first_seen[(field, item[0])]))
+
+    def to_dict(self) -> Dict:
+        by_group = {field: self._ordered(field, counts) for field, counts in self.by_group.items()}
+        return statistics_dict(
+            self.total_parcels, self.eligible_parcels, self.total_acres, self.score_total,
+            self._ordered('afz_criteria', self.by_criteria), by_group, self.brownfield_count,
+            self.arid_region_count, self.grid_access_count)
+
+
+def statistics_dict(total_parcels: int, eligible: int, total_acres, score_total: int,
+                    by_criteria: Dict[str, int], by_group: Dict[str, Dict[str, int]],
+                    brownfield_count: int, arid_region_count: int,
+                    grid_access_count: int) -> Dict:
+    """The get_statistics dictionary"""
+    if not total_parcels:
+        return {
+            'total_parcels': 0,
+            'eligible_parcels': 0,
+            'total_acres': 0,
+            'by_criteria': {}
+        }
+
+    stats = {
+        'total_parcels': total_parcels,
+        'eligible_parcels': eligible,
+        'total_acres': total_acres,
+        'avg_score': score_total / eligible if eligible else 0,
+        'by_criteria': dict(by_criteria),
+    }
+    for field, counts in by_group.items():
+        stats[f'by_{field}'] = dict(counts)
+    stats.update({
+        'brownfield_count': brownfield_count,
+        'arid_region_count': arid_region_count,
+        'grid_access_count': grid_access_count
+    })
+    return stats
+
+
 class AFZClassifier:
     """Classifies land parcels for AFZ eligibility"""
 
@@ -66,9 +223,26 @@ class AFZClassifier:
         'proximity_bonus': 10
     }
 
-    def __init__(self):
-        """Initialize the AFZ classifier"""
-        self.parcels: List[AFZParcel] = []
+    def __init__(self, rules: RuleSet = None, infrastructure: InfrastructureLayer = None):
+        """
+        Initialize the AFZ classifier
+
+        Args:
+            rules: Scoring rule set (default: the WEIGHTS and thresholds above)
+            infrastructure: Substation/transmission geometry; when given,
+                            grid distances are measured from each parcel's
+                            location instead of taken from the input
+        """
+        self.rules = rules or default_rules(self.WEIGHTS, self.ARID_RAINFALL_THRESHOLD,
+                                            self.GRID_ACCESS_DISTANCE_MILES)
+        self.infrastructure = infrastructure
+        self.parcels = ParcelStore(AFZParcel)
+        self._register_criteria()
+        self._spatial_index: Optional[GeoGrid] = None
+
+        # (min_score, group_by) -> statistics, valid for one parcels.version
+        self._statistics_cache: Dict[Tuple, Dict] = {}
+        self._statistics_version = -1
 
     def classify_parcel(
         self,
@@ -95,43 +269,7 @@ class AFZClassifier:
         Returns:
             AFZParcel object with eligibility assessment
         """
-        criteria = []
-        score = 0
-
-        # Check marginal land
-        is_marginal = soil_quality == 'marginal'
-        if is_marginal:
-            criteria.append('Marginal Land')
-            score += self.WEIGHTS['marginal_land']
-
-        # Check brownfield status
-        if is_brownfield:
-            criteria.append('Brownfield Site')
-            score += self.WEIGHTS['brownfield']
-
-        # Check arid region
-        is_arid = avg_rainfall < self.ARID_RAINFALL_THRESHOLD
-        if is_arid:
-            criteria.append('Arid Region')
-            score += self.WEIGHTS['arid_region']
-
-        # Check grid access
-        has_grid = (
-            nearest_substation <= self.GRID_ACCESS_DISTANCE_MILES or
-            nearest_transmission <= self.GRID_ACCESS_DISTANCE_MILES
-        )
-        if has_grid:
-            criteria.append('Grid Access')
-            score += self.WEIGHTS['grid_access']
-
-        # Proximity bonus (very close to grid)
-        if nearest_substation <= 1.0 or nearest_transmission <= 1.0:
-            score += self.WEIGHTS['proximity_bonus']
-
-        # Cap score at 100
-        score = min(score, 100)
-
-        parcel = AFZParcel(
+        fields = dict(
             id=parcel_id,
             name=name,
             county=county,
@@ -139,158 +277,366 @@ class AFZClassifier:
             latitude=lat,
             longitude=lon,
             acres=acres,
-            afz_criteria=criteria,
-            score=score,
             soil_quality=soil_quality,
             is_brownfield=is_brownfield,
-            is_arid=is_arid,
             avg_rainfall_inches=avg_rainfall,
             nearest_substation_miles=nearest_substation,
             nearest_transmission_miles=nearest_transmission,
-            has_grid_access=has_grid,
             current_use=current_use,
             elevation_ft=elevation,
             water_access=water_access,
             notes=notes
         )
+        if self.infrastructure is not None:
+            substation, transmission = self.infrastructure.nearest(lat, lon)
+            if substation is not None:
+                fields['nearest_substation_miles'] = substation
+            if transmission is not None:
+                fields['nearest_transmission_miles'] = transmission
+        criteria, score, flags = self.rules.score_row(fields)
+        parcel = AFZParcel(afz_criteria=criteria, score=score, **flags, **fields)
 
         self.parcels.append(parcel)
         return parcel
 
+    def classify_many(self, parcels, chunk_rows: int = CLASSIFY_CHUNK_ROWS) -> range:
+        """
+        Classify many parcels, scoring whole columns at a time
+
+        Produces exactly the parcels classify_parcel would, row by row,
+        using NumPy array operations when NumPy is installed.
+
+        Args:
+            parcels: pandas DataFrame, dict of column arrays/lists, or an
+                     iterable of record dicts. Columns are named like the
+                     classify_parcel arguments or the AFZParcel fields;
+                     missing optional columns take classify_parcel defaults.
+            chunk_rows: Records classified per step when reading an iterable
+
+        Returns:
+            Positions of the new parcels in self.parcels
+        """
+        start = len(self.parcels)
+
+        if hasattr(parcels, 'columns') and hasattr(parcels, 'to_numpy'):
+            self._classify_columns({name: parcels[name] for name in parcels.columns})
+        elif isinstance(parcels, Mapping):
+            self._classify_columns(parcels)
+        else:
+            for chunk in _record_chunks(parcels, chunk_rows):
+                self._classify_columns(chunk)
+
+        return range(start, len(self.parcels))
+
+    def _classify_columns(self, columns: Mapping):
+        fields = _parcel_columns(columns)
+        if self.infrastructure is not None:
+            self.infrastructure.annotate(fields)
+        if np is not None:
+            fields['is_brownfield'] = _truth_array(fields['is_brownfield'])
+        else:
+            fields['is_brownfield'] = [bool(value) for value in fields['is_brownfield']]
+
+        scores = self.rules.evaluate(InputColumns(fields))
+        fields.update(scores.flags, score=scores.score)
+        self.parcels.extend_columns(fields, self._criteria_bits(scores))
+
+    def _register_criteria(self):
+        # Stored parcels list criteria in code order; give new ones codes in rule order
+        for rule in self.rules.criteria:
+            self.parcels.criterion_code(rule.name)
+
+    def _criteria_bits(self, scores):
+        codes = {name: self.parcels.criterion_code(name) for name in scores.criteria}
+        return self.rules.criteria_bits(scores, codes)
+
+    def rescore(self, rules: RuleSet):
+        """
+        Re-score every stored parcel under another rule set
+
+        Uses the stored parcel data, so nothing is re-read or re-ingested.
+        Later classify calls use the new rules too.
+        """
+        scores = rules.evaluate(StoreColumns(self.parcels))
+        self.rules = rules
+        self._register_criteria()
+        self.parcels.rescore(scores.score, self._criteria_bits(scores), scores.flags)
+
+    def compare_rules(self, rule_sets, min_score: int = 30) -> Dict[str, Dict]:
+        """
+        Evaluate several rule sets side by side without changing the parcels
+
+        Args:
+            rule_sets: {name: RuleSet} or a list of RuleSets (keyed by name)
+            min_score: Score a parcel needs to count as eligible
+
+        Returns:
+            Per rule set: eligible_parcels, total_acres, avg_score,
+            by_criteria (eligible parcels per criterion) and
+            changed_parcels (parcels whose score differs from the stored one)
+        """
+        if not isinstance(rule_sets, Mapping):
+            rule_sets = {rules.name: rules for rules in rule_sets}
+
+        store = self.parcels
+        current = store.columns['score']
+        results = {}
+        for name, rules in rule_sets.items():
+            scores = rules.evaluate(StoreColumns(store))
+            if np is not None:
+                score = np.asarray(scores.score)
+                mask = score >= min_score
+                eligible = int(mask.sum())
+                score_total = int(score[mask].sum())
+                changed = int((score != np.frombuffer(current, dtype=current.typecode)).sum())
+                by_criteria = {criterion: int((mask & np.asarray(met, dtype=bool)).sum())
+                               for criterion, met in scores.criteria.items()}
+            else:
+                mask = [value >= min_score for value in scores.score]
+                eligible = sum(mask)
+                score_total = sum(value for value, selected in zip(scores.score, mask) if selected)
+                changed = sum(new != old for new, old in zip(scores.score, current))
+                by_criteria = {criterion: sum(a and b for a, b in zip(mask, met))
+                               for criterion, met in scores.criteria.items()}
+
+            results[name] = {
+                'eligible_parcels': eligible,
+                'total_acres': store.total('acres', mask),
+                'avg_score': score_total / eligible if eligible else 0,
+                'by_criteria': by_criteria,
+                'changed_parcels': changed,
+            }
+        return results
+
+    @property
+    def spatial_index(self) -> GeoGrid:
+        """Grid index over parcel coordinates, keyed by position in self.parcels"""
+        if self._spatial_index is None:
+            self._spatial_index = GeoGrid()
+
+        # Catch up with parcels added since the last query
+        index = self._spatial_index
+        for position in range(len(index), len(self.parcels)):
+            index.insert(position, *self.parcels.coordinates(position))
+
+        return index
+
+    def parcels_within(self, lat: float, lon: float,
+                       radius_miles: float) -> List[Tuple[float, AFZParcel]]:
+        """Parcels within radius_miles of a point as (distance, parcel), nearest first"""
+        return [(d, self.parcels[i]) for d, i in self.spatial_index.within(lat, lon, radius_miles)]
+
+    def nearest_parcels(self, lat: float, lon: float, k: int = 5,
+                        max_miles: float = None) -> List[Tuple[float, AFZParcel]]:
+        """The k parcels closest to a point as (distance, parcel), nearest first"""
+        return [(d, self.parcels[i]) for d, i in self.spatial_index.nearest(lat, lon, k, max_miles)]
+
+    def query(self) -> ParcelQuery:
+        """
+        Start a composable parcel query
+
+        Example: the 50 best grid-connected Bosque parcels over 100 acres
+            classifier.query().where('county', '==', 'Bosque') \
+                .with_criteria('Grid Access').where('acres', '>', 100) \
+                .order_by('-score').limit(50)
+        """
+        return ParcelQuery(self)
+
     def get_eligible_parcels(self, min_score: int = 30) -> List[AFZParcel]:
         """Get all parcels meeting minimum AFZ eligibility score"""
-        return [p for p in self.parcels if p.score >= min_score]
+        return self.parcels.take(self.parcels.score_mask(min_score))
 
     def filter_by_criteria(self, criteria: str) -> List[AFZParcel]:
         """Filter parcels by specific AFZ criteria"""
-        return [p for p in self.parcels if criteria in p.afz_criteria]
+        return self.parcels.take(self.parcels.criteria_mask(criteria))
 
     def filter_by_county(self, county: str) -> List[AFZParcel]:
         """Filter parcels by county"""
-        return [p for p in self.parcels if p.county.lower() == county.lower()]
-
-    def get_statistics(self) -> Dict:
-        """Get statistics about AFZ-eligible parcels"""
-        if not self.parcels:
-            return {
-                'total_parcels': 0,
-                'eligible_parcels': 0,
-                'total_acres': 0,
-                'by_criteria': {}
-            }
+        county = county.lower()
+        return self.parcels.take(
+            self.parcels.category_mask('county', lambda value: value.lower() == county))
 
-        eligible = self.get_eligible_parcels()
+    def get_statistics(self, min_score: int = 30,
+                       group_by: Tuple[str, ...] = STATISTICS_GROUP_BY) -> Dict:
+        """
+        Get statistics about AFZ-eligible parcels
 
-        criteria_counts = {}
-        for parcel in eligible:
-            for criterion in parcel.afz_criteria:
-                criteria_counts[criterion] = criteria_counts.get(criterion, 0) + 1
+        Computed column-wise over the parcel store and cached until the
+        parcels change.
 
-        return {
-            'total_parcels': len(self.parcels),
-            'eligible_parcels': len(eligible),
-            'total_acres': sum(p.acres for p in eligible),
-            'avg_score': sum(p.score for p in eligible) / len(eligible) if eligible else 0,
-            'by_criteria': criteria_counts,
-            'by_county': self._count_by_field(eligible, 'county'),
-            'by_soil_quality': self._count_by_field(eligible, 'soil_quality'),
-            'brownfield_count': sum(1 for p in eligible if p.is_brownfield),
-            'arid_region_count': sum(1 for p in eligible if p.is_arid),
-            'grid_access_count': sum(1 for p in eligible if p.has_grid_access)
-        }
+        Args:
+            min_score: Score a parcel needs to count as eligible
+            group_by: Categorical fields (county, state, soil_quality,
+                      current_use, water_access) to count parcels by,
+                      reported as 'by_<field>'
+        """
+        group_by = tuple(group_by)
+        for field in group_by:
+            if field not in ParcelStore.CATEGORICAL_FIELDS:
+                raise ValueError(f"Cannot group statistics by '{field}'")
+
+        if self._statistics_version != self.parcels.version:
+            self._statistics_cache.clear()
+            self._statistics_version = self.parcels.version
+
+        key = (min_score, group_by)
+        stats = self._statistics_cache.get(key)
+        if stats is None:
+            stats = self._statistics_cache[key] = self._compute_statistics(min_score, group_by)
+        # Callers own their copy; the cached one stays intact
+        return copy.deepcopy(stats)
+
+    def _compute_statistics(self, min_score: int, group_by: Tuple[str, ...]) -> Dict:
+        store = self.parcels
+        mask = store.score_mask(min_score)
+        eligible = len(store.positions(mask))
+        return statistics_dict(
+            len(store), eligible, store.total('acres', mask), store.total('score', mask),
+            store.criteria_counts(mask),
+            {field: store.group_counts(field, mask) for field in group_by},
+            store.total('is_brownfield', mask), store.total('is_arid', mask),
+            store.total('has_grid_access', mask))
+
+    def export_to_json(self, filepath: str, min_score: int = 30, indent: Optional[int] = 2,
+                       compress: bool = None, trailer: bool = False):
+        """
+        Export eligible parcels to JSON file
 
-    def _count_by_field(self, parcels: List[AFZParcel], field: str) -> Dict[str, int]:
-        """Count parcels by a specific field"""
-        counts = {}
-        for parcel in parcels:
-            value = getattr(parcel, field)
-            counts[value] = counts.get(value, 0) + 1
-        return counts
-
-    def export_to_json(self, filepath: str, min_score: int = 30):
-        """Export eligible parcels to JSON file"""
-        eligible = self.get_eligible_parcels(min_score)
-        data = {
-            'metadata': {
-                'total_parcels': len(eligible),
-                'total_acres': sum(p.acres for p in eligible),
-                'min_score': min_score,
-                'generated_by': 'AFZ Classifier v1.0'
-            },
-            'statistics': self.get_statistics(),
-            'parcels': [asdict(p) for p in eligible]
-        }
+        Parcels are streamed to the file; statistics come from the
+        get_statistics cache.
 
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        Args:
+            indent: JSON indent, or None for compact output
+            compress: gzip the file (default: when filepath ends in .gz)
+            trailer: Write metadata/statistics after the parcels, in a
+                     single pass without a temporary spool file
+        """
+        statistics = self.get_statistics()
+        writer = ParcelJSONWriter(filepath, min_score, indent=indent,
+                                  compress=compress, trailer=trailer)
+        try:
+            for position in self.parcels.positions(self.parcels.score_mask(min_score)):
+                writer.add(self.parcels[position])
+        except BaseException:
+            writer.discard()
+            raise
+        writer.close(statistics)
 
         return filepath
 
-    def export_to_geojson(self, filepath: str, min_score: int = 30):
-        """Export eligible parcels to GeoJSON format for mapping"""
-        eligible = self.get_eligible_parcels(min_score)
-
-        features = []
-        for parcel in eligible:
-            feature = {
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [parcel.longitude, parcel.latitude]
-                },
-                'properties': {
-                    'id': parcel.id,
-                    'name': parcel.name,
-                    'county': parcel.county,
-                    'state': parcel.state,
-                    'acres': parcel.acres,
-                    'score': parcel.score,
-                    'criteria': ', '.join(parcel.afz_criteria),
-                    'soil_quality': parcel.soil_quality,
-                    'is_brownfield': parcel.is_brownfield,
-                    'is_arid': parcel.is_arid,
-                    'avg_rainfall': parcel.avg_rainfall_inches,
-                    'nearest_substation': parcel.nearest_substation_miles,
-                    'has_grid_access': parcel.has_grid_access,
-                    'current_use': parcel.current_use,
-                    'elevation': parcel.elevation_ft,
-                    'notes': parcel.notes
-                }
-            }
-            features.append(feature)
-
-        geojson = {
-            'type': 'FeatureCollection',
-            'metadata': {
-                'total_parcels': len(eligible),
-                'total_acres': sum(p.acres for p in eligible)
-            },
-            'features': features
-        }
+    def export_to_geojson(self, filepath: str, min_score: int = 30, indent: Optional[int] = 2,
+                          compress: bool = None, trailer: bool = False):
+        """
+        Export eligible parcels to GeoJSON format for mapping
 
-        with open(filepath, 'w') as f:
-            json.dump(geojson, f, indent=2)
+        Options as for export_to_json.
+        """
+        writer = ParcelGeoJSONWriter(filepath, min_score, indent=indent,
+                                     compress=compress, trailer=trailer)
+        try:
+            for position in self.parcels.positions(self.parcels.score_mask(min_score)):
+                writer.add(self.parcels[position])
+        except BaseException:
+            writer.discard()
+            raise
+        writer.close()
 
         return filepath
 
+    def export_tiles(self, output: str, min_score: int = 30, min_zoom: int = 4,
+                     max_zoom: int = 12, tile_format: str = 'dir', workers: int = None) -> Dict:
+        """
+        Export eligible parcels as zoom-level map tiles for the viewer
+
+        Tiles below max_zoom hold clusters (count, summed acres, average
+        score); max_zoom tiles hold the parcels themselves.
+
+        Args:
+            output: Tile directory, or .mbtiles file for tile_format='mbtiles'
+            tile_format: 'dir' (z/x/y.json files) or 'mbtiles' (SQLite)
+            workers: Worker processes building tiles (default: one per CPU)
+
+        Returns:
+            The tile index
+        """
+        return write_tiles(self.parcels, output, self.get_statistics(min_score), min_score,
+                           min_zoom, max_zoom, tile_format, workers)
+
+
+# AFZParcel field -> classify_parcel default (required fields are absent)
+FIELD_DEFAULTS = {
+    ARGUMENT_FIELDS.get(name, name): parameter.default
+    for name, parameter in inspect.signature(AFZClassifier.classify_parcel).parameters.items()
+    if name != 'self' and parameter.default is not inspect.Parameter.empty
+}
+
+# Fields classify_many reads from its input
+INPUT_FIELDS = [
+    ARGUMENT_FIELDS.get(name, name)
+    for name in inspect.signature(AFZClassifier.classify_parcel).parameters
+    if name != 'self'
+]
+
+
+def _parcel_columns(columns: Mapping) -> Dict:
+    """Rename input columns to AFZParcel fields and fill in defaults"""
+    fields = {}
+    for name, values in columns.items():
+        field = ARGUMENT_FIELDS.get(name, name)
+        if field in INPUT_FIELDS:
+            fields[field] = values.to_numpy() if hasattr(values, 'to_numpy') else values
+
+    missing = [field for field in INPUT_FIELDS
+               if field not in fields and field not in FIELD_DEFAULTS]
+    if missing:
+        raise ValueError(f"Missing parcel columns: {', '.join(missing)}")
+
+    count = len(fields['id'])
+    for field, default in FIELD_DEFAULTS.items():
+        if field not in fields:
+            fields[field] = [default] * count
+    return fields
+
+
+def _record_chunks(records: Iterable[Mapping], chunk_rows: int) -> Iterator[Dict]:
+    """Group parcel records into dicts of column lists"""
+    chunk = []
+    for record in records:
+        chunk.append({ARGUMENT_FIELDS.get(k, k): v for k, v in record.items()})
+        if len(chunk) >= chunk_rows:
+            yield _records_to_columns(chunk)
+            chunk = []
+    if chunk:
+        yield _records_to_columns(chunk)
+
+
+def _records_to_columns(records: List[Dict]) -> Dict:
+    columns = {}
+    for field in INPUT_FIELDS:
+        if field in FIELD_DEFAULTS:
+            default = FIELD_DEFAULTS[field]
+            columns[field] = [record.get(field, default) for record in records]
+            continue
+        try:
+            columns[field] = [record[field] for record in records]
+        except KeyError:
+            raise ValueError(f"Missing parcel columns: {field}") from None
+    return columns
+
+
+def _truth_array(values):
+    """Truthiness of each value, as classify_parcel's `if` would see it"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'b':
+        return values
+    return np.array([bool(value) for value in values.tolist()], dtype=bool)
+
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate distance between two coordinates in miles using Haversine formula
     """
-    R = 3959  # Earth's radius in miles
-
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) *
-         math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.asin(math.sqrt(a))
-
-    return R * c
+    return haversine(lat1, lon1, lat2, lon2)
 
 
 def main():
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Export Writers
+Incremental writers for the AFZ JSON and GeoJSON databases
+
+Parcels are encoded and written one at a time instead of being
+collected into one big document first, so peak memory does not grow
+with the number of parcels. Default output is byte-for-byte the
+indented layout the AFZ viewer has always loaded; compact and gzipped
+output are options.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+def parcel_feature(parcel) -> Dict:
+    """GeoJSON Point feature for an AFZParcel"""
+    return {
+        'type': 'Feature',
+        'geometry': {
+            'type': 'Point',
+            'coordinates': [parcel.longitude, parcel.latitude]
+        },
+        'properties': {
+            'id': parcel.id,
+            'name': parcel.name,
+            'county': parcel.county,
+            'state': parcel.state,
+            'acres': parcel.acres,
+            'score': parcel.score,
+            'criteria': ', '.join(parcel.afz_criteria),
+            'soil_quality': parcel.soil_quality,
+            'is_brownfield': parcel.is_brownfield,
+            'is_arid': parcel.is_arid,
+            'avg_rainfall': parcel.avg_rainfall_inches,
+            'nearest_substation': parcel.nearest_substation_miles,
+            'has_grid_access': parcel.has_grid_access,
+            'current_use': parcel.current_use,
+            'elevation': parcel.elevation_ft,
+            'notes': parcel.notes
+        }
+    }
+
+
+def _dumps(value, indent: Optional[int]) -> str:
+    if indent is None:
+        return json.dumps(value, separators=(',', ':'))
+    return json.dumps(value, indent=indent)
+
+
+def encode_item(item: Dict, indent: Optional[int] = 2) -> str:
+    """
+    JSON text of one list item as StreamingListWriter lays it out
+
+    Lets items be encoded elsewhere (e.g. in worker processes) and passed
+    to write_encoded.
+    """
+    if indent is None:
+        return json.dumps(item, separators=(',', ':'))
+    # Items sit two levels deep in the document
+    return json.dumps(item, indent=indent).replace('\n', '\n' + ' ' * (2 * indent))
+
+
+def encode_parcel(parcel, indent: Optional[int] = 2) -> Tuple[str, str]:
+    """Encoded (ParcelJSONWriter item, ParcelGeoJSONWriter feature) for a parcel"""
+    return encode_item(asdict(parcel), indent), encode_item(parcel_feature(parcel), indent)
+
+
+class StreamingListWriter:
+    """
+    Writes a JSON document whose main content is one long list,
+    receiving the list items one at a time
+
+    Output matches json.dump of the whole document with the same indent
+    (indent=None gives compact separators). Totals that are only known
+    at the end go either before the list, by spooling the encoded items
+    to a temporary file until close, or after it as a trailer, which
+    writes everything in a single pass. Files ending in .gz (or
+    compress=True) are gzipped with a fixed timestamp so identical
+    content gives identical bytes.
+    """
+
+    def __init__(self, path, list_key: str, prefix: Dict = None, indent: Optional[int] = 2,
+                 compress: bool = None, trailer: bool = False):
+        """
+        Args:
+            path: Output file, replaced atomically on finish()
+            list_key: Key of the streamed list
+            prefix: Keys known up front, written before the list
+            indent: JSON indent, or None for compact output
+            compress: gzip the output (default: when path ends in .gz)
+            trailer: Put the finish() document after the list instead of
+                     before it (no temporary spool file)
+        """
+        self.path = Path(path)
+        self.list_key = list_key
+        self.prefix = dict(prefix or {})
+        self.indent = indent
+        self.trailer = trailer
+        self.count = 0
+
+        if compress is None:
+            compress = self.path.suffix == '.gz'
+        self._tmp_file = self.path.with_name(self.path.name + '.tmp')
+        self._raw = open(self._tmp_file, 'wb')
+        if compress:
+            self._out = io.TextIOWrapper(
+                gzip.GzipFile(filename='', mode='wb', fileobj=self._raw, mtime=0),
+                encoding='utf-8')
+        else:
+            self._out = io.TextIOWrapper(self._raw, encoding='utf-8')
+
+        if trailer:
+            self._head = _dumps(dict(self.prefix, **{list_key: []}), indent).rsplit('[]', 1)[0]
+            self._out.write(self._head + '[')
+            self._items = self._out
+        else:
+            self._items = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+        if indent is None:
+            self._item_indent = ''
+        else:
+            # Items sit two levels deep in the document
+            self._item_indent = '\n' + ' ' * (2 * indent)
+
+    def write_item(self, item: Dict):
+        self.write_encoded(encode_item(item, self.indent))
+
+    def write_encoded(self, text: str):
+        """Write an item already encoded by encode_item with this writer's indent"""
+        self._items.write((',' if self.count else '') + self._item_indent + text)
+        self.count += 1
+
+    def _close_list(self):
+        if self.count and self.indent is not None:
+            self._out.write('\n' + ' ' * self.indent + ']')
+        else:
+            self._out.write(']')
+
+    def finish(self, document: Dict) -> Path:
+        """Write `document` around the streamed list and move the file into place"""
+        try:
+            if self.trailer:
+                self._close_list()
+                text = _dumps(dict(self.prefix, **{self.list_key: []}, **document), self.indent)
+                self._out.write(text[len(self._head) + 2:])
+            else:
+                text = _dumps(dict(self.prefix, **document, **{self.list_key: []}), self.indent)
+                head, tail = text.rsplit('[]', 1)
+                self._out.write(head + '[')
+                self._items.seek(0)
+                shutil.copyfileobj(self._items, self._out)
+                self._close_list()
+                self._out.write(tail)
+            self._close()
+            os.replace(self._tmp_file, self.path)
+        except BaseException:
+            self.discard()
+            raise
+        return self.path
+
+    def _close(self):
+        if not self.trailer:
+            self._items.close()
+        self._out.close()
+        self._raw.close()
+
+    def discard(self):
+        """Abandon the output, leaving any existing file untouched"""
+        self._close()
+        try:
+            os.remove(self._tmp_file)
+        except FileNotFoundError:
+            pass
+
+
+class ParcelJSONWriter(StreamingListWriter):
+    """Incremental export_to_json"""
+
+    def __init__(self, path, min_score: int = 30, **options):
+        """Options as for StreamingListWriter (indent, compress, trailer)"""
+        super().__init__(path, 'parcels', **options)
+        self.min_score = min_score
+        self.total_acres = 0
+
+    def add(self, parcel):
+        """Write the parcel if it meets min_score"""
+        if parcel.score >= self.min_score:
+            self.total_acres += parcel.acres
+            self.write_item(asdict(parcel))
+
+    def add_encoded(self, text: str, acres: float):
+        """Write a parcel encoded by encode_parcel (already known to meet min_score)"""
+        self.total_acres += acres
+        self.write_encoded(text)
+
+    def close(self, statistics: Dict) -> Path:
+        """Finish the file; statistics as returned by get_statistics"""
+        return self.finish({
+            'metadata': {
+                'total_parcels': self.count,
+                'total_acres': self.total_acres,
+                'min_score': self.min_score,
+                'generated_by': 'AFZ Classifier v1.0'
+            },
+            'statistics': statistics,
+        })
+
+
+class ParcelGeoJSONWriter(StreamingListWriter):
+    """Incremental export_to_geojson"""
+
+    def __init__(self, path, min_score: int = 30, **options):
+        """Options as for StreamingListWriter (indent, compress, trailer)"""
+        super().__init__(path, 'features', prefix={'type': 'FeatureCollection'}, **options)
+        self.min_score = min_score
+        self.total_acres = 0
+
+    def add(self, parcel):
+        """Write the parcel if it meets min_score"""
+        if parcel.score >= self.min_score:
+            self.total_acres += parcel.acres
+            self.write_item(parcel_feature(parcel))
+
+    def add_encoded(self, text: str, acres: float):
+        """Write a feature encoded by encode_parcel (already known to meet min_score)"""
+        self.total_acres += acres
+        self.write_encoded(text)
+
+    def close(self) -> Path:
+        return self.finish({
+            'metadata': {
+                'total_parcels': self.count,
+                'total_acres': self.total_acres
+            },
+        })
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Parcel Queries
+Composable, ranked queries over an AFZClassifier's parcels
+
+    best = (classifier.query()
+            .where('county', '==', 'Bosque')
+            .with_criteria('Grid Access')
+            .where('acres', '>', 100)
+            .order_by('-score', 'acres')
+            .limit(50))
+    for parcel in best:
+        ...
+
+Predicates become whole-column masks over the parcel store. Ranking
+avoids sorting the full set: a single numeric sort key walks a
+pre-sorted position index (kept per store version) and stops once
+enough parcels match; other orderings use heap selection of the top
+offset + limit. Results are materialized one parcel at a time as they
+are iterated.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import copy
+import heapq
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from afz_rules import StoreColumns, compile_condition
+from parcel_store import ParcelStore
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# Positions checked per step when walking a sorted index
+QUERY_CHUNK = 4096
+
+TEXT_OPERATORS = ('==', '!=', 'in', 'not_in', 'contains')
+
+
+class _Descending:
+    """Sort key wrapper reversing the order of any comparable value"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class ParcelQuery:
+    """
+    A lazily evaluated parcel query
+
+    Every method returns a new query, so a base query can be refined in
+    several directions. Nothing is evaluated until the query is iterated.
+    """
+
+    def __init__(self, classifier):
+        self._classifier = classifier
+        self._predicates: List[Callable[[ParcelStore], object]] = []
+        self._near: Optional[Tuple[float, float, float]] = None
+        self._order: Tuple[Tuple[str, bool], ...] = ()
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    def _refine(self, **changes) -> 'ParcelQuery':
+        query = copy.copy(self)
+        query._predicates = list(self._predicates)
+        for name, value in changes.items():
+            setattr(query, name, value)
+        return query
+
+    def where(self, field, op: str = None, value=None) -> 'ParcelQuery':
+        """
+        Keep parcels matching a condition
+
+        Args:
+            field: AFZParcel field, or a condition document as used by
+                   scoring rules ({'any': [...]}, {'not': {...}}, ...)
+            op: ==, !=, <, <=, >, >=, in, not_in; text fields (id, name,
+                notes) also take 'contains'
+            value: Value to compare with (a list for in / not_in)
+
+        Raises:
+            ValueError: Unknown field or operator, or an unusable value
+        """
+        if isinstance(field, dict):
+            predicate = self._compile(field)
+        elif field in ParcelStore.TEXT_FIELDS:
+            predicate = _text_predicate(field, op, value)
+        else:
+            predicate = self._compile({'field': field, 'op': op, 'value': value})
+        query = self._refine()
+        query._predicates.append(predicate)
+        return query
+
+    @staticmethod
+    def _compile(spec: Dict) -> Callable[[ParcelStore], object]:
+        _, column = compile_condition(spec, 'where', ParcelStore.NUMERIC_FIELDS)
+        return lambda store: column(StoreColumns(store))
+
+    def with_criteria(self, *criteria: str) -> 'ParcelQuery':
+        """Keep parcels meeting every one of the given AFZ criteria"""
+        query = self._refine()
+        for criterion in criteria:
+            query._predicates.append(lambda store, c=criterion: store.criteria_mask(c))
+        return query
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> 'ParcelQuery':
+        """Keep parcels within radius_miles of a point (enables ordering by 'distance')"""
+        return self._refine(_near=(lat, lon, radius_miles))
+
+    def order_by(self, *keys: str) -> 'ParcelQuery':
+        """
+        Sort by fields, '-field' for descending; ties keep store order
+
+        Keys are AFZParcel fields (except afz_criteria) or 'distance'
+        after within().
+        """
+        order = []
+        for key in keys:
+            descending = key.startswith('-')
+            field = key[1:] if descending else key
+            if field != 'distance' and field not in _SORT_FIELDS:
+                raise ValueError(f"Cannot order parcels by '{field}'")
+            order.append((field, descending))
+        return self._refine(_order=tuple(order))
+
+    def limit(self, count: Optional[int]) -> 'ParcelQuery':
+        if count is not None and count < 0:
+            raise ValueError("limit must not be negative")
+        return self._refine(_limit=count)
+
+    def offset(self, count: int) -> 'ParcelQuery':
+        if count < 0:
+            raise ValueError("offset must not be negative")
+        return self._refine(_offset=count)
+
+    def __iter__(self) -> Iterator:
+        store = self._classifier.parcels
+        for position in self.positions():
+            yield store.materialize(position)
+
+    def first(self):
+        """The first matching parcel, or None"""
+        return next(iter(self.limit(1)), None)
+
+    def count(self) -> int:
+        """Parcels matching the conditions, before limit and offset"""
+        store = self._classifier.parcels
+        mask = self._mask(store, self._hits())
+        if mask is None:
+            return len(store)
+        return len(store.positions(mask))
+
+    def positions(self) -> Iterator[int]:
+        """Store positions of the results, in order, computed as they are consumed"""
+        store = self._classifier.parcels
+        hits = self._hits()
+        mask = self._mask(store, hits)
+        if self._order and self._order[0][0] == 'distance' and hits is None:
+            raise ValueError("Ordering by 'distance' needs within()")
+
+        stop = None if self._limit is None else self._offset + self._limit
+        yield from islice(self._ordered(store, mask, hits, stop), self._offset, stop)
+
+    def _hits(self) -> Optional[List[Tuple[float, int]]]:
+        if self._near is None:
+            return None
+        return self._classifier.spatial_index.within(*self._near)
+
+    def _mask(self, store: ParcelStore, hits):
+        """Combined mask of every condition, or None when nothing is filtered"""
+        masks = [predicate(store) for predicate in self._predicates]
+        if hits is not None:
+            if np is not None:
+                near = np.zeros(len(store), dtype=bool)
+                near[[position for _, position in hits]] = True
+            else:
+                near = [False] * len(store)
+                for _, position in hits:
+                    near[position] = True
+            masks.append(near)
+
+        if not masks:
+            return None
+        if np is not None:
+            return np.logical_and.reduce([np.asarray(mask, dtype=bool) for mask in masks])
+        return [all(row) for row in zip(*masks)]
+
+    def _ordered(self, store: ParcelStore, mask, hits, stop: Optional[int]) -> Iterator[int]:
+        if not self._order:
+            return _walk(range(len(store)), mask)
+
+        if len(self._order) == 1:
+            field, descending = self._order[0]
+            if field in ParcelStore.NUMERIC_FIELDS:
+                return _walk(store.sorted_positions(field, descending), mask)
+            if field == 'distance':
+                ranked = sorted(hits, key=lambda hit: (-hit[0], hit[1])) if descending else hits
+                return _walk([position for _, position in ranked], mask)
+
+        # Several keys, or a categorical/text key: select the top `stop` by heap
+        candidates = range(len(store)) if mask is None else store.positions(mask)
+        key = self._sort_key(store, hits)
+        if stop is None:
+            return iter(sorted(candidates, key=key))
+        return iter(heapq.nsmallest(stop, candidates, key=key))
+
+    def _sort_key(self, store: ParcelStore, hits) -> Callable[[int], Tuple]:
+        getters = []
+        for field, descending in self._order:
+            if field == 'distance':
+                if hits is None:
+                    raise ValueError("Ordering by 'distance' needs within()")
+                get = {position: distance for distance, position in hits}.__getitem__
+            elif field in ParcelStore.NUMERIC_FIELDS:
+                get = store.columns[field].__getitem__
+            elif field in ParcelStore.CATEGORICAL_FIELDS:
+                values, codes = store.categories[field].values, store.codes[field]
+                get = (lambda values, codes: lambda i: values[codes[i]])(values, codes)
+            else:
+                get = store.text[field].__getitem__
+
+            numeric = field == 'distance' or field in ParcelStore.NUMERIC_FIELDS
+            if descending and numeric:
+                getters.append((lambda get: lambda i: -get(i))(get))
+            elif descending:
+                getters.append((lambda get: lambda i: _Descending(get(i)))(get))
+            else:
+                getters.append(get)
+        return lambda position: tuple(get(position) for get in getters)
+
+
+_SORT_FIELDS = (tuple(ParcelStore.NUMERIC_FIELDS) + ParcelStore.CATEGORICAL_FIELDS +
+                ParcelStore.TEXT_FIELDS)
+
+
+def _walk(order, mask) -> Iterator[int]:
+    """Positions of `order` that the mask selects, checked a chunk at a time"""
+    if mask is None:
+        yield from (order.tolist() if hasattr(order, 'tolist') else order)
+        return
+
+    if np is not None:
+        order = np.asarray(order, dtype=np.int64)
+        mask = np.asarray(mask, dtype=bool)
+        for start in range(0, len(order), QUERY_CHUNK):
+            chunk = order[start:start + QUERY_CHUNK]
+            yield from chunk[mask[chunk]].tolist()
+        return
+
+    for position in order:
+        if mask[position]:
+            yield position
+
+
+def _text_predicate(field: str, op: str, value) -> Callable[[ParcelStore], List[bool]]:
+    if op not in TEXT_OPERATORS:
+        raise ValueError(f"'{field}' takes {', '.join(TEXT_OPERATORS)}")
+    if op in ('in', 'not_in'):
+        if not isinstance(value, list):
+            raise ValueError(f"'{op}' needs a value list")
+        values = frozenset(value)
+        if op == 'in':
+            return lambda store: [text in values for text in store.text[field]]
+        return lambda store: [text not in values for text in store.text[field]]
+    if op == 'contains':
+        needle = str(value).lower()
+        return lambda store: [needle in text.lower() for text in store.text[field]]
+    if op == '==':
+        return lambda store: [text == value for text in store.text[field]]
+    return lambda store: [text != value for text in store.text[field]]
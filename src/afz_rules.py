@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Scoring Rules
+Declarative AFZ eligibility rules, compiled to column-wise predicates
+
+A rule set is a JSON document (config/afz_rules/*.json):
+
+    {
+      "name": "default",
+      "max_score": 100,
+      "criteria": [
+        {"name": "Arid Region", "points": 25, "flag": "is_arid",
+         "when": {"field": "avg_rainfall_inches", "op": "<", "value": 20.0}}
+      ],
+      "bonuses": [
+        {"name": "Proximity Bonus", "points": 10,
+         "when": {"any": [{"field": "nearest_substation_miles", "op": "<=", "value": 1.0},
+                          {"field": "nearest_transmission_miles", "op": "<=", "value": 1.0}]}}
+      ]
+    }
+
+Criteria add their points and are listed on the parcel; bonuses only add
+points. "flag" stores the criterion's outcome in a derived parcel flag
+(is_arid, has_grid_access). Conditions compare an AFZParcel field
+(==, !=, <, <=, >, >=, in, not_in) and combine with "all", "any" and
+"not".
+
+Compiling a rule set turns every condition into a whole-column
+predicate (NumPy when installed) plus a scalar one for classify_parcel,
+so a parcel store can be re-scored under another rule set, or several
+rule sets compared, without re-reading the source data.
+
+Usage:
+    python3 src/afz_rules.py [RULES ...] [--sources FILE ...] [--min-score 30]
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import argparse
+import json
+import operator
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from parcel_store import MAX_CRITERIA, ParcelStore
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+RULES_DIR = Path(__file__).resolve().parent.parent / 'config' / 'afz_rules'
+
+COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+MEMBERSHIP = ('in', 'not_in')
+
+# Flags a criterion may set; everything else about a parcel is input data
+DERIVED_FLAGS = ('is_arid', 'has_grid_access')
+
+# Fields rules may test
+NUMERIC_FIELDS = tuple(field for field in ParcelStore.NUMERIC_FIELDS
+                       if field not in DERIVED_FLAGS and field != 'score')
+CATEGORICAL_FIELDS = ParcelStore.CATEGORICAL_FIELDS
+
+
+class RuleError(ValueError):
+    """A rule set document is malformed"""
+
+
+class Scores(NamedTuple):
+    """Outcome of a rule set over a batch of parcels"""
+    score: Sequence[int]
+    criteria: Dict[str, Sequence[bool]]
+    flags: Dict[str, Sequence[bool]]
+
+
+class InputColumns:
+    """Rule operands from classify_many input columns (AFZParcel field names)"""
+
+    def __init__(self, fields: Mapping):
+        self.fields = fields
+        self.count = len(fields['id'])
+
+    def compare(self, field: str, op: str, value):
+        values = self.fields[field]
+        if np is not None:
+            dtype = bool if field in ParcelStore.FLAG_FIELDS else float
+            return COMPARISONS[op](np.asarray(values, dtype=dtype), value)
+        return [COMPARISONS[op](v, value) for v in values]
+
+    def isin(self, field: str, values: frozenset):
+        column = self.fields[field]
+        if np is not None:
+            return np.isin(np.asarray(column), list(values))
+        return [v in values for v in column]
+
+
+class StoreColumns:
+    """Rule operands read straight from a ParcelStore"""
+
+    def __init__(self, store: ParcelStore):
+        self.store = store
+        self.count = len(store)
+
+    def compare(self, field: str, op: str, value):
+        column = self.store.columns[field]
+        if np is not None:
+            return COMPARISONS[op](np.frombuffer(column, dtype=column.typecode), value)
+        return [COMPARISONS[op](v, value) for v in column]
+
+    def isin(self, field: str, values: frozenset):
+        return self.store.category_mask(field, values.__contains__)
+
+
+def _all(masks: List):
+    if np is not None:
+        return np.logical_and.reduce(masks)
+    return [all(row) for row in zip(*masks)]
+
+
+def _any(masks: List):
+    if np is not None:
+        return np.logical_or.reduce(masks)
+    return [any(row) for row in zip(*masks)]
+
+
+def _not(mask):
+    if np is not None:
+        return ~np.asarray(mask, dtype=bool)
+    return [not selected for selected in mask]
+
+
+# A compiled condition: (row predicate, column predicate)
+Condition = Tuple[Callable[[Mapping], bool], Callable[[object], object]]
+
+
+def compile_condition(spec, where: str = 'when',
+                      numeric_fields: Sequence[str] = NUMERIC_FIELDS) -> Condition:
+    """
+    Compile a condition document
+
+    Args:
+        numeric_fields: Numeric fields the condition may test (rules
+                        cannot test the derived score and flags)
+
+    Raises:
+        RuleError: Unknown field or operator, or a malformed document
+    """
+    if not isinstance(spec, dict):
+        raise RuleError(f"{where}: a condition must be an object")
+
+    for combinator, combine in (('all', _all), ('any', _any)):
+        if combinator in spec:
+            parts = spec[combinator]
+            if not isinstance(parts, list) or not parts:
+                raise RuleError(f"{where}.{combinator}: expected a non-empty list")
+            compiled = [compile_condition(part, f"{where}.{combinator}[{i}]", numeric_fields)
+                        for i, part in enumerate(parts)]
+            rows = [row for row, _ in compiled]
+            columns = [column for _, column in compiled]
+            test = all if combinator == 'all' else any
+            return ((lambda record: test(row(record) for row in rows)),
+                    (lambda cols: combine([column(cols) for column in columns])))
+
+    if 'not' in spec:
+        row, column = compile_condition(spec['not'], f"{where}.not", numeric_fields)
+        return (lambda record: not row(record)), (lambda cols: _not(column(cols)))
+
+    field, op, value = spec.get('field'), spec.get('op'), spec.get('value')
+    if field in CATEGORICAL_FIELDS:
+        if op in ('==', '!='):
+            values = frozenset([value])
+        elif op in MEMBERSHIP and isinstance(value, list):
+            values = frozenset(value)
+        else:
+            raise RuleError(f"{where}: '{field}' takes ==, !=, in or not_in with a value list")
+        negate = op in ('!=', 'not_in')
+        if negate:
+            return ((lambda record: record[field] not in values),
+                    (lambda cols: _not(cols.isin(field, values))))
+        return (lambda record: record[field] in values), (lambda cols: cols.isin(field, values))
+
+    if field in numeric_fields:
+        if op in MEMBERSHIP:
+            if not isinstance(value, list):
+                raise RuleError(f"{where}: '{op}' needs a value list")
+            parts = [{'field': field, 'op': '==', 'value': v} for v in value]
+            if parts:
+                inner = compile_condition({'any': parts}, where, numeric_fields)
+            else:
+                inner = (lambda record: False), (lambda cols: _false(cols.count))
+            if op == 'not_in':
+                row, column = inner
+                return (lambda record: not row(record)), (lambda cols: _not(column(cols)))
+            return inner
+        if op not in COMPARISONS:
+            raise RuleError(f"{where}: unknown operator {op!r}")
+        if isinstance(value, bool) or field in ParcelStore.FLAG_FIELDS:
+            if not isinstance(value, bool):
+                raise RuleError(f"{where}: '{field}' is compared with true or false")
+        elif not isinstance(value, (int, float)):
+            raise RuleError(f"{where}: '{field}' is compared with a number")
+        compare = COMPARISONS[op]
+        if field in ParcelStore.FLAG_FIELDS:
+            return ((lambda record: compare(bool(record[field]), value)),
+                    (lambda cols: cols.compare(field, op, value)))
+        return ((lambda record: compare(record[field], value)),
+                (lambda cols: cols.compare(field, op, value)))
+
+    raise RuleError(f"{where}: unknown field {field!r}")
+
+
+class Rule(NamedTuple):
+    name: str
+    points: int
+    flag: Optional[str]
+    row: Callable[[Mapping], bool]
+    column: Callable[[object], object]
+
+
+class RuleSet:
+    """A compiled AFZ scoring rule set"""
+
+    def __init__(self, document: Dict):
+        """
+        Args:
+            document: Rule set as loaded from JSON
+
+        Raises:
+            RuleError: The document is malformed
+        """
+        if not isinstance(document, dict):
+            raise RuleError("A rule set must be a JSON object")
+        self.document = document
+        self.name = str(document.get('name', 'unnamed'))
+        self.description = document.get('description', '')
+        self.max_score = document.get('max_score', 100)
+        if not isinstance(self.max_score, int) or isinstance(self.max_score, bool):
+            raise RuleError("max_score must be an integer")
+
+        self.criteria = [self._compile(rule, f"criteria[{i}]", criterion=True)
+                         for i, rule in enumerate(document.get('criteria', []))]
+        self.bonuses = [self._compile(rule, f"bonuses[{i}]", criterion=False)
+                        for i, rule in enumerate(document.get('bonuses', []))]
+
+        names = [rule.name for rule in self.criteria]
+        if len(set(names)) != len(names):
+            raise RuleError("Criteria names must be unique")
+        if len(names) > MAX_CRITERIA:
+            raise RuleError(f"At most {MAX_CRITERIA} criteria are supported")
+        flags = [rule.flag for rule in self.criteria if rule.flag]
+        if len(set(flags)) != len(flags):
+            raise RuleError("Each flag can be set by one criterion only")
+
+    def __reduce__(self):
+        # Compiled conditions are closures; rebuild from the document (for worker processes)
+        return self.__class__, (self.document,)
+
+    @staticmethod
+    def _compile(rule, where: str, criterion: bool) -> Rule:
+        if not isinstance(rule, dict) or 'name' not in rule or 'when' not in rule:
+            raise RuleError(f"{where}: needs 'name' and 'when'")
+        points = rule.get('points', 0)
+        if not isinstance(points, int) or isinstance(points, bool):
+            raise RuleError(f"{where}: points must be an integer")
+        flag = rule.get('flag')
+        if flag is not None and (not criterion or flag not in DERIVED_FLAGS):
+            raise RuleError(f"{where}: flag must be one of {', '.join(DERIVED_FLAGS)} "
+                            "(criteria only)")
+        row, column = compile_condition(rule['when'], f"{where}.when")
+        return Rule(str(rule['name']), points, flag, row, column)
+
+    @classmethod
+    def load(cls, path) -> 'RuleSet':
+        """Load and compile a rule set file"""
+        path = Path(path)
+        with open(path) as f:
+            try:
+                document = json.load(f)
+            except json.JSONDecodeError as e:
+                raise RuleError(f"{path.name}: invalid JSON: {e.msg}") from None
+        document.setdefault('name', path.stem)
+        return cls(document)
+
+    def score_row(self, record: Mapping) -> Tuple[List[str], int, Dict[str, bool]]:
+        """
+        Score one parcel
+
+        Args:
+            record: AFZParcel field values
+
+        Returns:
+            (criteria met, score, derived flags)
+        """
+        criteria = []
+        score = 0
+        flags = dict.fromkeys(DERIVED_FLAGS, False)
+        for rule in self.criteria:
+            met = bool(rule.row(record))
+            if rule.flag:
+                flags[rule.flag] = met
+            if met:
+                criteria.append(rule.name)
+                score += rule.points
+        for rule in self.bonuses:
+            if rule.row(record):
+                score += rule.points
+        return criteria, min(score, self.max_score), flags
+
+    def evaluate(self, columns) -> Scores:
+        """Score every parcel of an InputColumns or StoreColumns at once"""
+        count = columns.count
+        criteria = {rule.name: rule.column(columns) for rule in self.criteria}
+        met = list(criteria.values()) + [rule.column(columns) for rule in self.bonuses]
+        points = [rule.points for rule in self.criteria + self.bonuses]
+
+        flags = {}
+        for flag in DERIVED_FLAGS:
+            rule = next((rule for rule in self.criteria if rule.flag == flag), None)
+            flags[flag] = criteria[rule.name] if rule else _false(count)
+
+        if np is not None:
+            score = np.zeros(count, dtype=np.int64)
+            for mask, value in zip(met, points):
+                score += np.asarray(mask, dtype=bool) * value
+            score = np.minimum(score, self.max_score)
+        else:
+            score = [min(sum(value for selected, value in zip(row, points) if selected),
+                         self.max_score)
+                     for row in zip(*met)] if met else [min(0, self.max_score)] * count
+        return Scores(score, criteria, flags)
+
+    def criteria_bits(self, scores: Scores, codes: Mapping[str, int]):
+        """Per-parcel criteria bitmask using a store's criteria codes"""
+        if np is not None:
+            bits = np.zeros(len(scores.score), dtype='I')
+            for name, mask in scores.criteria.items():
+                bits |= np.asarray(mask, dtype='I') << codes[name]
+            return bits
+        bits = [0] * len(scores.score)
+        for name, mask in scores.criteria.items():
+            bit = 1 << codes[name]
+            bits = [b | bit if selected else b for b, selected in zip(bits, mask)]
+        return bits
+
+
+def _false(count: int):
+    return np.zeros(count, dtype=bool) if np is not None else [False] * count
+
+
+def default_rules(weights: Mapping[str, int], arid_rainfall: float,
+                  grid_distance: float, proximity_distance: float = 1.0) -> RuleSet:
+    """The classic AFZ rules, built from AFZClassifier's constants"""
+    def within(miles):
+        return {'any': [{'field': 'nearest_substation_miles', 'op': '<=', 'value': miles},
+                        {'field': 'nearest_transmission_miles', 'op': '<=', 'value': miles}]}
+
+    return RuleSet({
+        'name': 'default',
+        'description': 'AFZ framework scoring',
+        'max_score': 100,
+        'criteria': [
+            {'name': 'Marginal Land', 'points': weights['marginal_land'],
+             'when': {'field': 'soil_quality', 'op': '==', 'value': 'marginal'}},
+            {'name': 'Brownfield Site', 'points': weights['brownfield'],
+             'when': {'field': 'is_brownfield', 'op': '==', 'value': True}},
+            {'name': 'Arid Region', 'points': weights['arid_region'], 'flag': 'is_arid',
+             'when': {'field': 'avg_rainfall_inches', 'op': '<', 'value': arid_rainfall}},
+            {'name': 'Grid Access', 'points': weights['grid_access'], 'flag': 'has_grid_access',
+             'when': within(grid_distance)},
+        ],
+        'bonuses': [
+            {'name': 'Proximity Bonus', 'points': weights['proximity_bonus'],
+             'when': within(proximity_distance)},
+        ],
+    })
+
+
+def load_rule_sets(paths: Sequence = ()) -> Dict[str, RuleSet]:
+    """Rule sets by name, from the given files or every file in config/afz_rules"""
+    paths = list(paths) or sorted(RULES_DIR.glob('*.json'))
+    rule_sets = {}
+    for path in paths:
+        rules = RuleSet.load(path)
+        if rules.name in rule_sets:
+            raise RuleError(f"Duplicate rule set name: {rules.name}")
+        rule_sets[rules.name] = rules
+    return rule_sets
+
+
+def main(argv=None):
+    from afz_classifier import AFZClassifier
+    from generate_afz_data import DEFAULT_SOURCES, iter_source_parcels
+
+    parser = argparse.ArgumentParser(description='Compare AFZ scoring rule sets')
+    parser.add_argument('rules', nargs='*', help='Rule set files (default: config/afz_rules/*.json)')
+    parser.add_argument('--sources', nargs='+', default=DEFAULT_SOURCES,
+                        help='Parcel files (.csv, .jsonl, .geojson)')
+    parser.add_argument('--min-score', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    try:
+        rule_sets = load_rule_sets(args.rules)
+    except (OSError, RuleError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    classifier = AFZClassifier()
+    classifier.classify_many(iter_source_parcels(args.sources, []))
+    results = classifier.compare_rules(rule_sets, args.min_score)
+
+    print(f"AFZ Scenario Comparison ({len(classifier.parcels):,} parcels, "
+          f"min score {args.min_score})\n")
+    print(f"{'Rule set':<24}{'Eligible':>10}{'Acres':>14}{'Avg Score':>11}{'Changed':>9}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['eligible_parcels']:>10,}{result['total_acres']:>14,.0f}"
+              f"{result['avg_score']:>11.1f}{result['changed_parcels']:>9,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
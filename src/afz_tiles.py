@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Map Tiles
+Pre-tiled, zoom-level aggregated AFZ parcel output for afz-viewer.html
+
+Parcels are cut into standard web-map (z/x/y, Web Mercator) tiles.
+Below the detail zoom each tile holds clusters: parcels are binned on
+a CLUSTER_CELLS x CLUSTER_CELLS grid per tile and each bin reports its
+parcel count, summed acres, average score and mean position. At the
+detail zoom tiles hold the full parcel records. The viewer then fetches
+only the tiles in view instead of the whole database.
+
+Formats:
+    dir      - <output>/<z>/<x>/<y>.json plus <output>/index.json
+               (plain files, works on GitHub Pages)
+    mbtiles  - MBTiles-style SQLite: metadata and tiles tables, TMS row
+               numbering, gzipped JSON tile_data
+
+Each zoom level is split into work units - runs of tile columns holding
+about PARCELS_PER_TASK parcels - built in parallel worker processes.
+Workers get the parcel columns once, then group, cluster and encode the
+tiles of each unit themselves; only (zoom, column range) goes out and
+encoded tiles come back.
+
+Usage:
+    python3 src/afz_tiles.py [SOURCE ...] [--output data/afz_tiles]
+                             [--format dir|mbtiles] [--min-zoom 4]
+                             [--max-zoom 12] [--workers N]
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import groupby
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# Cluster grid per tile edge (8 -> 32 pixel bins on 256 pixel tiles)
+CLUSTER_CELLS = 8
+CLUSTER_SHIFT = 3
+
+MAX_LATITUDE = 85.0511287798
+
+# Parcels per work unit (a unit never splits a tile column)
+PARCELS_PER_TASK = 20000
+
+# Below this many work units, building them in-process beats starting workers
+PARALLEL_MIN_TASKS = 4
+
+# Units queued per worker; bounds the encoded tiles held in memory
+TASKS_PER_WORKER = 2
+
+# (zoom, first tile column, end tile column, detail tiles?)
+TileUnit = Tuple[int, int, int, bool]
+EncodedTile = Tuple[int, int, int, bytes]
+
+
+def mercator(lat: float, lon: float) -> Tuple[float, float]:
+    """Web Mercator position scaled to [0, 1) x [0, 1)"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+def _mercator_columns(lats, lons):
+    if np is not None:
+        lat = np.clip(np.asarray(lats, dtype=float), -MAX_LATITUDE, MAX_LATITUDE)
+        x = (np.asarray(lons, dtype=float) + 180.0) / 360.0
+        sin_lat = np.sin(np.radians(lat))
+        y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+        return np.clip(x, 0.0, 1 - 1e-12), np.clip(y, 0.0, 1 - 1e-12)
+
+    points = [mercator(lat, lon) for lat, lon in zip(lats, lons)]
+    return [p[0] for p in points], [p[1] for p in points]
+
+
+def _floor_scaled(values, scale: int):
+    """floor(value * scale) of every value, as ints"""
+    if np is not None:
+        return np.floor(values * scale).astype(np.int64)
+    return [int(value * scale) for value in values]
+
+
+def _encode_tile(z: int, x: int, y: int, key: str, items: List) -> EncodedTile:
+    tile = {'z': z, 'x': x, 'y': y, key: items}
+    return z, x, y, json.dumps(tile, separators=(',', ':')).encode('utf-8')
+
+
+class TileSource:
+    """
+    Columns of the tiled parcels, shared once with every worker
+
+    Points are also kept ordered west to east, so the parcels of a run
+    of tile columns are one slice of that order at any zoom.
+    """
+
+    def __init__(self, parcels, positions: List[int]):
+        """
+        Args:
+            parcels: ParcelStore
+            positions: Store positions of the parcels to tile
+        """
+        self.parcels = parcels
+        self.positions = positions
+        columns = parcels.columns
+        lats = [columns['latitude'][i] for i in positions]
+        lons = [columns['longitude'][i] for i in positions]
+        acres = [columns['acres'][i] for i in positions]
+        scores = [columns['score'][i] for i in positions]
+        self.xs, self.ys = _mercator_columns(lats, lons)
+
+        if np is not None:
+            self.lats, self.lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+            self.acres, self.scores = np.asarray(acres, dtype=float), np.asarray(scores)
+            self.by_x = np.argsort(self.xs, kind='stable')
+            self.sorted_xs = self.xs[self.by_x]
+        else:
+            self.lats, self.lons, self.acres, self.scores = lats, lons, acres, scores
+            self.by_x = sorted(range(len(positions)), key=self.xs.__getitem__)
+            self.sorted_xs = [self.xs[i] for i in self.by_x]
+
+    def units(self, z: int, detail: bool, size: int = None) -> List[TileUnit]:
+        """Work units covering every non-empty tile column of a zoom level"""
+        size = size or PARCELS_PER_TASK
+        tile_columns = _floor_scaled(self.sorted_xs, 1 << z)
+        if np is not None:
+            runs = zip(*(values.tolist() for values in np.unique(tile_columns, return_counts=True)))
+        else:
+            runs = ((column, len(list(points))) for column, points in groupby(tile_columns))
+
+        units = []
+        start, total = None, 0
+        for column, count in runs:
+            if start is None:
+                start = column
+            total += count
+            if total >= size:
+                units.append((z, start, column + 1, detail))
+                start, total = None, 0
+        if start is not None:
+            units.append((z, start, column + 1, detail))
+        return units
+
+    def members(self, z: int, x_start: int, x_end: int):
+        """Indexes of the points in tile columns [x_start, x_end), in input order"""
+        # Scaling by a power of two is exact, so these bounds agree with
+        # floor(x * 2**z) for every point
+        low, high = x_start / (1 << z), x_end / (1 << z)
+        if np is not None:
+            bounds = np.searchsorted(self.sorted_xs, [low, high])
+            return np.sort(self.by_x[bounds[0]:bounds[1]])
+        return sorted(self.by_x[bisect.bisect_left(self.sorted_xs, low):
+                                bisect.bisect_left(self.sorted_xs, high)])
+
+    def cluster_tiles(self, z: int, members) -> Iterator[EncodedTile]:
+        """
+        Cluster tiles of the member points
+
+        Each bin on the CLUSTER_CELLS grid reports its parcel count, summed
+        acres, average score and mean position. Sums run in input order,
+        so the NumPy and pure-Python paths give the same bytes.
+        """
+        scale = 1 << (z + CLUSTER_SHIFT)
+        if np is not None:
+            cols = _floor_scaled(self.xs[members], scale)
+            rows = _floor_scaled(self.ys[members], scale)
+            keys, inverse = np.unique(cols * scale + rows, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            sums = [np.bincount(inverse, weights=column[members]).tolist()
+                    for column in (self.acres, self.scores, self.lats, self.lons)]
+            cells = zip((keys // scale).tolist(), (keys % scale).tolist(),
+                        np.bincount(inverse).tolist(), *sums)
+        else:
+            bins: Dict[Tuple[int, int], List] = {}
+            for i in members:
+                key = (int(self.xs[i] * scale), int(self.ys[i] * scale))
+                cell = bins.get(key)
+                if cell is None:
+                    bins[key] = [1, self.acres[i], self.scores[i], self.lats[i], self.lons[i]]
+                else:
+                    cell[0] += 1
+                    cell[1] += self.acres[i]
+                    cell[2] += self.scores[i]
+                    cell[3] += self.lats[i]
+                    cell[4] += self.lons[i]
+            cells = (key + tuple(cell) for key, cell in sorted(bins.items()))
+
+        # Cells come in (col, row) order; regroup them by tile, stable
+        by_tile = sorted(cells, key=lambda cell: (cell[0] >> CLUSTER_SHIFT,
+                                                  cell[1] >> CLUSTER_SHIFT))
+        for (x, y), tile_cells in groupby(by_tile, key=lambda cell: (cell[0] >> CLUSTER_SHIFT,
+                                                                     cell[1] >> CLUSTER_SHIFT)):
+            clusters = [
+                {
+                    'lat': round(lat_sum / count, 6),
+                    'lon': round(lon_sum / count, 6),
+                    'count': count,
+                    'acres': round(acres, 2),
+                    'avg_score': round(score_sum / count, 1),
+                }
+                for _, _, count, acres, score_sum, lat_sum, lon_sum in tile_cells
+            ]
+            yield _encode_tile(z, x, y, 'clusters', clusters)
+
+    def detail_tiles(self, z: int, members) -> Iterator[EncodedTile]:
+        """Tiles holding the member parcels' full records, in input order"""
+        scale = 1 << z
+        if np is not None:
+            xs = _floor_scaled(self.xs[members], scale).tolist()
+            ys = _floor_scaled(self.ys[members], scale).tolist()
+            members = members.tolist()
+        else:
+            xs = [int(self.xs[i] * scale) for i in members]
+            ys = [int(self.ys[i] * scale) for i in members]
+
+        tiles: Dict[Tuple[int, int], List] = {}
+        for i, x, y in zip(members, xs, ys):
+            # A shallow copy of the freshly built parcel; asdict's deep copy
+            # is the slowest step of tiling and buys nothing here
+            parcel = self.parcels.materialize(self.positions[i])
+            tiles.setdefault((x, y), []).append(dict(vars(parcel)))
+        for (x, y), parcels in sorted(tiles.items()):
+            yield _encode_tile(z, x, y, 'parcels', parcels)
+
+
+def build_unit(source: TileSource, unit: TileUnit) -> List[EncodedTile]:
+    """Encode every tile of a work unit: [(z, x, y, compact JSON bytes)]"""
+    z, x_start, x_end, detail = unit
+    members = source.members(z, x_start, x_end)
+    if detail:
+        return list(source.detail_tiles(z, members))
+    return list(source.cluster_tiles(z, members))
+
+
+# Tile source of a worker process, set once by _init_worker
+_worker_state: Dict = {}
+
+
+def _init_worker(source: TileSource):
+    _worker_state['source'] = source
+
+
+def _build_in_worker(unit: TileUnit) -> List[EncodedTile]:
+    return build_unit(_worker_state['source'], unit)
+
+
+class _DirectorySink:
+    def __init__(self, output: Path):
+        self.output = output
+        self._tmp_dir = output.with_name(output.name + '.tmp')
+        if self._tmp_dir.exists():
+            shutil.rmtree(self._tmp_dir)
+        self._tmp_dir.mkdir(parents=True)
+
+    def write(self, z: int, x: int, y: int, data: bytes):
+        path = self._tmp_dir / str(z) / str(x)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / f'{y}.json').write_bytes(data)
+
+    def close(self, index: Dict):
+        (self._tmp_dir / 'index.json').write_text(json.dumps(index, indent=2))
+        # Swap the finished tree in; the viewer never sees a half-written set
+        if self.output.exists():
+            shutil.rmtree(self.output)
+        os.replace(self._tmp_dir, self.output)
+
+    def discard(self):
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class _MBTilesSink:
+    def __init__(self, output: Path):
+        self.output = output
+        self._tmp_file = output.with_name(output.name + '.tmp')
+        if self._tmp_file.exists():
+            self._tmp_file.unlink()
+        self.conn = sqlite3.connect(str(self._tmp_file))
+        self.conn.executescript("""
+            CREATE TABLE metadata (name TEXT, value TEXT);
+            CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER,
+                                tile_row INTEGER, tile_data BLOB);
+            CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+        """)
+
+    def write(self, z: int, x: int, y: int, data: bytes):
+        # MBTiles numbers rows from the south (TMS)
+        self.conn.execute('INSERT INTO tiles VALUES (?, ?, ?, ?)',
+                          (z, x, (1 << z) - 1 - y, gzip.compress(data, mtime=0)))
+
+    def close(self, index: Dict):
+        metadata = {
+            'name': 'AFZ Parcels',
+            'format': 'json',
+            'minzoom': index['min_zoom'],
+            'maxzoom': index['max_zoom'],
+            'bounds': ','.join(str(v) for v in index['bounds']),
+            'json': json.dumps(index),
+        }
+        self.conn.executemany('INSERT INTO metadata VALUES (?, ?)',
+                              [(k, str(v)) for k, v in metadata.items()])
+        self.conn.commit()
+        self.conn.close()
+        os.replace(self._tmp_file, self.output)
+
+    def discard(self):
+        self.conn.close()
+        try:
+            os.remove(self._tmp_file)
+        except FileNotFoundError:
+            pass
+
+
+def _build_in_pool(pool: ProcessPoolExecutor, build: Callable, tasks: Iterable,
+                   window: int) -> Iterator[EncodedTile]:
+    """
+    Run `build` on each task in the pool, at most `window` at a time,
+    yielding tiles as each task finishes
+
+    Tasks are submitted only as slots free up, so at most `window`
+    tasks' encoded tiles are in memory at once. Tiles are addressed by
+    z/x/y, so completion order does not change the output.
+    """
+    pending = set()
+    for task in tasks:
+        pending.add(pool.submit(build, task))
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield from future.result()
+
+
+SINKS = {
+    'dir': _DirectorySink,
+    'mbtiles': _MBTilesSink,
+}
+
+
+def write_tiles(parcels, output, statistics: Dict, min_score: int = 30, min_zoom: int = 4,
+                max_zoom: int = 12, tile_format: str = 'dir', workers: int = None) -> Dict:
+    """
+    Write zoom-level tiles for the parcels scoring at least min_score
+
+    Args:
+        parcels: ParcelStore
+        output: Tile directory, or .mbtiles file for tile_format='mbtiles'
+        statistics: Overall statistics to publish in the index
+        workers: Worker processes (default: one per CPU)
+
+    Returns:
+        The tile index (also written as index.json / MBTiles metadata)
+    """
+    if tile_format not in SINKS:
+        raise ValueError(f"Unsupported tile format: {tile_format}")
+    if not 0 <= min_zoom <= max_zoom:
+        raise ValueError("Zoom levels must satisfy 0 <= min_zoom <= max_zoom")
+
+    positions = parcels.positions(parcels.score_mask(min_score))
+    sink = SINKS[tile_format](Path(output))
+    tile_counts = {z: 0 for z in range(min_zoom, max_zoom + 1)}
+
+    source = TileSource(parcels, positions)
+    units = [unit for z in range(min_zoom, max_zoom + 1)
+             for unit in source.units(z, detail=z == max_zoom)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers > 1 and len(units) >= PARALLEL_MIN_TASKS:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(source,))
+        built = _build_in_pool(pool, _build_in_worker, units, workers * TASKS_PER_WORKER)
+    else:
+        pool = None
+        built = (tile for unit in units for tile in build_unit(source, unit))
+
+    try:
+        for z, x, y, data in built:
+            sink.write(z, x, y, data)
+            tile_counts[z] += 1
+    except BaseException:
+        sink.discard()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    lats = [parcels.columns['latitude'][i] for i in positions]
+    lons = [parcels.columns['longitude'][i] for i in positions]
+    bounds = [min(lons), min(lats), max(lons), max(lats)] if positions else [-180, -85, 180, 85]
+
+    index = {
+        'format': 'afz-tiles',
+        'version': 1,
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'cluster_cells': CLUSTER_CELLS,
+        'bounds': bounds,
+        'tiles': {str(z): count for z, count in tile_counts.items()},
+        'metadata': {
+            'total_parcels': len(positions),
+            'total_acres': sum(parcels.columns['acres'][i] for i in positions),
+            'min_score': min_score,
+            'generated_by': 'AFZ Classifier v1.0'
+        },
+        'statistics': statistics,
+        'counties': sorted({parcels.categories['county'].values[parcels.codes['county'][i]]
+                            for i in positions}),
+    }
+    sink.close(index)
+    return index
+
+
+def main(argv=None):
+    from afz_classifier import AFZClassifier
+    from generate_afz_data import DEFAULT_SOURCES, iter_source_parcels
+
+    parser = argparse.ArgumentParser(description='Build AFZ map tiles for afz-viewer.html')
+    parser.add_argument('sources', nargs='*',
+                        help='Parcel files (.csv, .jsonl, .geojson); default: the Texas dataset')
+    parser.add_argument('--output', default='data/afz_tiles',
+                        help='Tile directory (or .mbtiles file)')
+    parser.add_argument('--format', dest='tile_format', choices=sorted(SINKS), default='dir')
+    parser.add_argument('--min-score', type=int, default=30)
+    parser.add_argument('--min-zoom', type=int, default=4)
+    parser.add_argument('--max-zoom', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+
+    classifier = AFZClassifier()
+    classifier.classify_many(iter_source_parcels(args.sources or DEFAULT_SOURCES, []))
+    index = classifier.export_tiles(args.output, args.min_score, args.min_zoom, args.max_zoom,
+                                    args.tile_format, args.workers)
+
+    print(f"✓ {index['metadata']['total_parcels']:,} parcels tiled to {args.output}")
+    for z, count in index['tiles'].items():
+        print(f"  • zoom {z}: {count:,} tiles")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Classifier Benchmark
+Throughput of classify_parcel (one call per row) against classify_many
+
+Usage:
+    python benchmark_afz.py [--rows 200000] [--seed 42]
+
+Both paths classify the same synthetic appraisal roll and the script
+checks that they produce identical parcels before reporting timings.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from afz_classifier import AFZClassifier
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+COUNTIES = ['Bosque', 'Pecos', 'Harris', 'Reeves', 'El Paso', 'Deaf Smith', 'Webb']
+SOILS = ['marginal', 'moderate', 'prime']
+USES = ['vacant', 'grazing', 'industrial', 'agricultural']
+
+
+def synthetic_roll(rows: int, seed: int = 42) -> Dict[str, List]:
+    """Appraisal-roll style columns named like the classify_parcel arguments"""
+    rng = random.Random(seed)
+    return {
+        'parcel_id': [f'AFZ-TX-BENCH-{i:07d}' for i in range(rows)],
+        'name': [f'Benchmark Parcel {i}' for i in range(rows)],
+        'county': [rng.choice(COUNTIES) for _ in range(rows)],
+        'state': ['TX'] * rows,
+        'lat': [rng.uniform(25.8, 36.5) for _ in range(rows)],
+        'lon': [rng.uniform(-106.6, -93.5) for _ in range(rows)],
+        'acres': [rng.randint(5, 5000) for _ in range(rows)],
+        'soil_quality': [rng.choice(SOILS) for _ in range(rows)],
+        'is_brownfield': [rng.random() < 0.1 for _ in range(rows)],
+        'avg_rainfall': [round(rng.uniform(8, 55), 1) for _ in range(rows)],
+        'nearest_substation': [round(rng.uniform(0, 20), 2) for _ in range(rows)],
+        'nearest_transmission': [round(rng.uniform(0, 20), 2) for _ in range(rows)],
+        'current_use': [rng.choice(USES) for _ in range(rows)],
+        'elevation': [rng.randint(0, 5000) for _ in range(rows)],
+    }
+
+
+def time_scalar(columns: Dict[str, List]) -> Tuple[AFZClassifier, float]:
+    classifier = AFZClassifier()
+    names = list(columns)
+    start = time.perf_counter()
+    for values in zip(*columns.values()):
+        classifier.classify_parcel(**dict(zip(names, values)))
+    return classifier, time.perf_counter() - start
+
+
+def time_batch(columns) -> Tuple[AFZClassifier, float]:
+    classifier = AFZClassifier()
+    start = time.perf_counter()
+    classifier.classify_many(columns)
+    return classifier, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark AFZ classification throughput')
+    parser.add_argument('--rows', type=int, default=200_000, help='Parcels to classify')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the roll')
+    args = parser.parse_args(argv)
+
+    print(f"Building synthetic roll of {args.rows:,} parcels...")
+    columns = synthetic_roll(args.rows, args.seed)
+
+    runs = [('classify_parcel loop', time_scalar(columns)),
+            ('classify_many (lists)', time_batch(columns))]
+    if np is not None:
+        arrays = {name: np.asarray(values) for name, values in columns.items()}
+        runs.append(('classify_many (NumPy)', time_batch(arrays)))
+    else:
+        print("⚠️  NumPy not installed - batch path runs in plain Python")
+
+    reference = runs[0][1][0].parcels
+    for label, (classifier, _) in runs[1:]:
+        if list(classifier.parcels) != list(reference):
+            print(f"❌ {label} results differ from classify_parcel")
+            return 1
+
+    print(f"\n{'Path':<24}{'Seconds':>10}{'Parcels/s':>14}{'Speedup':>10}")
+    baseline = runs[0][1][1]
+    for label, (_, seconds) in runs:
+        print(f"{label:<24}{seconds:>10.3f}{args.rows / seconds:>14,.0f}{baseline / seconds:>9.1f}x")
+
+    print("\n✓ All paths produced identical parcels")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -44,7 +44,7 @@ class EagleApp:
         self.gps = GPSManager()
         self.solar_calc = SolarCalculator()
         self.datacenter_calc = DataCenterCalculator()
-        self.site_manager = SiteManager()
+        self.site_manager = SiteManager(backend=os.environ.get('EAGLE_STORAGE', 'journal'))
         self.current_location = None
 
     def show_banner(self):
@@ -297,14 +297,23 @@ class EagleApp:
         print(f"   Total Sites:         {stats['total_sites']}")
         print(f"   Total Acres:         {stats['total_acres_analyzed']:,.1f} acres")
         print(f"   Solar Capacity:      {stats['total_solar_capacity_mw']:,.1f} MW")
+        print(f"   Data Center Load:    {stats['total_datacenter_capacity_mw']:,.1f} MW")
 
         print(f"\n🗂️  BY TYPE")
         for site_type, count in stats['by_type'].items():
-            print(f"   {site_type.capitalize():15} {count}")
+            acres = stats['acres_by_type'].get(site_type, 0)
+            print(f"   {site_type.capitalize():15} {count:<6} {acres:,.1f} acres")
+
+        print(f"\n🗺️  BY TERRITORY")
+        for territory, count in stats['by_territory'].items():
+            print(f"   {territory[:40]:40} {count}")
 
         print(f"\n💾 DATABASE")
         print(f"   Location:            {stats['database_file']}")
 
+        cache = self.site_manager.cache_stats()
+        print(f"   Cache Hits/Misses:   {cache['hits']} / {cache['misses']}")
+
         print("═" * 66)
 
     def search_sites(self):
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Geodesy
+Great-circle (haversine) distances, single and batched, from points to
+points and from points to line segments
+
+Batched functions use NumPy when it is installed and fall back to plain
+Python otherwise, so the field tool keeps working on a bare Termux
+install. Inputs may be lists, tuples or NumPy arrays; batched results are
+NumPy arrays when NumPy is available and lists otherwise.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import math
+from typing import Iterator, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# Mean Earth radius (IUGG), the single radius used for every distance
+EARTH_RADIUS_MILES = 3958.8
+
+# Rows per block when building distance matrices (bounds peak memory)
+DEFAULT_CHUNK_ROWS = 1024
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Distance between two coordinates in miles
+
+    Returns:
+        Distance in miles
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _haversine_arrays(lat1, lon1, lat2, lon2):
+    """NumPy haversine with broadcasting; inputs in degrees"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float))
+                              for x in (lat1, lon1, lat2, lon2))
+
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_pairs(lats1: Sequence[float], lons1: Sequence[float],
+                    lats2: Sequence[float], lons2: Sequence[float]):
+    """
+    Element-wise distances between two equal-length lists of points
+
+    Returns:
+        Distances in miles, one per pair
+    """
+    if len(lats1) != len(lats2):
+        raise ValueError("Point lists must have the same length")
+
+    if np is not None:
+        return _haversine_arrays(lats1, lons1, lats2, lons2)
+
+    return [haversine(a, b, c, d) for a, b, c, d in zip(lats1, lons1, lats2, lons2)]
+
+
+def distances_from(lat: float, lon: float,
+                   lats: Sequence[float], lons: Sequence[float]):
+    """
+    Distances from one point to many points
+
+    Returns:
+        Distances in miles, one per target point
+    """
+    if np is not None:
+        return _haversine_arrays(lat, lon, lats, lons)
+
+    return [haversine(lat, lon, lat2, lon2) for lat2, lon2 in zip(lats, lons)]
+
+
+def iter_distance_matrix(lats1: Sequence[float], lons1: Sequence[float],
+                         lats2: Sequence[float], lons2: Sequence[float],
+                         chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[int, object]]:
+    """
+    Distance matrix in row blocks, so memory stays at chunk_rows x len(targets)
+
+    Yields:
+        (first_row, block) where block[i][j] is the distance from origin
+        first_row + i to target j
+    """
+    if np is not None:
+        lats2 = np.asarray(lats2, dtype=float)
+        lons2 = np.asarray(lons2, dtype=float)
+
+    for start in range(0, len(lats1), chunk_rows):
+        block_lats = lats1[start:start + chunk_rows]
+        block_lons = lons1[start:start + chunk_rows]
+
+        if np is not None:
+            block = _haversine_arrays(
+                np.asarray(block_lats, dtype=float)[:, None],
+                np.asarray(block_lons, dtype=float)[:, None],
+                lats2[None, :], lons2[None, :]
+            )
+        else:
+            block = [distances_from(lat, lon, lats2, lons2)
+                     for lat, lon in zip(block_lats, block_lons)]
+
+        yield start, block
+
+
+def distance_matrix(lats1: Sequence[float], lons1: Sequence[float],
+                    lats2: Sequence[float], lons2: Sequence[float],
+                    chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """
+    Full origin x target distance matrix in miles
+
+    Computed block by block (see iter_distance_matrix) so temporaries
+    never exceed one block.
+    """
+    if np is not None:
+        matrix = np.empty((len(lats1), len(lats2)))
+        for start, block in iter_distance_matrix(lats1, lons1, lats2, lons2, chunk_rows):
+            matrix[start:start + len(block)] = block
+        return matrix
+
+    matrix = []
+    for _, block in iter_distance_matrix(lats1, lons1, lats2, lons2, chunk_rows):
+        matrix.extend(block)
+    return matrix
+
+
+def nearest_distances(lats1: Sequence[float], lons1: Sequence[float],
+                      lats2: Sequence[float], lons2: Sequence[float],
+                      chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """
+    For each origin, the distance to its closest target
+
+    Uses the chunked matrix, so e.g. thousands of parcels against hundreds
+    of substations never materialize the full matrix.
+    """
+    if not len(lats2):
+        raise ValueError("At least one target point is required")
+
+    result = []
+    for _, block in iter_distance_matrix(lats1, lons1, lats2, lons2, chunk_rows):
+        if np is not None:
+            result.append(block.min(axis=1))
+        else:
+            result.extend(min(row) for row in block)
+
+    if np is not None:
+        return np.concatenate(result) if result else np.empty(0)
+    return result
+
+
+def point_segment_distance(lat: float, lon: float, lat1: float, lon1: float,
+                           lat2: float, lon2: float) -> float:
+    """
+    Distance in miles from a point to the segment (lat1, lon1)-(lat2, lon2)
+
+    The closest point on the segment is found in a flat projection
+    centred on the point (accurate for segments tens of miles long) and
+    measured with haversine.
+    """
+    scale = math.cos(math.radians(lat))
+    ax, ay = (lon1 - lon) * scale, lat1 - lat
+    bx, by = (lon2 - lon) * scale, lat2 - lat
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else min(1.0, max(0.0, -(ax * dx + ay * dy) / length2))
+    return haversine(lat, lon, lat1 + t * (lat2 - lat1), lon1 + t * (lon2 - lon1))
+
+
+def segment_distance_matrix(lats: Sequence[float], lons: Sequence[float],
+                            lats1: Sequence[float], lons1: Sequence[float],
+                            lats2: Sequence[float], lons2: Sequence[float]):
+    """
+    Distances from each point to each segment (as point_segment_distance)
+
+    Returns:
+        Matrix where [i][j] is the distance from point i to segment j
+    """
+    if np is None:
+        segments = list(zip(lats1, lons1, lats2, lons2))
+        return [[point_segment_distance(lat, lon, *segment) for segment in segments]
+                for lat, lon in zip(lats, lons)]
+
+    lat = np.asarray(lats, dtype=float)[:, None]
+    lon = np.asarray(lons, dtype=float)[:, None]
+    lat1, lon1, lat2, lon2 = (np.asarray(x, dtype=float)[None, :]
+                              for x in (lats1, lons1, lats2, lons2))
+
+    scale = np.cos(np.radians(lat))
+    ax, ay = (lon1 - lon) * scale, lat1 - lat
+    dx, dy = (lon2 - lon1) * scale, lat2 - lat1
+    length2 = dx * dx + dy * dy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length2 == 0, 0.0, -(ax * dx + ay * dy) / length2)
+    t = np.clip(t, 0.0, 1.0)
+    return _haversine_arrays(lat, lon, lat1 + t * (lat2 - lat1), lon1 + t * (lon2 - lon1))
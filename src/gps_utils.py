@@ -12,6 +12,8 @@ import subprocess
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 
+from geodesy import haversine
+
 
 class GPSManager:
     """Manages GPS location capture using termux-location API"""
@@ -86,21 +88,7 @@ class GPSManager:
         Returns:
             Distance in miles
         """
-        from math import radians, sin, cos, sqrt, atan2
-
-        # Earth radius in miles
-        R = 3958.8
-
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-
-        return R * c
+        return haversine(lat1, lon1, lat2, lon2)
 
     def distance_to_brazos(self, location: Dict) -> float:
         """Calculate distance from current location to Brazos River"""
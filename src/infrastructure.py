@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Grid Infrastructure
+Substation and transmission-line geometry for AFZ grid-access scoring
+
+Distances to the nearest substation and transmission line are measured
+from local geometry files instead of being entered by hand:
+
+    substations   - GeoJSON Point/MultiPoint features, or CSV with
+                    lat/lon (latitude/longitude, y/x) or WKT POINT columns
+    transmission  - GeoJSON LineString/MultiLineString features, or CSV
+                    with a WKT LINESTRING/MULTILINESTRING column
+
+Both are held in SegmentGrid indexes and measured for whole batches of
+parcels at once. Results are cached per parcel coordinate, so parcels
+sharing a location (and repeated runs in one process) are measured once.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from parcel_sources import NUMBER_PAIR
+from record_sources import iter_geojson_features
+from spatial_index import SegmentGrid
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# Distances kept in the per-coordinate cache before the oldest are dropped
+DEFAULT_CACHE_LIMIT = 1_000_000
+
+LAT_COLUMNS = ('lat', 'latitude', 'y')
+LON_COLUMNS = ('lon', 'longitude', 'x')
+
+WKT_PART = re.compile(r'\(([^()]+)\)')
+
+
+class InfrastructureError(ValueError):
+    """An infrastructure file could not be read"""
+
+
+def _wkt_parts(wkt: str) -> List[List[Tuple[float, float]]]:
+    """(lat, lon) vertex lists of a WKT POINT, LINESTRING or MULTI* geometry"""
+    parts = [[(float(y), float(x)) for x, y in NUMBER_PAIR.findall(part)]
+             for part in WKT_PART.findall(wkt)]
+    parts = [part for part in parts if part]
+    if not parts:
+        raise InfrastructureError(f"unsupported geometry: {wkt[:40]}")
+    return parts
+
+
+def _geojson_parts(geometry: Dict) -> List[List[Tuple[float, float]]]:
+    """(lat, lon) vertex lists of a GeoJSON point or line geometry"""
+    kind = geometry.get('type')
+    coordinates = geometry.get('coordinates') or []
+    if kind == 'Point':
+        lines = [[coordinates]]
+    elif kind in ('MultiPoint', 'LineString'):
+        lines = [[point] for point in coordinates] if kind == 'MultiPoint' else [coordinates]
+    elif kind == 'MultiLineString':
+        lines = coordinates
+    elif kind == 'GeometryCollection':
+        return [part for child in geometry.get('geometries', []) for part in _geojson_parts(child)]
+    else:
+        raise InfrastructureError(f"unsupported geometry type: {kind}")
+    return [[(float(point[1]), float(point[0])) for point in line] for line in lines if line]
+
+
+def _csv_parts(row: Dict) -> List[List[Tuple[float, float]]]:
+    columns = {key.strip().lower(): value for key, value in row.items() if key}
+    if columns.get('wkt'):
+        return _wkt_parts(columns['wkt'])
+
+    lat = next((columns[c] for c in LAT_COLUMNS if columns.get(c)), None)
+    lon = next((columns[c] for c in LON_COLUMNS if columns.get(c)), None)
+    if lat is None or lon is None:
+        raise InfrastructureError("needs lat/lon or WKT columns")
+    return [[(float(lat), float(lon))]]
+
+
+def read_geometry(path) -> Iterator[List[Tuple[float, float]]]:
+    """
+    Vertex lists ((lat, lon) pairs) of every feature in a GeoJSON or CSV file
+
+    Raises:
+        InfrastructureError: Unreadable file or feature
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with open(path, newline='' if suffix == '.csv' else None) as f:
+        if suffix == '.csv':
+            records = ((number, row, _csv_parts) for number, row in enumerate(csv.DictReader(f), 1))
+        elif suffix in ('.geojson', '.json'):
+            records = ((number, feature.get('geometry') or {}, _geojson_parts)
+                       for number, feature in enumerate(iter_geojson_features(f), 1))
+        else:
+            raise InfrastructureError(f"Unsupported infrastructure file: {path.name}")
+
+        try:
+            for number, record, parts in records:
+                try:
+                    yield from parts(record)
+                except (InfrastructureError, IndexError, TypeError, ValueError) as e:
+                    raise InfrastructureError(f"{path.name} feature {number}: {e}") from None
+        except json.JSONDecodeError as e:
+            raise InfrastructureError(f"{path.name}: invalid JSON: {e.msg}") from None
+
+
+class InfrastructureLayer:
+    """Nearest substation / transmission distances for parcels"""
+
+    def __init__(self, cell_degrees: float = 0.1, cache_limit: int = DEFAULT_CACHE_LIMIT):
+        """
+        Args:
+            cell_degrees: Grid cell size of the indexes
+            cache_limit: Coordinates kept in the distance cache
+        """
+        self.substations = SegmentGrid(cell_degrees)
+        self.transmission = SegmentGrid(cell_degrees)
+        self.cache_limit = cache_limit
+        self._cache: Dict[Tuple[float, float], Tuple[Optional[float], Optional[float]]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def load(cls, substations=None, transmission=None, **options) -> 'InfrastructureLayer':
+        """
+        Build a layer from substation and transmission-line files
+
+        Raises:
+            InfrastructureError: Unreadable file or feature
+        """
+        layer = cls(**options)
+        if substations:
+            for part in read_geometry(substations):
+                for lat, lon in part:
+                    layer.add_substation(lat, lon)
+        if transmission:
+            for part in read_geometry(transmission):
+                layer.add_line(part)
+        return layer
+
+    def add_substation(self, lat: float, lon: float):
+        self.substations.add_point(lat, lon)
+        self._cache.clear()
+
+    def add_line(self, points: Sequence[Tuple[float, float]]):
+        """Add a transmission line given as (lat, lon) vertices"""
+        self.transmission.add_line(points)
+        self._cache.clear()
+
+    def distances(self, lats: Sequence[float], lons: Sequence[float]
+                  ) -> Tuple[Optional[List[float]], Optional[List[float]]]:
+        """
+        Miles to the nearest substation and transmission line per location
+
+        Only locations missing from the cache are measured, all at once.
+
+        Returns:
+            (substation_miles, transmission_miles); a list is None when
+            that layer has no geometry
+        """
+        lats = lats.tolist() if hasattr(lats, 'tolist') else list(lats)
+        lons = lons.tolist() if hasattr(lons, 'tolist') else list(lons)
+        points = list(zip(lats, lons))
+
+        cache = self._cache
+        missing = list(dict.fromkeys(point for point in points if point not in cache))
+        self.cache_misses += len(missing)
+        self.cache_hits += len(points) - len(missing)
+
+        computed = {}
+        if missing:
+            miss_lats = [lat for lat, _ in missing]
+            miss_lons = [lon for _, lon in missing]
+            measured = [self._measure(grid, miss_lats, miss_lons)
+                        for grid in (self.substations, self.transmission)]
+            computed = dict(zip(missing, zip(*measured)))
+
+        rows = [cache[point] if point in cache else computed[point] for point in points]
+
+        cache.update(computed)
+        overflow = len(cache) - self.cache_limit
+        if overflow > 0:
+            # Drop the oldest entries (dicts keep insertion order)
+            for point in list(islice(cache, overflow)):
+                del cache[point]
+
+        substation = [row[0] for row in rows] if len(self.substations) else None
+        transmission = [row[1] for row in rows] if len(self.transmission) else None
+        return substation, transmission
+
+    @staticmethod
+    def _measure(grid: SegmentGrid, lats: List[float], lons: List[float]) -> List[Optional[float]]:
+        if not len(grid):
+            return [None] * len(lats)
+        found = grid.nearest_distances(lats, lons)
+        return found.tolist() if hasattr(found, 'tolist') else found
+
+    def nearest(self, lat: float, lon: float) -> Tuple[Optional[float], Optional[float]]:
+        """(substation_miles, transmission_miles) for one location; None for an empty layer"""
+        substation, transmission = self.distances([lat], [lon])
+        return (substation and substation[0]), (transmission and transmission[0])
+
+    def annotate(self, fields: Dict) -> Dict:
+        """
+        Set nearest_substation_miles / nearest_transmission_miles on
+        AFZParcel field columns from their latitude/longitude columns
+
+        Columns of an empty layer are left as given.
+        """
+        substation, transmission = self.distances(fields['latitude'], fields['longitude'])
+        if substation is not None:
+            fields['nearest_substation_miles'] = substation
+        if transmission is not None:
+            fields['nearest_transmission_miles'] = transmission
+        return fields
+
+    def clear_cache(self):
+        self._cache.clear()
+        self.cache_hits = self.cache_misses = 0
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Parcel Sources
+Streaming readers for AFZ parcel input files
+
+Formats:
+    csv      - header row, columns named like the classify_parcel
+               arguments; shapefile exports (ogr2ogr -f CSV) are read too,
+               with DBF-style names (ACRES, CNTY_NM, ...) and a WKT or
+               X/Y geometry column
+    jsonl    - one parcel object per line
+    geojson  - FeatureCollection of Point or Polygon features
+
+read_parcels yields (record_number, parcel) pairs, reading the file
+incrementally (see record_sources). A record that cannot be used is
+yielded as (record_number, ParcelSourceError) so the caller can report
+it and carry on.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from record_sources import read_records
+
+
+class ParcelSourceError(ValueError):
+    """A single parcel record could not be read or is incomplete"""
+
+
+SourceRecord = Tuple[int, Union[Dict, ParcelSourceError]]
+
+REQUIRED_FIELDS = ('parcel_id', 'name', 'county', 'state', 'lat', 'lon', 'acres')
+FLOAT_FIELDS = ('lat', 'lon', 'acres', 'avg_rainfall', 'nearest_substation',
+                'nearest_transmission')
+INT_FIELDS = ('elevation',)
+BOOL_FIELDS = ('is_brownfield',)
+
+# Alternative column names (lower case) -> classify_parcel argument.
+# Covers AFZParcel field names, our GeoJSON export properties and the
+# 10-character DBF names common in county appraisal shapefiles.
+FIELD_ALIASES = {
+    'id': 'parcel_id',
+    'prop_id': 'parcel_id',
+    'parcel_no': 'parcel_id',
+    'latitude': 'lat',
+    'y': 'lat',
+    'longitude': 'lon',
+    'x': 'lon',
+    'gis_acres': 'acres',
+    'acreage': 'acres',
+    'cnty_nm': 'county',
+    'county_nm': 'county',
+    'state_abbr': 'state',
+    'soil_qual': 'soil_quality',
+    'brownfield': 'is_brownfield',
+    'avg_rainfall_inches': 'avg_rainfall',
+    'rainfall': 'avg_rainfall',
+    'nearest_substation_miles': 'nearest_substation',
+    'subst_mi': 'nearest_substation',
+    'nearest_transmission_miles': 'nearest_transmission',
+    'trans_mi': 'nearest_transmission',
+    'curr_use': 'current_use',
+    'land_use': 'current_use',
+    'elevation_ft': 'elevation',
+    'elev_ft': 'elevation',
+    'water': 'water_access',
+}
+
+TRUE_WORDS = {'true', 't', 'yes', 'y', '1'}
+FALSE_WORDS = {'false', 'f', 'no', 'n', '0', ''}
+
+NUMBER_PAIR = re.compile(r'(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s+(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)')
+
+
+def _number(value, field: str, cast):
+    if isinstance(value, bool):
+        raise ParcelSourceError(f"'{field}' must be a number")
+    if isinstance(value, (int, float)):
+        return cast(value) if cast is int else value
+    try:
+        text = str(value).strip()
+        # Keep the int/float distinction of the source text
+        return int(text) if cast is int or re.fullmatch(r'-?\d+', text) else float(text)
+    except ValueError:
+        raise ParcelSourceError(f"'{field}' must be a number, got {value!r}") from None
+
+
+def _flag(value, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    word = str(value).strip().lower()
+    if word in TRUE_WORDS:
+        return True
+    if word in FALSE_WORDS:
+        return False
+    raise ParcelSourceError(f"'{field}' must be true or false, got {value!r}")
+
+
+def normalize_parcel(record: Dict) -> Dict:
+    """
+    Rename and type-check a raw record as classify_parcel arguments
+
+    Empty values are dropped so classify_parcel defaults apply.
+
+    Raises:
+        ParcelSourceError: Missing required field or unusable value
+    """
+    parcel = {}
+    for key, value in record.items():
+        if key is None or value is None or value == '':
+            continue
+        name = key.strip().lower()
+        parcel[FIELD_ALIASES.get(name, name)] = value
+
+    # Appraisal rolls often have no separate parcel name
+    if 'name' not in parcel and 'parcel_id' in parcel:
+        parcel['name'] = str(parcel['parcel_id'])
+
+    missing = [field for field in REQUIRED_FIELDS if field not in parcel]
+    if missing:
+        raise ParcelSourceError(f"missing {', '.join(missing)}")
+
+    for field in FLOAT_FIELDS:
+        if field in parcel:
+            parcel[field] = _number(parcel[field], field, float)
+    for field in INT_FIELDS:
+        if field in parcel:
+            parcel[field] = _number(parcel[field], field, int)
+    for field in BOOL_FIELDS:
+        if field in parcel:
+            parcel[field] = _flag(parcel[field], field)
+
+    return parcel
+
+
+def _centroid(coordinates: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Vertex average (lon, lat) - close enough for parcel-sized shapes"""
+    if not coordinates:
+        raise ParcelSourceError("empty geometry")
+    lons, lats = zip(*coordinates)
+    return sum(lons) / len(lons), sum(lats) / len(lats)
+
+
+def _wkt_point(wkt: str) -> Tuple[float, float]:
+    """(lon, lat) of a WKT POINT, or the centroid of a (MULTI)POLYGON"""
+    pairs = [(float(x), float(y)) for x, y in NUMBER_PAIR.findall(wkt)]
+    if wkt.strip().upper().startswith(('POLYGON', 'MULTIPOLYGON')):
+        # Closed rings repeat their first vertex
+        return _centroid(pairs[:-1] if len(pairs) > 1 and pairs[0] == pairs[-1] else pairs)
+    if not pairs:
+        raise ParcelSourceError(f"unsupported geometry: {wkt[:40]}")
+    return pairs[0]
+
+
+def _geometry_point(geometry: Dict) -> Tuple[float, float]:
+    """(lon, lat) of a GeoJSON Point, or the centroid of a (Multi)Polygon"""
+    kind = geometry.get('type')
+    coordinates = geometry.get('coordinates') or []
+    if kind == 'Point':
+        return tuple(coordinates[:2])
+    if kind == 'Polygon':
+        return _centroid([tuple(p[:2]) for p in coordinates[0][:-1]])
+    if kind == 'MultiPolygon':
+        return _centroid([tuple(p[:2]) for polygon in coordinates for p in polygon[0][:-1]])
+    raise ParcelSourceError(f"unsupported geometry type: {kind}")
+
+
+def _csv_parcel(row: Dict) -> Dict:
+    """Parcel from a CSV row, including shapefile exports with WKT geometry"""
+    wkt = row.pop('WKT', None) or row.pop('wkt', None)
+    if wkt:
+        row['lon'], row['lat'] = _wkt_point(wkt)
+    return normalize_parcel(row)
+
+
+def _feature_parcel(feature: Dict) -> Dict:
+    """Parcel from a Point or Polygon feature, located at its centroid"""
+    try:
+        lon, lat = _geometry_point(feature.get('geometry') or {})
+        row = dict(feature.get('properties') or {})
+    except ParcelSourceError:
+        raise
+    except (AttributeError, IndexError, TypeError, ValueError):
+        raise ParcelSourceError("malformed geometry") from None
+    row['lat'], row['lon'] = lat, lon
+    return normalize_parcel(row)
+
+
+DECODERS = {
+    'csv': _csv_parcel,
+    'jsonl': normalize_parcel,
+    'geojson': _feature_parcel,
+}
+
+
+def read_parcels(path, fmt: Optional[str] = None) -> Iterator[SourceRecord]:
+    """
+    Read parcels from a file, picking the reader from `fmt` or the extension
+
+    Raises:
+        ValueError: Unknown format
+    """
+    return read_records(path, DECODERS, ParcelSourceError, fmt, 'parcel source')
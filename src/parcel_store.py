@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Parcel Store
+Columnar storage for AFZ parcels
+
+Each parcel field lives in its own typed array instead of one dataclass
+per parcel: numbers in array.array columns, repetitive strings (county,
+soil quality, current use, ...) as integer codes into a category table,
+and the AFZ criteria as a bitmask. At statewide scale this is roughly
+a tenth of the memory of a list of AFZParcel objects.
+
+Filters build whole-column masks, vectorized with NumPy when it is
+installed (zero-copy views over the arrays) and plain loops otherwise.
+AFZParcel objects are only materialized for the rows a caller asks for.
+
+`version` counts changes to the stored parcels so results derived from
+them (statistics, indexes) can be cached until the parcels change.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# Canonical criteria, in the order classify_parcel lists them
+CRITERIA = ('Marginal Land', 'Brownfield Site', 'Arid Region', 'Grid Access')
+
+# Criteria bitmask width (typecode 'I')
+MAX_CRITERIA = 32
+
+
+class Categories:
+    """Code table for a categorical column (value <-> small integer)"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str) -> int:
+        """Code for a value, assigning the next one if it is new"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def matching(self, predicate: Callable[[str], bool]) -> List[int]:
+        """Codes of every value the predicate accepts"""
+        return [code for code, value in enumerate(self.values) if predicate(value)]
+
+
+class ParcelStore(Sequence):
+    """
+    Column-per-field parcel storage behaving as a read-only list of AFZParcel
+
+    Indexing and iteration materialize fresh AFZParcel objects; changing
+    one does not change the stored parcel.
+    """
+
+    # field -> array typecode
+    NUMERIC_FIELDS = {
+        'latitude': 'd',
+        'longitude': 'd',
+        'acres': 'd',
+        'score': 'h',
+        'avg_rainfall_inches': 'd',
+        'nearest_substation_miles': 'd',
+        'nearest_transmission_miles': 'd',
+        'elevation_ft': 'i',
+        'is_brownfield': 'b',
+        'is_arid': 'b',
+        'has_grid_access': 'b',
+    }
+    CATEGORICAL_FIELDS = ('county', 'state', 'soil_quality', 'current_use', 'water_access')
+    TEXT_FIELDS = ('id', 'name', 'notes')
+    FLAG_FIELDS = ('is_brownfield', 'is_arid', 'has_grid_access')
+
+    def __init__(self, parcel_type: type):
+        """
+        Args:
+            parcel_type: Dataclass to materialize rows as (AFZParcel)
+        """
+        self.parcel_type = parcel_type
+        self.columns: Dict[str, array] = {
+            field: array(typecode) for field, typecode in self.NUMERIC_FIELDS.items()
+        }
+        self.codes: Dict[str, array] = {field: array('I') for field in self.CATEGORICAL_FIELDS}
+        self.categories: Dict[str, Categories] = {
+            field: Categories() for field in self.CATEGORICAL_FIELDS
+        }
+        self.text: Dict[str, List[str]] = {field: [] for field in self.TEXT_FIELDS}
+        self.criteria = array('I')
+        self.criteria_names = Categories(CRITERIA)
+
+        # Float columns whose value was given as an int, so exports round-trip
+        self._float_fields = [f for f, t in self.NUMERIC_FIELDS.items() if t == 'd']
+        self.given_as_int = array('H')
+
+        # Bumped on every change, for caches of derived results
+        self.version = 0
+
+        # (field, descending) -> positions in sorted order, for one version
+        self._sorted: Dict[Tuple[str, bool], object] = {}
+        self._sorted_version = -1
+
+    def __len__(self) -> int:
+        return len(self.criteria)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.materialize(i) for i in range(*position.indices(len(self)))]
+
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError('parcel index out of range')
+        return self.materialize(position)
+
+    def append(self, parcel) -> int:
+        """
+        Store an AFZParcel
+
+        Returns:
+            Position of the new parcel
+        """
+        bits = 0
+        for criterion in parcel.afz_criteria:
+            bits |= 1 << self.criterion_code(criterion)
+
+        # Convert everything first so a bad value leaves the columns aligned
+        numbers = [_to_column(column.typecode, getattr(parcel, field))
+                   for field, column in self.columns.items()]
+        codes = [self.categories[field].code(getattr(parcel, field)) for field in self.codes]
+        given_as_int = 0
+        for bit, field in enumerate(self._float_fields):
+            if isinstance(getattr(parcel, field), int):
+                given_as_int |= 1 << bit
+
+        for column, value in zip(self.columns.values(), numbers):
+            column.append(value)
+        for column, code in zip(self.codes.values(), codes):
+            column.append(code)
+        for field, values in self.text.items():
+            values.append(getattr(parcel, field))
+        self.criteria.append(bits)
+        self.given_as_int.append(given_as_int)
+        self.version += 1
+
+        return len(self) - 1
+
+    def criterion_code(self, criterion: str) -> int:
+        """Bit position of a criterion in the criteria bitmask"""
+        code = self.criteria_names.code(criterion)
+        if code >= MAX_CRITERIA:
+            raise ValueError(f"More than {MAX_CRITERIA} distinct AFZ criteria")
+        return code
+
+    def extend_columns(self, columns: Dict[str, Sequence], criteria: Sequence[int]) -> range:
+        """
+        Store many parcels given column-wise
+
+        Args:
+            columns: AFZParcel field name -> values (lists or NumPy arrays),
+                     every field except afz_criteria
+            criteria: Criteria bitmask per parcel, using criteria_names codes
+
+        Returns:
+            Positions of the new parcels
+        """
+        count = len(criteria)
+        for field, values in columns.items():
+            if len(values) != count:
+                raise ValueError(f"Column '{field}' has {len(values)} values, expected {count}")
+
+        # Convert everything first so a bad value leaves the columns aligned
+        numbers = [_to_array(column.typecode, columns[field])
+                   for field, column in self.columns.items()]
+        codes = [_encode(self.categories[field], columns[field]) for field in self.codes]
+        given_as_int = array('H', [0] * count)
+        for bit, field in enumerate(self._float_fields):
+            for i in _int_positions(columns[field]):
+                given_as_int[i] |= 1 << bit
+        bits = _to_array('I', criteria)
+
+        start = len(self)
+        for column, values in zip(self.columns.values(), numbers):
+            column.extend(values)
+        for column, values in zip(self.codes.values(), codes):
+            column.extend(values)
+        for field, values in self.text.items():
+            values.extend(_to_list(columns[field]))
+        self.criteria.extend(bits)
+        self.given_as_int.extend(given_as_int)
+        self.version += 1
+
+        return range(start, len(self))
+
+    def rescore(self, score: Sequence[int], criteria: Sequence[int],
+                flags: Dict[str, Sequence[bool]]):
+        """
+        Replace every parcel's score, criteria bitmask and derived flags
+
+        Args:
+            score: New score per parcel
+            criteria: New criteria bitmask per parcel (criteria_names codes)
+            flags: Flag field (is_arid, has_grid_access) -> new values
+        """
+        count = len(self)
+        columns = {'score': score, **flags}
+        for field, values in dict(columns, criteria=criteria).items():
+            if len(values) != count:
+                raise ValueError(f"Column '{field}' has {len(values)} values, expected {count}")
+
+        # Convert everything first so a bad value leaves the store unchanged
+        replaced = {field: _to_array(self.columns[field].typecode, values)
+                    for field, values in columns.items()}
+        bits = _to_array('I', criteria)
+
+        self.columns.update(replaced)
+        self.criteria = bits
+        self.version += 1
+
+    def materialize(self, position: int):
+        """Build the AFZParcel stored at a position"""
+        fields = {field: column[position] for field, column in self.columns.items()}
+        for field in self.FLAG_FIELDS:
+            fields[field] = bool(fields[field])
+
+        given_as_int = self.given_as_int[position]
+        for bit, field in enumerate(self._float_fields):
+            if given_as_int >> bit & 1:
+                fields[field] = int(fields[field])
+        for field, column in self.codes.items():
+            fields[field] = self.categories[field].values[column[position]]
+        for field, values in self.text.items():
+            fields[field] = values[position]
+
+        bits = self.criteria[position]
+        fields['afz_criteria'] = [
+            name for code, name in enumerate(self.criteria_names.values) if bits >> code & 1
+        ]
+        return self.parcel_type(**fields)
+
+    def coordinates(self, position: int) -> Tuple[float, float]:
+        """(lat, lon) of a parcel without materializing it"""
+        return self.columns['latitude'][position], self.columns['longitude'][position]
+
+    def take(self, mask) -> List:
+        """Materialize the parcels selected by a mask, in store order"""
+        return [self.materialize(i) for i in self.positions(mask)]
+
+    @staticmethod
+    def positions(mask) -> List[int]:
+        """Positions where a mask is true"""
+        if np is not None:
+            return np.flatnonzero(mask).tolist()
+        return [i for i, selected in enumerate(mask) if selected]
+
+    def _view(self, column: array):
+        # Zero-copy and short-lived: an exported buffer blocks appends
+        return np.frombuffer(column, dtype=column.typecode)
+
+    def score_mask(self, min_score: int):
+        """Parcels scoring at least min_score"""
+        scores = self.columns['score']
+        if np is not None:
+            return self._view(scores) >= min_score
+        return [score >= min_score for score in scores]
+
+    def criteria_mask(self, criterion: str):
+        """Parcels meeting one AFZ criterion"""
+        code = self.criteria_names.codes.get(criterion)
+        if code is None:
+            return np.zeros(len(self), dtype=bool) if np is not None else [False] * len(self)
+
+        bit = 1 << code
+        if np is not None:
+            return (self._view(self.criteria) & bit) != 0
+        return [bool(bits & bit) for bits in self.criteria]
+
+    def category_mask(self, field: str, predicate: Callable[[str], bool]):
+        """Parcels whose categorical field value the predicate accepts"""
+        wanted = self.categories[field].matching(predicate)
+        column = self.codes[field]
+        if np is not None:
+            return np.isin(self._view(column), wanted)
+
+        wanted = set(wanted)
+        return [code in wanted for code in column]
+
+    def sorted_positions(self, field: str, descending: bool = False):
+        """
+        Positions ordered by a numeric column, ties in store order
+
+        Built once per store version and reused by ranked queries.
+        """
+        if self._sorted_version != self.version:
+            self._sorted.clear()
+            self._sorted_version = self.version
+
+        key = (field, descending)
+        order = self._sorted.get(key)
+        if order is None:
+            column = self.columns[field]
+            if np is not None:
+                values = self._view(column).astype(float if column.typecode == 'd' else np.int64)
+                order = np.argsort(-values if descending else values, kind='stable')
+            else:
+                # sorted() keeps equal values in store order, reversed or not
+                order = array('q', sorted(range(len(column)), key=column.__getitem__,
+                                          reverse=descending))
+            self._sorted[key] = order
+        return order
+
+    def total(self, field: str, mask):
+        """
+        Sum of a numeric column over the masked parcels
+
+        Values are added one after another in store order, as sum() over
+        the AFZParcel values would, and the total is an int when every
+        value was given as an int.
+        """
+        column = self.columns[field]
+        if np is not None:
+            values = self._view(column)[mask]
+            if not len(values):
+                return 0
+            if column.typecode != 'd':
+                return int(values.sum(dtype=np.int64))
+            # cumsum accumulates left to right (sum() is pairwise)
+            total = np.cumsum(values)[-1].item()
+            bit = 1 << self._float_fields.index(field)
+            if np.all(self._view(self.given_as_int)[mask] & bit):
+                return int(total)
+            return total
+
+        positions = self.positions(mask)
+        if column.typecode != 'd':
+            return sum(column[i] for i in positions)
+        bit = 1 << self._float_fields.index(field)
+        total = sum(column[i] for i in positions)
+        if all(self.given_as_int[i] & bit for i in positions):
+            return int(total)
+        return total
+
+    def criteria_counts(self, mask) -> Dict[str, int]:
+        """Parcels per AFZ criterion, in order of first appearance"""
+        found = []
+        if np is not None:
+            bits = self._view(self.criteria)[mask]
+            for code in range(len(self.criteria_names)):
+                hits = np.flatnonzero(bits & (1 << code))
+                if len(hits):
+                    found.append((int(hits[0]), code, len(hits)))
+        else:
+            first: Dict[int, int] = {}
+            counts: Dict[int, int] = {}
+            for n, i in enumerate(self.positions(mask)):
+                bits = self.criteria[i]
+                for code in range(len(self.criteria_names)):
+                    if bits >> code & 1:
+                        first.setdefault(code, n)
+                        counts[code] = counts.get(code, 0) + 1
+            found = [(first[code], code, count) for code, count in counts.items()]
+
+        names = self.criteria_names.values
+        return {names[code]: count for _, code, count in sorted(found)}
+
+    def group_counts(self, field: str, mask) -> Dict[str, int]:
+        """Parcels per value of a categorical field, in order of first appearance"""
+        values = self.categories[field].values
+        if np is not None:
+            codes = self._view(self.codes[field])[mask]
+            distinct, first, counts = np.unique(codes, return_index=True, return_counts=True)
+            return {values[distinct[i]]: int(counts[i]) for i in np.argsort(first)}
+
+        counts: Dict[str, int] = {}
+        column = self.codes[field]
+        for i in self.positions(mask):
+            value = values[column[i]]
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+
+def _to_column(typecode: str, value):
+    if typecode == 'd':
+        return float(value)
+    return int(value)
+
+
+def _is_ndarray(values) -> bool:
+    return np is not None and isinstance(values, np.ndarray)
+
+
+def _to_list(values) -> List:
+    return values.tolist() if _is_ndarray(values) else list(values)
+
+
+def _to_array(typecode: str, values) -> array:
+    if _is_ndarray(values):
+        if typecode != 'd' and values.dtype.kind == 'f':
+            # Same truncation as int() in the scalar path
+            values = np.trunc(values)
+        result = array(typecode)
+        result.frombytes(values.astype(typecode).tobytes())
+        return result
+    return array(typecode, [_to_column(typecode, value) for value in values])
+
+
+def _int_positions(values) -> Iterable[int]:
+    """Positions whose value was given as an int rather than a float"""
+    if _is_ndarray(values):
+        return range(len(values)) if values.dtype.kind in 'iub' else ()
+    return [i for i, value in enumerate(values) if isinstance(value, int)]
+
+
+def _encode(categories: Categories, values) -> array:
+    """Category codes for a column, coding each distinct value once"""
+    if _is_ndarray(values):
+        distinct, inverse = np.unique(values, return_inverse=True)
+        lookup = np.array([categories.code(value) for value in distinct.tolist()], dtype='I')
+        return _to_array('I', lookup[inverse.reshape(-1)])
+
+    code = categories.code
+    return array('I', [code(value) for value in values])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Record Sources
+Streaming CSV / JSON-lines / GeoJSON readers shared by the bulk loaders
+(parcel_sources for AFZ parcels, site_import for surveyed sites)
+
+Formats:
+    csv      - header row naming the fields
+    jsonl    - one JSON object per line
+    geojson  - FeatureCollection, decoded one feature at a time
+
+A loader supplies one decode function per format, turning a raw record
+(CSV row, JSON object or GeoJSON feature) into its record. read_records
+yields (record_number, record) pairs, reading the file incrementally. A
+record that cannot be decoded is yielded as (record_number, error) so
+the caller can report it and carry on.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import csv
+import json
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Type, Union
+
+
+Record = Tuple[int, Union[Dict, ValueError]]
+
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.geojson': 'geojson',
+}
+
+
+def iter_geojson_features(f, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """
+    Features of a FeatureCollection, decoded one at a time
+
+    Only the current feature and a read buffer are held in memory, so
+    statewide exports do not have to fit in RAM.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    # Skip to the opening bracket of the features array
+    opening = re.compile(r'"features"\s*:\s*\[')
+    while True:
+        match = opening.search(buffer)
+        if match:
+            position = match.end()
+            break
+        if not fill():
+            return
+        # Keep enough tail to match a key split across reads
+        buffer = buffer[-(chunk_size + 32):]
+
+    while True:
+        # Skip separators between features
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or not fill():
+                break
+        if position >= len(buffer) or buffer[position] == ']':
+            return
+
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+
+        position = end
+        yield feature
+
+
+def _csv_rows(path: Path, error: Type[ValueError]) -> Iterator[Tuple[int, object]]:
+    with open(path, newline='') as f:
+        # Record numbers are data rows, matching the line after the header
+        yield from enumerate(csv.DictReader(f), 1)
+
+
+def _json_lines(path: Path, error: Type[ValueError]) -> Iterator[Tuple[int, object]]:
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = error(f"invalid JSON: {e.msg}")
+            else:
+                if not isinstance(row, dict):
+                    row = error("expected a JSON object")
+            yield number, row
+
+
+def _geojson_features(path: Path, error: Type[ValueError]) -> Iterator[Tuple[int, object]]:
+    with open(path) as f:
+        for number, feature in enumerate(iter_geojson_features(f), 1):
+            if not isinstance(feature, dict):
+                feature = error("expected a feature object")
+            yield number, feature
+
+
+RAW_READERS = {
+    'csv': _csv_rows,
+    'jsonl': _json_lines,
+    'geojson': _geojson_features,
+}
+
+
+def read_records(path, decoders: Dict[str, Callable[[Dict], Dict]], error: Type[ValueError],
+                 fmt: Optional[str] = None, kind: str = 'record') -> Iterator[Record]:
+    """
+    Decode the records of a file, picking the format from `fmt` or the extension
+
+    Args:
+        decoders: Format -> function decoding one raw record; it raises
+                  `error` for a record that cannot be used
+        error: Error type yielded in place of bad records
+        kind: What the file holds, for the unknown-format message
+
+    Raises:
+        ValueError: Unknown format
+    """
+    path = Path(path)
+    fmt = fmt or EXTENSIONS.get(path.suffix.lower())
+    if fmt not in decoders:
+        raise ValueError(f"Unsupported {kind} format for {path.name}: {fmt}")
+    return _decode_each(RAW_READERS[fmt](path, error), decoders[fmt], error)
+
+
+def _decode_each(rows: Iterator[Tuple[int, object]], decode: Callable[[Dict], Dict],
+                 error: Type[ValueError]) -> Iterator[Record]:
+    for number, row in rows:
+        if not isinstance(row, error):
+            try:
+                row = decode(row)
+            except error as e:
+                row = e
+        yield number, row
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Site Import
+Readers and validation for bulk site imports (CSV, JSON-lines, GeoJSON)
+
+read_sites yields (record_number, site) pairs so large survey files are
+never loaded whole (see record_sources). A record that cannot be
+decoded is yielded as (record_number, SiteImportError) so the caller
+can report it and carry on with the rest of the batch.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import json
+import math
+import re
+from typing import Dict, Iterator, List, Tuple, Union
+
+from record_sources import read_records
+
+
+class SiteImportError(ValueError):
+    """A single import record could not be read or failed validation"""
+
+
+ImportRecord = Tuple[int, Union[Dict, SiteImportError]]
+
+
+def validate_site(site) -> List[str]:
+    """
+    Check a site record before it is written
+
+    Returns:
+        List of problems (empty when the record is valid)
+    """
+    if not isinstance(site, dict):
+        return [f"expected an object, got {type(site).__name__}"]
+
+    errors = []
+
+    name = site.get('name')
+    if not isinstance(name, str) or not name.strip():
+        errors.append("'name' is required")
+
+    if 'site_type' in site and not isinstance(site['site_type'], str):
+        errors.append("'site_type' must be a string")
+
+    if 'acres' in site:
+        acres = site['acres']
+        if (isinstance(acres, bool) or not isinstance(acres, (int, float))
+                or not math.isfinite(acres) or acres < 0):
+            errors.append("'acres' must be a non-negative number")
+
+    for key in ('location_context', 'solar_analysis', 'datacenter_analysis'):
+        if key in site and not isinstance(site[key], dict):
+            errors.append(f"'{key}' must be an object")
+
+    return errors
+
+
+def validate_updates(updates) -> List[str]:
+    """Check a partial update (only the fields present are validated)"""
+    if not isinstance(updates, dict):
+        return [f"expected an object, got {type(updates).__name__}"]
+
+    # Validate as a site that already has a name unless the update renames it
+    errors = validate_site(dict({'name': 'existing'}, **updates))
+    if 'site_id' in updates:
+        errors.append("'site_id' cannot be changed by a batch update")
+    return errors
+
+
+# CSV columns read back as numbers or flags (dotted for nested fields).
+# Every other cell stays text, so IDs and names such as "007" or "1905"
+# are kept as written.
+NUMERIC_FIELDS = frozenset({
+    'acres',
+    'location_context.latitude',
+    'location_context.longitude',
+    'location_context.altitude_meters',
+    'location_context.accuracy_meters',
+    'location_context.distance_to_brazos_miles',
+    # solar_calc.SolarCalculator.calculate_capacity
+    'solar_analysis.input_acres',
+    'solar_analysis.mw_capacity',
+    'solar_analysis.annual_generation_mwh',
+    'solar_analysis.homes_powered',
+    'solar_analysis.capacity_factor',
+    'solar_analysis.estimated_capex_usd',
+    'solar_analysis.annual_om_usd',
+    # datacenter_calc.DataCenterCalculator.calculate_power_requirements
+    'datacenter_analysis.input_servers',
+    'datacenter_analysis.watts_per_server',
+    'datacenter_analysis.it_load_kw',
+    'datacenter_analysis.cooling_load_kw',
+    'datacenter_analysis.overhead_kw',
+    'datacenter_analysis.total_facility_kw',
+    'datacenter_analysis.total_facility_mw',
+    'datacenter_analysis.pue',
+    'datacenter_analysis.racks_required',
+    'datacenter_analysis.annual_consumption_mwh',
+    'datacenter_analysis.annual_electricity_cost_usd',
+    'datacenter_analysis.estimated_capex_usd',
+    'datacenter_analysis.electricity_rate_kwh',
+})
+BOOL_FIELDS = frozenset({'location_context.in_bosque_county'})
+
+INTEGER = re.compile(r'-?\d+')
+
+
+def _coerce(column: str, value: str):
+    """
+    Convert a CSV cell back to the type flatten_site wrote it from
+
+    Raises:
+        SiteImportError: A numeric field that is not a finite number
+    """
+    if column in NUMERIC_FIELDS:
+        text = value.strip()
+        try:
+            number = int(text) if INTEGER.fullmatch(text) else float(text)
+        except ValueError:
+            number = None
+        if number is None or not math.isfinite(number):
+            raise SiteImportError(f"'{column}' must be a number, got {value!r}")
+        return number
+    if column in BOOL_FIELDS and value in ('True', 'False'):
+        return value == 'True'
+    # Lists and empty objects are JSON encoded by flatten_site
+    if value[:1] in ('[', '{'):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return value
+
+
+def unflatten_site(row: Dict) -> Dict:
+    """
+    Rebuild nested analyses from dotted CSV columns (see flatten_site)
+
+    Raises:
+        SiteImportError: A numeric field that is not a finite number
+    """
+    site = {}
+    for column, value in row.items():
+        if column is None or value is None or value == '':
+            continue
+
+        target = site
+        *parents, leaf = column.split('.')
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = _coerce(column, value)
+    return site
+
+
+def _feature_site(feature: Dict) -> Dict:
+    """Site from a Point feature, with its position in location_context"""
+    geometry = feature.get('geometry') or {}
+    kind = geometry.get('type') if isinstance(geometry, dict) else None
+    if kind != 'Point':
+        raise SiteImportError(f"unsupported geometry type: {kind}")
+
+    coordinates = geometry.get('coordinates')
+    if (not isinstance(coordinates, list) or len(coordinates) < 2
+            or not all(_is_number(c) for c in coordinates[:2])):
+        raise SiteImportError("Point coordinates must be [longitude, latitude]")
+
+    lon, lat = coordinates[:2]
+    try:
+        site = dict(feature.get('properties') or {})
+        context = dict(site.get('location_context') or {})
+    except (TypeError, ValueError):
+        raise SiteImportError("feature properties must be an object") from None
+    context.setdefault('latitude', lat)
+    context.setdefault('longitude', lon)
+    context.setdefault('coordinates', f"{lat:.6f}°N, {lon:.6f}°W")
+    site['location_context'] = context
+    return site
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+DECODERS = {
+    'csv': unflatten_site,
+    'jsonl': dict,
+    'geojson': _feature_site,
+}
+
+
+def read_sites(path, fmt: str = None) -> Iterator[ImportRecord]:
+    """
+    Read sites from a file, picking the reader from `fmt` or the extension
+
+    Raises:
+        ValueError: Unknown format
+    """
+    return read_records(path, DECODERS, SiteImportError, fmt, 'import')
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Site Indexes
+In-memory indexes over the site database
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import heapq
+import json
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from spatial_index import GeoGrid
+
+
+class SiteIndex:
+    """
+    Site rows plus maintained lookup indexes
+
+    - hash index:   site_id -> row(s)
+    - bucket index: site_type -> rows sorted by creation date
+    - sorted index: all rows sorted by creation date
+    - text index:   inverted full-text index for search (TextIndex)
+    - CSV schema:   flattened column name -> number of sites using it
+    - aggregates:   running statistics totals (SiteAggregates)
+    - spatial:      grid index over site coordinates (GeoGrid)
+
+    Rows are numbered in database order. Sorted index keys are
+    (created, -row) so that iterating newest-first keeps database order
+    for sites created at the same instant, matching a stable sort.
+    """
+
+    def __init__(self, metadata: Dict = None):
+        self.metadata = dict(metadata or {})
+        self.aggregates = SiteAggregates()
+        self.rows: Dict[int, Dict] = {}
+        self.by_id: Dict[str, List[int]] = {}
+        self.by_type: Dict[str, List] = {}
+        self.by_created: List = []
+        self.text = TextIndex()
+        self.columns: Dict[str, int] = {}
+        self.spatial = GeoGrid()
+        self._next_row = 0
+
+    @classmethod
+    def from_database(cls, db: Dict) -> 'SiteIndex':
+        """Build indexes from a loaded database dictionary"""
+        index = cls(db.get('metadata', {}))
+        stored = index.metadata.pop('aggregates', None)
+
+        for site in db.get('sites', []):
+            row = index._next_row
+            index._next_row += 1
+            index.rows[row] = site
+            index.by_id.setdefault(site.get('site_id'), []).append(row)
+            index._count_columns(site, 1)
+            index._index_location(row, site)
+
+        # Persisted totals are trusted when they cover the same number of sites
+        if stored and stored.get('total_sites') == len(index.rows):
+            index.aggregates = SiteAggregates.from_dict(stored)
+        else:
+            for site in index.rows.values():
+                index.aggregates.apply(site)
+
+        # Bulk build sorted indexes once instead of inserting one by one
+        index.text.bulk_add(index.rows.items())
+        for row, site in index.rows.items():
+            key = cls._sort_key(row, site)
+            index.by_created.append(key)
+            index.by_type.setdefault(site.get('site_type'), []).append(key)
+
+        index.by_created.sort()
+        for keys in index.by_type.values():
+            keys.sort()
+
+        return index
+
+    def to_database(self) -> Dict:
+        """Materialize the database dictionary (metadata + sites list)"""
+        metadata = dict(self.metadata, aggregates=self.aggregates.to_dict())
+        return {'metadata': metadata, 'sites': list(self.rows.values())}
+
+    @staticmethod
+    def _sort_key(row: int, site: Dict):
+        return (site.get('created') or '', -row)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, site_id: str) -> bool:
+        return site_id in self.by_id
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, site_id: str) -> Optional[Dict]:
+        """O(1) lookup of a site by ID"""
+        rows = self.by_id.get(site_id)
+        return self.rows[rows[0]] if rows else None
+
+    def sites(self) -> Iterator[Dict]:
+        """Iterate sites in database order"""
+        return iter(self.rows.values())
+
+    def search(self, query: str, prefix: bool = False, limit: int = None) -> List[Dict]:
+        """Full-text search, best matches first (see TextIndex)"""
+        if prefix:
+            rows = self.text.prefix_search(query, limit)
+        else:
+            rows = self.text.search(query, limit)
+        return [self.rows[row] for row in rows]
+
+    def schema(self) -> List[str]:
+        """Sorted flattened column names across all sites"""
+        return sorted(self.columns)
+
+    def created_range(self, site_type: str = None, start: str = None,
+                      end: str = None) -> Iterator[Dict]:
+        """
+        Iterate sites oldest first with start <= created <= end
+
+        Bounds are ISO strings compared as prefixes, so end='2025-01-31'
+        includes the whole day.
+        """
+        keys = self.by_type.get(site_type, []) if site_type else self.by_created
+        lo = bisect_left(keys, (start,)) if start else 0
+        hi = bisect_left(keys, (end + '\uffff',)) if end else len(keys)
+
+        for i in range(lo, hi):
+            yield self.rows[-keys[i][1]]
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> List[Tuple[float, Dict]]:
+        """Sites within radius_miles of a point as (distance, site), nearest first"""
+        return [(d, self.rows[row]) for d, row in self.spatial.within(lat, lon, radius_miles)]
+
+    def nearest(self, lat: float, lon: float, k: int = 5,
+                max_miles: float = None) -> List[Tuple[float, Dict]]:
+        """The k sites closest to a point as (distance, site), nearest first"""
+        return [(d, self.rows[row]) for d, row in self.spatial.nearest(lat, lon, k, max_miles)]
+
+    def newest_first(self, site_type: str = None) -> Iterator[Dict]:
+        """Iterate sites newest first, optionally restricted to one type"""
+        keys = self.by_type.get(site_type, []) if site_type else self.by_created
+        for _, neg_row in reversed(keys):
+            yield self.rows[-neg_row]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, site: Dict):
+        """Insert a site into the rows and every index"""
+        row = self._next_row
+        self._next_row += 1
+        self.rows[row] = site
+        self.by_id.setdefault(site.get('site_id'), []).append(row)
+        self._index_sorted(row, site)
+        self.text.add(row, site)
+        self._count_columns(site, 1)
+        self.aggregates.apply(site)
+        self._index_location(row, site)
+
+    def update(self, site_id: str, updates: Dict) -> bool:
+        """Apply field updates to the first site with this ID"""
+        rows = self.by_id.get(site_id)
+        if not rows:
+            return False
+
+        row = rows[0]
+        site = self.rows[row]
+        self._unindex_sorted(row, site)
+        self.text.remove(row)
+        self._count_columns(site, -1)
+        self.aggregates.apply(site, -1)
+        site.update(updates)
+        self._index_sorted(row, site)
+        self.text.add(row, site)
+        self._count_columns(site, 1)
+        self.aggregates.apply(site)
+        self._index_location(row, site)
+
+        # An update may also rename the site
+        new_id = site.get('site_id')
+        if new_id != site_id:
+            rows.remove(row)
+            if not rows:
+                del self.by_id[site_id]
+            self.by_id.setdefault(new_id, []).append(row)
+            self.by_id[new_id].sort()
+
+        return True
+
+    def delete(self, site_id: str) -> bool:
+        """Remove every site with this ID"""
+        rows = self.by_id.pop(site_id, None)
+        if not rows:
+            return False
+
+        for row in rows:
+            site = self.rows.pop(row)
+            self._unindex_sorted(row, site)
+            self.text.remove(row)
+            self._count_columns(site, -1)
+            self.aggregates.apply(site, -1)
+            self.spatial.remove(row)
+
+        return True
+
+    def apply(self, entry: Dict):
+        """Apply a journal operation (re-applying an add is a no-op)"""
+        op = entry.get('op')
+        if op == 'add':
+            if entry['site'].get('site_id') not in self.by_id:
+                self.add(entry['site'])
+        elif op == 'update':
+            self.update(entry.get('site_id'), entry['updates'])
+        elif op == 'delete':
+            self.delete(entry.get('site_id'))
+
+    def _index_location(self, row: int, site: Dict):
+        coordinates = site_coordinates(site)
+        if coordinates:
+            self.spatial.insert(row, *coordinates)
+        else:
+            self.spatial.remove(row)
+
+    def _count_columns(self, site: Dict, delta: int):
+        for column in flatten_site(site):
+            count = self.columns.get(column, 0) + delta
+            if count > 0:
+                self.columns[column] = count
+            else:
+                self.columns.pop(column, None)
+
+    def _index_sorted(self, row: int, site: Dict):
+        key = self._sort_key(row, site)
+        insort(self.by_created, key)
+        insort(self.by_type.setdefault(site.get('site_type'), []), key)
+
+    def _unindex_sorted(self, row: int, site: Dict):
+        key = self._sort_key(row, site)
+        _remove_key(self.by_created, key)
+
+        site_type = site.get('site_type')
+        bucket = self.by_type.get(site_type)
+        if bucket is not None:
+            _remove_key(bucket, key)
+            if not bucket:
+                del self.by_type[site_type]
+
+
+class SiteAggregates:
+    """
+    Running statistics totals, maintained by adding (+1) and removing (-1)
+    each site's contribution so reading them is O(1)
+    """
+
+    def __init__(self):
+        self.total_sites = 0
+        self.by_type: Dict[str, int] = {}
+        self.acres_by_type: Dict[str, float] = {}
+        self.by_territory: Dict[str, int] = {}
+        self.total_acres = 0.0
+        self.total_solar_mw = 0.0
+        self.total_datacenter_mw = 0.0
+
+    def apply(self, site: Dict, sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) one site's contribution"""
+        site_type = site.get('site_type') or 'unknown'
+        acres = _number(site.get('acres'))
+        territory = (site.get('location_context') or {}).get('territory') or 'Unknown'
+
+        self.total_sites += sign
+        _bump(self.by_type, site_type, sign)
+        _bump(self.by_territory, territory, sign)
+
+        self.total_acres += sign * acres
+        if site_type in self.by_type:
+            self.acres_by_type[site_type] = self.acres_by_type.get(site_type, 0.0) + sign * acres
+        else:
+            self.acres_by_type.pop(site_type, None)
+
+        if site_type == 'solar':
+            solar = site.get('solar_analysis') or {}
+            self.total_solar_mw += sign * _number(solar.get('mw_capacity'))
+        elif site_type == 'datacenter':
+            datacenter = site.get('datacenter_analysis') or {}
+            self.total_datacenter_mw += sign * _number(datacenter.get('total_facility_mw'))
+
+    def to_dict(self) -> Dict:
+        return {
+            'total_sites': self.total_sites,
+            'by_type': dict(self.by_type),
+            'acres_by_type': dict(self.acres_by_type),
+            'by_territory': dict(self.by_territory),
+            'total_acres': self.total_acres,
+            'total_solar_mw': self.total_solar_mw,
+            'total_datacenter_mw': self.total_datacenter_mw
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SiteAggregates':
+        aggregates = cls()
+        aggregates.total_sites = data.get('total_sites', 0)
+        aggregates.by_type = dict(data.get('by_type', {}))
+        aggregates.acres_by_type = dict(data.get('acres_by_type', {}))
+        aggregates.by_territory = dict(data.get('by_territory', {}))
+        aggregates.total_acres = data.get('total_acres', 0.0)
+        aggregates.total_solar_mw = data.get('total_solar_mw', 0.0)
+        aggregates.total_datacenter_mw = data.get('total_datacenter_mw', 0.0)
+        return aggregates
+
+
+def _number(value) -> float:
+    """Numeric field value, treating missing or non-numeric values as 0"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0.0
+    return value
+
+
+def _bump(counts: Dict[str, int], key: str, delta: int):
+    count = counts.get(key, 0) + delta
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+def _remove_key(keys: List, key):
+    """Remove a key from a sorted list in O(log n) search"""
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
+
+
+def site_coordinates(site: Dict) -> Optional[Tuple[float, float]]:
+    """(lat, lon) from location_context or top-level fields, if numeric"""
+    for source in (site.get('location_context') or {}, site):
+        lat, lon = source.get('latitude'), source.get('longitude')
+        if (isinstance(lat, (int, float)) and isinstance(lon, (int, float))
+                and not isinstance(lat, bool) and not isinstance(lon, bool)):
+            return lat, lon
+    return None
+
+
+def flatten_site(site: Dict, prefix: str = '') -> Dict:
+    """
+    Flatten nested dictionaries into dotted keys for tabular export
+
+    {'solar_analysis': {'mw_capacity': 75}} -> {'solar_analysis.mw_capacity': 75}
+    Lists are JSON encoded.
+    """
+    flat = {}
+    for key, value in site.items():
+        column = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten_site(value, column + '.'))
+        elif isinstance(value, (list, dict)):
+            flat[column] = json.dumps(value)
+        else:
+            flat[column] = value
+    return flat
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def searchable_text(site: Dict) -> str:
+    """Lowercased text that site search matches against"""
+    return f"{site.get('name', '')} {site.get('notes', '')} {site.get('location_context', {}).get('territory', '')}".lower()
+
+
+class TextIndex:
+    """
+    Inverted full-text index over site name, notes and territory
+
+    Maintains a token -> rows posting list, a sorted vocabulary for
+    prefix lookups and (optionally) a trigram -> tokens index over the
+    vocabulary for substring lookups. Candidate rows are always verified
+    against the stored text, so results match a plain substring scan.
+    """
+
+    def __init__(self, trigrams: bool = True):
+        self.texts: Dict[int, str] = {}
+        self.name_lengths: Dict[int, int] = {}
+        self.row_tokens: Dict[int, frozenset] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocab: List[str] = []
+        self.grams: Optional[Dict[str, Set[str]]] = {} if trigrams else None
+
+    def bulk_add(self, items):
+        """Index many (row, site) pairs, sorting the vocabulary once"""
+        vocab, self.vocab = self.vocab, None
+        new_tokens = []
+        for row, site in items:
+            new_tokens.extend(self.add(row, site))
+        self.vocab = sorted(vocab + new_tokens)
+
+    def add(self, row: int, site: Dict) -> List[str]:
+        """Index a site's searchable text; returns tokens new to the vocabulary"""
+        text = searchable_text(site)
+        tokens = frozenset(TOKEN_PATTERN.findall(text))
+
+        self.texts[row] = text
+        self.name_lengths[row] = len(str(site.get('name', '')))
+        self.row_tokens[row] = tokens
+
+        new_tokens = []
+        for token in tokens:
+            rows = self.postings.get(token)
+            if rows is None:
+                rows = self.postings[token] = set()
+                new_tokens.append(token)
+                if self.vocab is not None:
+                    insort(self.vocab, token)
+                if self.grams is not None:
+                    for gram in _trigrams(token):
+                        self.grams.setdefault(gram, set()).add(token)
+            rows.add(row)
+
+        return new_tokens
+
+    def remove(self, row: int):
+        """Drop a site from the index"""
+        self.texts.pop(row, None)
+        self.name_lengths.pop(row, None)
+
+        for token in self.row_tokens.pop(row, ()):
+            rows = self.postings[token]
+            rows.discard(row)
+            if rows:
+                continue
+
+            del self.postings[token]
+            _remove_key(self.vocab, token)
+            if self.grams is not None:
+                for gram in _trigrams(token):
+                    tokens = self.grams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.grams[gram]
+
+    def search(self, query: str, limit: int = None) -> List[int]:
+        """Rows whose text contains the query as a substring, best first"""
+        query = query.lower()
+        runs = TOKEN_PATTERN.findall(query)
+
+        if runs:
+            candidates = self._intersect(self._rows_containing(run) for run in runs)
+        else:
+            candidates = self.texts.keys()
+
+        matches = [row for row in candidates if query in self.texts[row]]
+        return self._rank(matches, query, runs, limit)
+
+    def prefix_search(self, query: str, limit: int = None) -> List[int]:
+        """Rows where every query word starts some word of the text, best first"""
+        query = query.lower()
+        words = TOKEN_PATTERN.findall(query)
+        if not words:
+            return []
+
+        matches = self._intersect(self._rows_with_prefix(word) for word in words)
+        return self._rank(matches, query, words, limit)
+
+    def _tokens_with_prefix(self, prefix: str) -> List[str]:
+        start = bisect_left(self.vocab, prefix)
+        end = bisect_left(self.vocab, prefix + '\uffff', start)
+        return self.vocab[start:end]
+
+    def _rows_with_prefix(self, prefix: str) -> Set[int]:
+        return self._union(self._tokens_with_prefix(prefix))
+
+    def _rows_containing(self, run: str) -> Set[int]:
+        """Rows with a token containing this alphanumeric run"""
+        if self.grams is not None and len(run) >= 3:
+            token_sets = [self.grams.get(gram, set()) for gram in _trigrams(run)]
+            tokens = self._intersect(token_sets)
+        else:
+            tokens = self.vocab
+
+        return self._union(token for token in tokens if run in token)
+
+    def _union(self, tokens) -> Set[int]:
+        rows = set()
+        for token in tokens:
+            rows |= self.postings[token]
+        return rows
+
+    @staticmethod
+    def _intersect(sets) -> Set:
+        """Intersect sets smallest first, stopping early when empty"""
+        sets = sorted(sets, key=len)
+        if not sets:
+            return set()
+
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    def _rank(self, rows, query: str, words: List[str], limit: int = None) -> List[int]:
+        """
+        Order rows by relevance: whole-word hits score 3, word-prefix
+        hits 2, other substring hits 1, plus 2 when the query is in the
+        site name. Ties keep database order. With a limit only the
+        top rows are selected (heap) instead of sorting every match.
+        """
+        scored = []
+        for row in rows:
+            tokens = self.row_tokens[row]
+            score = 0
+            for word in words:
+                if word in tokens:
+                    score += 3
+                elif any(token.startswith(word) for token in tokens):
+                    score += 2
+                else:
+                    score += 1
+
+            position = self.texts[row].find(query)
+            if 0 <= position < self.name_lengths[row]:
+                score += 2
+
+            scored.append((-score, row))
+
+        if limit is not None:
+            scored = heapq.nsmallest(limit, scored)
+        else:
+            scored.sort()
+        return [row for _, row in scored]
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
@@ -3,26 +3,65 @@
 HH Holdings Energy Intel - Site Data Manager
 Manage JSON database of analyzed sites
 
+Storage backends (see site_store.py):
+    journal (default)
+        hh_holdings_sites.json     - snapshot (same format as the original database)
+        hh_holdings_sites.journal  - append-only operation log (one JSON op per line)
+    sqlite
+        hh_holdings_sites.db       - SQLite database in WAL mode
+
+With the journal backend, writes append a single operation to the
+journal; the journal is folded into the snapshot once it grows past
+JournalStore.COMPACT_THRESHOLD entries. Use the sqlite backend when
+several processes write to the same site store.
+
+Parsed databases are cached per process and reused until the backing
+files change (inode, size or mtime; PRAGMA data_version for SQLite), so
+repeated reads do not re-parse the database. Cached databases carry the
+SiteIndex lookup structures, which are updated in place by every write.
+
+Migrate an existing JSON database to SQLite with:
+    python site_manager.py migrate [--data-dir DIR]
+
+Bulk import a survey (CSV, JSON-lines or GeoJSON) with:
+    python site_manager.py import FILE [--data-dir DIR]
+
 Author: Bevans Real Estate / HH Holdings
 Location: Bosque County, Texas
 """
 
+import argparse
 import json
-import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
+from site_import import SiteImportError, read_sites, validate_site, validate_updates
+from site_index import SiteIndex, flatten_site
+from site_store import BACKENDS, next_site_id
+
+
+# Process-level cache of parsed databases, keyed by backend and resolved path
+_DATABASE_CACHE: Dict[str, Dict] = {}
+_CACHE_STATS = {'hits': 0, 'misses': 0}
+
 
 class SiteManager:
-    """Manage site database and JSON storage"""
+    """
+    Manage site database and JSON storage
+
+    Site dictionaries returned by the read methods are shared with the
+    process-level cache; copy them before making local modifications.
+    """
 
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, backend: str = 'journal'):
         """
         Initialize site manager
 
         Args:
             data_dir: Directory for data storage (default: ~/storage/shared/EnergyIntel/)
+            backend: Storage backend ('journal' or 'sqlite')
         """
         if data_dir:
             self.data_dir = Path(data_dir)
@@ -34,11 +73,15 @@ class SiteManager:
         # Ensure directory exists
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        # Main database file
-        self.db_file = self.data_dir / 'hh_holdings_sites.json'
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown storage backend: {backend}")
+
+        self.store = BACKENDS[backend](self.data_dir)
+        self.db_file = self.store.db_file
+        self._cache_key = f"{backend}:{self.db_file.resolve()}"
 
         # Initialize database if it doesn't exist
-        if not self.db_file.exists():
+        if not self.store.exists():
             self._initialize_database()
 
     def _initialize_database(self):
@@ -52,26 +95,108 @@ class SiteManager:
             },
             'sites': []
         }
-        self._save_database(initial_data)
+
+        # Saved through the index so the empty aggregates are persisted too
+        index = SiteIndex.from_database(initial_data)
+        self._save_database(index.to_database(), index)
+
+    def _cached_entry(self) -> Optional[Dict]:
+        """Return the cache entry if it still matches the backing store"""
+        entry = _DATABASE_CACHE.get(self._cache_key)
+        if entry and entry['signature'] == self.store.signature():
+            return entry
+        return None
 
     def _load_database(self) -> Dict:
-        """Load database from JSON file"""
+        """Load database dictionary (snapshot with the journal replayed)"""
+        return self._load_index().to_database()
+
+    def _load_index(self) -> SiteIndex:
+        """Load indexed sites, from the cache when the files are unchanged"""
+        entry = self._cached_entry()
+        if entry:
+            _CACHE_STATS['hits'] += 1
+            return entry['index']
+
+        _CACHE_STATS['misses'] += 1
+
+        # Taken before reading so a concurrent change forces a reload next time
+        signature = self.store.signature()
+
         try:
-            with open(self.db_file, 'r') as f:
-                return json.load(f)
+            db, operations = self.store.load()
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"⚠️  Database error: {e}")
             self._initialize_database()
-            return self._load_database()
+            return self._load_index()
 
-    def _save_database(self, data: Dict):
-        """Save database to JSON file"""
-        try:
-            with open(self.db_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"❌ Error saving database: {e}")
-            raise
+        index = SiteIndex.from_database(db)
+        for operation in operations:
+            index.apply(operation)
+
+        _DATABASE_CACHE[self._cache_key] = {'signature': signature, 'index': index}
+        return index
+
+    def _save_database(self, data: Dict, index: SiteIndex = None):
+        """Replace the stored database with `data`"""
+        self.store.save(data)
+        _DATABASE_CACHE[self._cache_key] = {
+            'signature': self.store.signature(),
+            'index': index or SiteIndex.from_database(data)
+        }
+
+    def _commit(self, entry: Dict):
+        """Persist one add/update/delete operation and apply it to the cache"""
+        self._commit_many([entry])
+
+    def _commit_many(self, entries: List[Dict]):
+        """Persist operations in a single store write and apply them to the cache"""
+        if not entries:
+            return
+
+        cached = self._cached_entry()
+        signature = self.store.write_many(entries, cached['signature'] if cached else None)
+
+        if cached and signature:
+            # Re-decode so the cache never aliases the caller's dictionaries
+            for entry in json.loads(json.dumps(entries)):
+                cached['index'].apply(entry)
+            cached['signature'] = signature
+        else:
+            # Another writer was active; reload on next read
+            _DATABASE_CACHE.pop(self._cache_key, None)
+
+        if self.store.needs_compaction():
+            self.compact()
+
+    def compact(self):
+        """Fold pending changes into the main database file"""
+        index = self._load_index()
+        self.store.compact(index.to_database())
+        _DATABASE_CACHE[self._cache_key] = {
+            'signature': self.store.signature(),
+            'index': index
+        }
+
+    @staticmethod
+    def cache_stats() -> Dict:
+        """Get process-level database cache hit/miss counters"""
+        hits = _CACHE_STATS['hits']
+        misses = _CACHE_STATS['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+            'cached_databases': len(_DATABASE_CACHE)
+        }
+
+    @staticmethod
+    def clear_cache():
+        """Drop all cached databases and reset counters"""
+        _DATABASE_CACHE.clear()
+        _CACHE_STATS['hits'] = 0
+        _CACHE_STATS['misses'] = 0
 
     def add_site(self, site_data: Dict) -> str:
         """
@@ -83,33 +208,116 @@ class SiteManager:
         Returns:
             Site ID
         """
-        db = self._load_database()
+        entry = self._add_entry(site_data, self._load_index(), set())
+
+        # Persist (single journal append or row insert)
+        self._commit(entry)
 
-        # Generate unique site ID
-        site_id = f"HH-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        return entry['site_id']
+
+    def _add_entry(self, site_data: Dict, index: SiteIndex, reserved: set) -> Dict:
+        """Stamp ID and timestamps onto a new site and build its add operation"""
+        now = datetime.now()
+
+        # Second-resolution ID, suffixed when already taken (the SQLite
+        # store renumbers again if another process took it meanwhile)
+        site_id = f"HH-{now.strftime('%Y%m%d-%H%M%S')}"
+        while site_id in index or site_id in reserved:
+            site_id = next_site_id(site_id)
+        reserved.add(site_id)
 
         # Add metadata
         site_data['site_id'] = site_id
-        site_data['created'] = datetime.now().isoformat()
-        site_data['modified'] = datetime.now().isoformat()
+        site_data['created'] = now.isoformat()
+        site_data['modified'] = now.isoformat()
+
+        return {'op': 'add', 'site_id': site_id, 'site': site_data}
 
-        # Add to database
-        db['sites'].append(site_data)
+    def add_sites(self, sites: Iterable[Dict]) -> Dict:
+        """
+        Add many sites in a single write
 
-        # Save
-        self._save_database(db)
+        Invalid records are skipped and reported; they do not abort the batch.
 
-        return site_id
+        Args:
+            sites: Iterable of site dictionaries (or (record_number, site) pairs
+                   as produced by site_import readers)
 
-    def get_site(self, site_id: str) -> Optional[Dict]:
-        """Get site by ID"""
-        db = self._load_database()
+        Returns:
+            {'added': [site IDs], 'errors': [{'record': n, 'error': msg}]}
+        """
+        index = self._load_index()
+        reserved = set()
+        entries, errors = [], []
 
-        for site in db['sites']:
-            if site.get('site_id') == site_id:
-                return site
+        for number, site in enumerate(sites, 1):
+            if isinstance(site, tuple):
+                number, site = site
 
-        return None
+            if isinstance(site, SiteImportError):
+                errors.append({'record': number, 'error': str(site)})
+                continue
+
+            problems = validate_site(site)
+            if problems:
+                errors.append({'record': number, 'error': '; '.join(problems)})
+                continue
+
+            entries.append(self._add_entry(site, index, reserved))
+
+        self._commit_many(entries)
+
+        return {'added': [entry['site_id'] for entry in entries], 'errors': errors}
+
+    def update_sites(self, updates: Dict[str, Dict]) -> Dict:
+        """
+        Update many sites in a single write
+
+        Args:
+            updates: Mapping of site ID to fields to update
+
+        Returns:
+            {'updated': [site IDs], 'errors': [{'site_id': id, 'error': msg}]}
+        """
+        index = self._load_index()
+        modified = datetime.now().isoformat()
+        entries, errors = [], []
+
+        for site_id, changes in updates.items():
+            if site_id not in index:
+                errors.append({'site_id': site_id, 'error': 'site not found'})
+                continue
+
+            problems = validate_updates(changes)
+            if problems:
+                errors.append({'site_id': site_id, 'error': '; '.join(problems)})
+                continue
+
+            changes = dict(changes, modified=modified)
+            entries.append({'op': 'update', 'site_id': site_id, 'updates': changes})
+
+        self._commit_many(entries)
+
+        return {'updated': [entry['site_id'] for entry in entries], 'errors': errors}
+
+    def import_sites(self, path: str, fmt: str = None) -> Dict:
+        """
+        Bulk import sites from CSV, JSON-lines or GeoJSON in a single write
+
+        Imported records always get new site IDs and timestamps.
+
+        Args:
+            path: Input file
+            fmt: 'csv', 'jsonl' or 'geojson' (default: from file extension)
+
+        Returns:
+            Same as add_sites; error record numbers refer to the input file
+        """
+        return self.add_sites(read_sites(path, fmt))
+
+    def get_site(self, site_id: str) -> Optional[Dict]:
+        """Get site by ID"""
+        return self._load_index().get(site_id)
 
     def update_site(self, site_id: str, updates: Dict) -> bool:
         """
@@ -122,32 +330,42 @@ class SiteManager:
         Returns:
             True if updated, False if not found
         """
-        db = self._load_database()
+        if site_id not in self._load_index():
+            return False
 
-        for site in db['sites']:
-            if site.get('site_id') == site_id:
-                # Update fields
-                site.update(updates)
-                site['modified'] = datetime.now().isoformat()
+        # Journal only the changed fields
+        changes = dict(updates)
+        changes['modified'] = datetime.now().isoformat()
 
-                # Save
-                self._save_database(db)
-                return True
-
-        return False
+        self._commit({'op': 'update', 'site_id': site_id, 'updates': changes})
+        return True
 
     def delete_site(self, site_id: str) -> bool:
         """Delete site by ID"""
-        db = self._load_database()
-        initial_count = len(db['sites'])
+        if site_id not in self._load_index():
+            return False
 
-        db['sites'] = [s for s in db['sites'] if s.get('site_id') != site_id]
+        self._commit({'op': 'delete', 'site_id': site_id})
+        return True
 
-        if len(db['sites']) < initial_count:
-            self._save_database(db)
-            return True
+    def sites_within(self, lat: float, lon: float, radius_miles: float) -> List[Tuple[float, Dict]]:
+        """
+        Saved sites within a radius of a GPS fix
 
-        return False
+        Returns:
+            (distance_miles, site) pairs, nearest first
+        """
+        return self._load_index().within(lat, lon, radius_miles)
+
+    def nearest_sites(self, lat: float, lon: float, k: int = 5,
+                      max_miles: float = None) -> List[Tuple[float, Dict]]:
+        """
+        The k saved sites closest to a GPS fix
+
+        Returns:
+            (distance_miles, site) pairs, nearest first
+        """
+        return self._load_index().nearest(lat, lon, k, max_miles)
 
     def list_sites(self, filter_type: str = None) -> List[Dict]:
         """
@@ -159,106 +377,90 @@ class SiteManager:
         Returns:
             List of site dictionaries
         """
-        db = self._load_database()
-        sites = db['sites']
-
-        if filter_type:
-            sites = [s for s in sites if s.get('site_type') == filter_type]
+        # Newest first, straight from the sorted creation-date indexes
+        return list(self._load_index().newest_first(filter_type))
 
-        # Sort by creation date (newest first)
-        sites.sort(key=lambda x: x.get('created', ''), reverse=True)
-
-        return sites
-
-    def search_sites(self, query: str) -> List[Dict]:
+    def search_sites(self, query: str, prefix: bool = False,
+                     limit: int = None) -> List[Dict]:
         """
         Search sites by name, notes, or location
 
         Args:
             query: Search string
+            prefix: Match each query word against word prefixes instead
+                    of a plain substring match
+            limit: Return at most this many results
 
         Returns:
-            List of matching sites
+            List of matching sites, best matches first
         """
-        db = self._load_database()
-        query_lower = query.lower()
-
-        results = []
-        for site in db['sites']:
-            # Search in multiple fields
-            searchable = f"{site.get('name', '')} {site.get('notes', '')} {site.get('location_context', {}).get('territory', '')}".lower()
+        return self._load_index().search(query, prefix=prefix, limit=limit)
 
-            if query_lower in searchable:
-                results.append(site)
-
-        return results
-
-    def export_to_csv(self, output_file: str = None) -> str:
+    def export_to_csv(self, output_file: str = None, site_type: str = None,
+                      start_date: str = None, end_date: str = None,
+                      compress: bool = False) -> str:
         """
         Export sites to CSV format
 
+        Nested analyses are flattened into dotted columns
+        (e.g. solar_analysis.mw_capacity). Rows are streamed oldest first
+        from the creation-date index against the maintained column schema,
+        so the export is a single pass and never builds the full row list.
+
         Args:
             output_file: Output file path (optional)
+            site_type: Only export sites of this type
+            start_date: Only sites created on/after this ISO date
+            end_date: Only sites created on/before this ISO date
+            compress: Write gzip output (implied by a .gz output_file)
 
         Returns:
             CSV file path
         """
         import csv
+        import gzip
 
         if not output_file:
-            output_file = self.data_dir / f"sites_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            suffix = '.csv.gz' if compress else '.csv'
+            output_file = self.data_dir / f"sites_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
 
-        db = self._load_database()
-        sites = db['sites']
+        index = self._load_index()
+        sites = index.created_range(site_type, start_date, end_date)
 
-        if not sites:
+        first = next(sites, None)
+        if first is None:
             print("⚠️  No sites to export")
             return None
 
-        # Get all unique keys from all sites
-        fieldnames = set()
-        for site in sites:
-            fieldnames.update(site.keys())
-
-        fieldnames = sorted(list(fieldnames))
+        if compress or str(output_file).endswith('.gz'):
+            f = gzip.open(output_file, 'wt', newline='')
+        else:
+            f = open(output_file, 'w', newline='')
 
-        # Write CSV
-        with open(output_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
+        with f:
+            writer = csv.DictWriter(f, fieldnames=index.schema(), restval='')
             writer.writeheader()
-            writer.writerows(sites)
+            writer.writerow(flatten_site(first))
+            for site in sites:
+                writer.writerow(flatten_site(site))
 
         return str(output_file)
 
     def get_statistics(self) -> Dict:
-        """Get database statistics"""
-        db = self._load_database()
-        sites = db['sites']
-
-        # Count by type
-        type_counts = {}
-        total_acres = 0
-        total_solar_mw = 0
-
-        for site in sites:
-            site_type = site.get('site_type', 'unknown')
-            type_counts[site_type] = type_counts.get(site_type, 0) + 1
-
-            # Sum acres
-            if 'acres' in site:
-                total_acres += site['acres']
-
-            # Sum solar capacity
-            if site_type == 'solar' and 'solar_analysis' in site:
-                total_solar_mw += site['solar_analysis'].get('mw_capacity', 0)
+        """Get database statistics (read from maintained aggregates)"""
+        index = self._load_index()
+        totals = index.aggregates
 
         return {
-            'total_sites': len(sites),
-            'by_type': type_counts,
-            'total_acres_analyzed': round(total_acres, 2),
-            'total_solar_capacity_mw': round(total_solar_mw, 2),
+            'total_sites': totals.total_sites,
+            'by_type': dict(totals.by_type),
+            'acres_by_type': {k: round(v, 2) for k, v in totals.acres_by_type.items()},
+            'by_territory': dict(totals.by_territory),
+            'total_acres_analyzed': round(totals.total_acres, 2),
+            'total_solar_capacity_mw': round(totals.total_solar_mw, 2),
+            'total_datacenter_capacity_mw': round(totals.total_datacenter_mw, 2),
             'database_file': str(self.db_file),
-            'last_modified': db['metadata'].get('created')
+            'last_modified': index.metadata.get('created')
         }
 
     def format_site_summary(self, site: Dict) -> str:
@@ -301,6 +503,66 @@ class SiteManager:
         return summary
 
 
+def migrate_to_sqlite(data_dir: str = None, force: bool = False) -> int:
+    """
+    Copy the JSON (snapshot + journal) site database into SQLite
+
+    The JSON files are left in place as a backup. Repeated site IDs
+    are renumbered (SQLite requires them to be unique) and reported.
+
+    Args:
+        data_dir: Directory holding hh_holdings_sites.json
+        force: Replace sites already present in the SQLite database
+
+    Returns:
+        Number of sites migrated
+    """
+    source = SiteManager(data_dir, backend='journal')
+    db = source._load_database()
+
+    target = SiteManager(source.data_dir, backend='sqlite')
+    existing = len(target._load_index())
+    if existing and not force:
+        print(f"⚠️  {target.db_file} already holds {existing} sites (use --force to replace)")
+        return 0
+
+    # Older versions could repeat an ID for sites added within one second
+    db['sites'], renumbered = _renumber_duplicate_ids(db['sites'])
+    for old_id, new_id in renumbered:
+        print(f"⚠️  Duplicate site ID {old_id} renumbered to {new_id}")
+
+    target._save_database(db)
+    print(f"✅ Migrated {len(db['sites'])} sites: {source.db_file} → {target.db_file}")
+    return len(db['sites'])
+
+
+def _renumber_duplicate_ids(sites: List[Dict]) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """
+    Give every repeat of a site ID the next free ID (see next_site_id)
+
+    Returns:
+        The sites (renumbered ones copied) and (old ID, new ID) pairs
+    """
+    taken = {site.get('site_id') for site in sites}
+    seen = set()
+    unique, renumbered = [], []
+    for site in sites:
+        site_id = site.get('site_id')
+        if site_id in seen:
+            new_id = site_id
+            number = 0
+            while new_id in taken:
+                number += 1
+                # IDs not generated by SiteManager get a plain -NNN suffix
+                new_id = next_site_id(new_id) or f"{site_id}-{number:03d}"
+            taken.add(new_id)
+            renumbered.append((site_id, new_id))
+            site = dict(site, site_id=new_id)
+        seen.add(site['site_id'])
+        unique.append(site)
+    return unique, renumbered
+
+
 def test_site_manager():
     """Test site manager functionality"""
     print("🦅 EAGLE Site Manager Test")
@@ -349,5 +611,34 @@ def test_site_manager():
     print(f"\n✅ Test complete. Database at: {manager.db_file}")
 
 
+def main(argv: List[str] = None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='HH Holdings site database tools')
+    subparsers = parser.add_subparsers(dest='command')
+
+    migrate = subparsers.add_parser('migrate', help='Migrate the JSON database to SQLite')
+    migrate.add_argument('--data-dir', help='Data directory (default: ~/storage/shared/EnergyIntel/)')
+    migrate.add_argument('--force', action='store_true', help='Replace an existing SQLite database')
+
+    importer = subparsers.add_parser('import', help='Bulk import sites from CSV, JSON-lines or GeoJSON')
+    importer.add_argument('file', help='Input file (.csv, .jsonl, .geojson)')
+    importer.add_argument('--format', choices=['csv', 'jsonl', 'geojson'], help='Override file format')
+    importer.add_argument('--data-dir', help='Data directory (default: ~/storage/shared/EnergyIntel/)')
+    importer.add_argument('--backend', choices=['journal', 'sqlite'], default='journal')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        migrate_to_sqlite(args.data_dir, force=args.force)
+    elif args.command == 'import':
+        manager = SiteManager(args.data_dir, backend=args.backend)
+        result = manager.import_sites(args.file, args.format)
+        print(f"✅ Imported {len(result['added'])} sites")
+        for error in result['errors']:
+            print(f"⚠️  Record {error['record']}: {error['error']}")
+    else:
+        test_site_manager()
+
+
 if __name__ == "__main__":
-    test_site_manager()
+    main(sys.argv[1:])
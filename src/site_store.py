@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Site Storage Backends
+Persistence layer behind SiteManager
+
+Backends:
+    JournalStore - JSON snapshot plus append-only operation journal
+    SQLiteStore  - SQLite database in WAL mode (safe for concurrent processes)
+
+Both speak the same small interface used by SiteManager:
+    exists(), signature(), load(), write(entry, expected),
+    write_many(entries, expected), save(db), needs_compaction(), compact(db)
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from site_index import SiteAggregates
+
+
+# Generated site IDs: HH-YYYYmmdd-HHMMSS, suffixed -001, -002... when taken
+_SITE_ID = re.compile(r'^(HH-\d{8}-\d{6})(?:-(\d{3,}))?$')
+
+
+def next_site_id(site_id: str) -> Optional[str]:
+    """The generated ID after `site_id` (None for IDs not generated by SiteManager)"""
+    match = _SITE_ID.match(site_id or '')
+    if not match:
+        return None
+    return f"{match.group(1)}-{int(match.group(2) or 0) + 1:03d}"
+
+
+class JournalStore:
+    """
+    JSON snapshot with an append-only journal of operations
+
+    Every save numbers the snapshot with a new generation and starts the
+    journal with a matching {"op": "begin"} record. A journal whose begin
+    record is older than the snapshot was already folded into it (a save
+    stopped between replacing the snapshot and resetting the journal)
+    and is not replayed.
+    """
+
+    name = 'journal'
+
+    # Journal entries before the log is folded back into the snapshot
+    COMPACT_THRESHOLD = 1000
+
+    def __init__(self, data_dir: Path):
+        self.db_file = Path(data_dir) / 'hh_holdings_sites.json'
+        self.journal_file = Path(data_dir) / 'hh_holdings_sites.journal'
+        self._journal_count = None
+
+    def exists(self) -> bool:
+        return self.db_file.exists()
+
+    def signature(self) -> Tuple:
+        """Identify the on-disk state of the snapshot and journal"""
+        signature = []
+        for path in (self.db_file, self.journal_file):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load(self) -> Tuple[Dict, List[Dict]]:
+        """
+        Read the snapshot and the journaled operations to replay on it
+
+        Raises:
+            FileNotFoundError, json.JSONDecodeError: snapshot missing or corrupt
+        """
+        with open(self.db_file, 'r') as f:
+            db = json.load(f)
+
+        generation = db.get('generation', 0)
+        operations = list(self.read_journal())
+        if operations and operations[0].get('op') == 'begin':
+            if operations[0].get('generation', 0) < generation:
+                print("⚠️  Journal predates the snapshot (interrupted save); resetting it")
+                self._reset_journal(generation)
+                operations = []
+            else:
+                operations = operations[1:]
+
+        self._journal_count = len(operations)
+        return db, operations
+
+    def write(self, entry: Dict, expected: Tuple = None) -> Optional[Tuple]:
+        """Append a single operation to the journal (O(1) bytes per write)"""
+        return self.write_many([entry], expected)
+
+    def write_many(self, entries: List[Dict], expected: Tuple = None) -> Optional[Tuple]:
+        """
+        Append operations to the journal in one write and one fsync
+
+        Returns:
+            The new signature if the files were in the `expected` state and
+            changed only by this append, otherwise None
+        """
+        data = b''.join(
+            (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+            for entry in entries
+        )
+
+        try:
+            with open(self.journal_file, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            print(f"❌ Error writing journal: {e}")
+            raise
+
+        if self._journal_count is None:
+            self._journal_count = self.count_journal_entries()
+        else:
+            self._journal_count += len(entries)
+
+        if expected is None:
+            return None
+
+        # Anything other than exactly our append means another writer was active
+        old_snapshot, old_journal = expected
+        signature = self.signature()
+        new_snapshot, new_journal = signature
+        expected_size = (old_journal[1] if old_journal else 0) + len(data)
+
+        if new_snapshot != old_snapshot or new_journal is None or new_journal[1] != expected_size:
+            return None
+        return signature
+
+    def save(self, db: Dict):
+        """Save full snapshot to JSON file and start a new journal"""
+        generation = self.journal_generation() + 1
+        tmp_file = self.db_file.with_name(self.db_file.name + '.tmp')
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(dict(db, generation=generation), f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.db_file)
+
+            # Snapshot now contains every journaled operation
+            self._reset_journal(generation)
+        except Exception as e:
+            print(f"❌ Error saving database: {e}")
+            raise
+
+    def _reset_journal(self, generation: int):
+        """Empty the journal, leaving only its begin record"""
+        with open(self.journal_file, 'w') as f:
+            f.write(json.dumps({'op': 'begin', 'generation': generation}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_count = 0
+
+    def journal_generation(self) -> int:
+        """Generation of the snapshot the journal applies to (0 before the first save)"""
+        for operation in self.read_journal():
+            if operation.get('op') == 'begin':
+                return operation.get('generation', 0)
+            break
+        return 0
+
+    def needs_compaction(self) -> bool:
+        return (self._journal_count or 0) >= self.COMPACT_THRESHOLD
+
+    def compact(self, db: Dict):
+        """Fold the journal into a fresh snapshot"""
+        self.save(db)
+
+    def read_journal(self):
+        """Yield journal operations in order, skipping a torn trailing write"""
+        try:
+            f = open(self.journal_file, 'r')
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️  Skipping corrupt journal entry at line {line_no}")
+
+    def count_journal_entries(self) -> int:
+        """Count operations currently in the journal"""
+        return sum(1 for operation in self.read_journal() if operation.get('op') != 'begin')
+
+
+# One shared connection per database file per process, so every
+# SiteManager in the process sees the same PRAGMA data_version
+_CONNECTIONS: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS sites (
+    row       INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_id   TEXT,
+    site_type TEXT,
+    created   TEXT,
+    modified  TEXT,
+    acres     REAL,
+    document  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sites_type_created ON sites (site_type, created);
+CREATE INDEX IF NOT EXISTS idx_sites_created ON sites (created);
+CREATE INDEX IF NOT EXISTS idx_sites_acres ON sites (acres);
+"""
+
+
+def _connect(path: Path) -> Tuple[sqlite3.Connection, threading.Lock]:
+    key = str(path.resolve())
+    with _CONNECTIONS_LOCK:
+        if key not in _CONNECTIONS:
+            conn = sqlite3.connect(key, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.executescript(SCHEMA)
+            _index_site_ids(conn)
+            _CONNECTIONS[key] = (conn, threading.Lock())
+        return _CONNECTIONS[key]
+
+
+def _index_site_ids(conn: sqlite3.Connection):
+    """Enforce unique site IDs (databases created before this kept a plain index)"""
+    try:
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_sites_unique_site_id ON sites (site_id)')
+    except sqlite3.IntegrityError:
+        print("⚠️  Database holds duplicate site IDs; uniqueness is not enforced until they are fixed")
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sites_site_id ON sites (site_id)')
+        return
+    conn.execute('DROP INDEX IF EXISTS idx_sites_site_id')
+
+
+class SQLiteStore:
+    """
+    SQLite site store in WAL mode
+
+    Indexed columns (site_id, site_type, created, acres) are extracted
+    from each site; the full site, including nested analyses, is kept in
+    the JSON `document` column. Every write is its own transaction, so
+    concurrent writers never lose updates and readers never see a
+    partially written database. Statistics aggregates stored in the
+    metadata table are adjusted inside the same transaction.
+
+    site_id is UNIQUE. A generated ID already taken by another process
+    is renumbered inside the insert transaction, and the new ID is
+    written back to the add operation.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, data_dir: Path):
+        self.db_file = Path(data_dir) / 'hh_holdings_sites.db'
+        self._conn, self._lock = _connect(self.db_file)
+
+    def exists(self) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT COUNT(*) FROM metadata').fetchone()
+        return row[0] > 0
+
+    def signature(self) -> Tuple:
+        """Changes whenever another connection commits to the database"""
+        with self._lock:
+            return ('sqlite', self._data_version())
+
+    def _data_version(self) -> int:
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def load(self) -> Tuple[Dict, List[Dict]]:
+        """Read metadata and every site in database order"""
+        with self._lock:
+            metadata = {
+                key: json.loads(value)
+                for key, value in self._conn.execute('SELECT key, value FROM metadata')
+            }
+            sites = [
+                json.loads(document)
+                for (document,) in self._conn.execute('SELECT document FROM sites ORDER BY row')
+            ]
+        return {'metadata': metadata, 'sites': sites}, []
+
+    def write(self, entry: Dict, expected: Tuple = None) -> Optional[Tuple]:
+        """Apply a single add/update/delete operation in its own transaction"""
+        return self.write_many([entry], expected)
+
+    def write_many(self, entries: List[Dict], expected: Tuple = None) -> Optional[Tuple]:
+        """
+        Apply add/update/delete operations in a single transaction
+
+        Returns:
+            The signature if no other connection had committed since
+            `expected`, otherwise None
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                signature = ('sqlite', self._data_version())
+                aggregates = self._read_aggregates()
+                removed, added = [], []
+
+                for entry in entries:
+                    op = entry.get('op')
+                    if op == 'add':
+                        entry['site_id'] = self._insert(entry['site'])
+                        added.append(entry['site'])
+                    elif op == 'update':
+                        old, new = self._update(entry['site_id'], entry['updates'])
+                        if old is not None:
+                            removed.append(old)
+                            added.append(new)
+                    elif op == 'delete':
+                        removed.extend(self._delete(entry['site_id']))
+
+                if aggregates is not None:
+                    for site in removed:
+                        aggregates.apply(site, -1)
+                    for site in added:
+                        aggregates.apply(site)
+                    self._write_aggregates(aggregates)
+
+                self._conn.execute('COMMIT')
+            except Exception as e:
+                self._conn.execute('ROLLBACK')
+                print(f"❌ Error writing database: {e}")
+                raise
+
+        return signature if expected == signature else None
+
+    def _insert(self, site: Dict) -> str:
+        """Insert a site, taking the next free suffix if its generated ID is in use"""
+        while True:
+            try:
+                self._conn.execute(
+                    'INSERT INTO sites (site_id, site_type, created, modified, acres, document) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    self._columns(site)
+                )
+                return site.get('site_id')
+            except sqlite3.IntegrityError:
+                site_id = next_site_id(site.get('site_id'))
+                if site_id is None:
+                    raise
+                site['site_id'] = site_id
+
+    def _update(self, site_id: str, updates: Dict) -> Tuple[Optional[Dict], Optional[Dict]]:
+        # Read-modify-write inside the write transaction
+        row = self._conn.execute(
+            'SELECT row, document FROM sites WHERE site_id = ? ORDER BY row LIMIT 1',
+            (site_id,)
+        ).fetchone()
+        if row is None:
+            return None, None
+
+        old = json.loads(row[1])
+        site = dict(old)
+        site.update(updates)
+        self._conn.execute(
+            'UPDATE sites SET site_id = ?, site_type = ?, created = ?, modified = ?, '
+            'acres = ?, document = ? WHERE row = ?',
+            self._columns(site) + (row[0],)
+        )
+        return old, site
+
+    def _delete(self, site_id: str) -> List[Dict]:
+        removed = [
+            json.loads(document)
+            for (document,) in self._conn.execute(
+                'SELECT document FROM sites WHERE site_id = ?', (site_id,))
+        ]
+        self._conn.execute('DELETE FROM sites WHERE site_id = ?', (site_id,))
+        return removed
+
+    def _read_aggregates(self) -> Optional[SiteAggregates]:
+        row = self._conn.execute(
+            "SELECT value FROM metadata WHERE key = 'aggregates'").fetchone()
+        return SiteAggregates.from_dict(json.loads(row[0])) if row else None
+
+    def _write_aggregates(self, aggregates: SiteAggregates):
+        self._conn.execute(
+            "UPDATE metadata SET value = ? WHERE key = 'aggregates'",
+            (json.dumps(aggregates.to_dict()),)
+        )
+
+    @staticmethod
+    def _columns(site: Dict) -> Tuple:
+        acres = site.get('acres')
+        if not isinstance(acres, (int, float)) or isinstance(acres, bool):
+            acres = None
+
+        return (
+            site.get('site_id'),
+            site.get('site_type'),
+            site.get('created'),
+            site.get('modified'),
+            acres,
+            json.dumps(site, separators=(',', ':'))
+        )
+
+    def save(self, db: Dict):
+        """Replace the whole database in a single transaction"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM metadata')
+                self._conn.execute('DELETE FROM sites')
+                self._conn.executemany(
+                    'INSERT INTO metadata (key, value) VALUES (?, ?)',
+                    [(key, json.dumps(value)) for key, value in db.get('metadata', {}).items()]
+                )
+                self._conn.executemany(
+                    'INSERT INTO sites (site_id, site_type, created, modified, acres, document) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (self._columns(site) for site in db.get('sites', []))
+                )
+                self._conn.execute('COMMIT')
+            except Exception as e:
+                self._conn.execute('ROLLBACK')
+                print(f"❌ Error saving database: {e}")
+                raise
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, db: Dict):
+        """Checkpoint the write-ahead log into the main database file"""
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+BACKENDS = {
+    JournalStore.name: JournalStore,
+    SQLiteStore.name: SQLiteStore,
+}
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Spatial Index
+Lat/lon grid buckets for radius and nearest-neighbor queries
+
+Points are bucketed into fixed-size latitude/longitude cells (the same
+idea as geohash prefixes). A query only measures the points in cells
+that can reach the search circle, using the batched haversine from
+geodesy, instead of measuring every parcel or site.
+
+SegmentGrid does the same for line segments (transmission lines, with
+substations as zero-length segments) and answers nearest-distance
+queries for many points at once.
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import heapq
+import math
+from array import array
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from geodesy import EARTH_RADIUS_MILES, distances_from, segment_distance_matrix
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised on installs without NumPy
+    np = None
+
+
+# Miles per degree of latitude (and of longitude at the equator)
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+# Point x segment distances computed per block in SegmentGrid
+SEGMENT_BLOCK_SIZE = 1_000_000
+
+
+class _CellGrid:
+    """Lat/lon cell arithmetic shared by the grid indexes"""
+
+    def __init__(self, cell_degrees: float = 0.1):
+        """
+        Args:
+            cell_degrees: Cell size in degrees (0.1° is about 7 miles)
+        """
+        self.cell_degrees = cell_degrees
+        self._columns = max(1, int(round(360 / cell_degrees)))
+        self._rows = max(1, int(round(180 / cell_degrees)))
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        row = min(self._rows - 1, max(0, int((lat + 90) // self.cell_degrees)))
+        col = int((lon + 180) // self.cell_degrees) % self._columns
+        return row, col
+
+    def _ring(self, row: int, col: int, n: int):
+        """Cells at Chebyshev distance n from (row, col)"""
+        if n == 0:
+            yield row, col
+            return
+
+        for r in range(row - n, row + n + 1):
+            if not 0 <= r < self._rows:
+                continue
+            if r in (row - n, row + n):
+                cols = range(col - n, col + n + 1)
+            elif 2 * n - 1 >= self._columns:
+                # Earlier rings already covered every column of this row
+                continue
+            else:
+                cols = (col - n, col + n)
+
+            # Once a ring wraps all the way around, visit each column once
+            if 2 * n + 1 >= self._columns:
+                cols = sorted({c % self._columns for c in cols})
+            for c in cols:
+                yield r, c % self._columns
+
+    def _ring_floor(self, lat: float, n: int) -> float:
+        """
+        Lower bound in miles on the distance to any point in ring n: it is
+        at least n - 1 whole cells away in latitude or in longitude
+        """
+        if n <= 1:
+            return 0.0
+
+        span = math.radians((n - 1) * self.cell_degrees)
+        lat_floor = EARTH_RADIUS_MILES * span
+
+        # Haversine with only the longitude term, at the ring's widest latitude
+        lat_edge = math.radians(min(90.0, abs(lat) + (n + 1) * self.cell_degrees))
+        x = math.cos(lat_edge) * math.sin(min(math.pi, span) / 2)
+        lon_floor = 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, x))
+
+        return min(lat_floor, lon_floor)
+
+
+
+class GeoGrid(_CellGrid):
+    """
+    Incremental grid index over (lat, lon) points
+
+    Each point is stored under a caller-supplied key (parcel position,
+    site row, ...). Coordinates live in typed arrays rather than per-point
+    objects to keep millions of points compact.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1):
+        """
+        Args:
+            cell_degrees: Cell size in degrees (0.1° is about 7 miles)
+        """
+        super().__init__(cell_degrees)
+        self.lats = array('d')
+        self.lons = array('d')
+        self.keys: List[Optional[Hashable]] = []
+        self._slots: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def insert(self, key: Hashable, lat: float, lon: float):
+        """Add a point (moving any existing point with the same key)"""
+        slot = self._slots.get(key)
+        if slot is not None:
+            # Reuse the slot so repeated moves do not grow the arrays
+            old_cell = self._cell(self.lats[slot], self.lons[slot])
+            slots = self.cells[old_cell]
+            slots.remove(slot)
+            if not slots:
+                del self.cells[old_cell]
+            self.lats[slot] = lat
+            self.lons[slot] = lon
+            self.cells.setdefault(self._cell(lat, lon), []).append(slot)
+            return
+
+        slot = len(self.keys)
+        self.keys.append(key)
+        self.lats.append(lat)
+        self.lons.append(lon)
+        self._slots[key] = slot
+        self.cells.setdefault(self._cell(lat, lon), []).append(slot)
+
+    def remove(self, key: Hashable) -> bool:
+        """Remove a point; its slot is left as a tombstone"""
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+
+        cell = self._cell(self.lats[slot], self.lons[slot])
+        slots = self.cells[cell]
+        slots.remove(slot)
+        if not slots:
+            del self.cells[cell]
+        self.keys[slot] = None
+        return True
+
+    def _measure(self, lat: float, lon: float, slots: List[int]) -> List[Tuple[float, int]]:
+        lats = [self.lats[s] for s in slots]
+        lons = [self.lons[s] for s in slots]
+        return list(zip(distances_from(lat, lon, lats, lons), slots))
+
+    def within(self, lat: float, lon: float, radius_miles: float) -> List[Tuple[float, Hashable]]:
+        """
+        Points within radius_miles of (lat, lon)
+
+        Returns:
+            (distance_miles, key) pairs, nearest first
+        """
+        dlat = radius_miles / MILES_PER_DEGREE
+        top = min(90.0, abs(lat) + dlat)
+        cos_lat = math.cos(math.radians(top))
+        dlon = 180.0 if cos_lat < 1e-9 else min(180.0, dlat / cos_lat)
+
+        row_lo, col_lo = self._cell(lat - dlat, lon - dlon)
+        row_hi, _ = self._cell(lat + dlat, lon + dlon)
+        col_span = min(self._columns - 1, int(math.ceil(2 * dlon / self.cell_degrees)) + 1)
+
+        slots = []
+        for r in range(row_lo, row_hi + 1):
+            for c in range(col_lo, col_lo + col_span + 1):
+                slots.extend(self.cells.get((r, c % self._columns), ()))
+
+        hits = [(float(d), s) for d, s in self._measure(lat, lon, slots) if d <= radius_miles]
+        hits.sort()
+        return [(d, self.keys[s]) for d, s in hits]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_miles: float = None) -> List[Tuple[float, Hashable]]:
+        """
+        The k points closest to (lat, lon), optionally within max_miles
+
+        Searches outward ring by ring and stops once no unvisited cell can
+        hold a point closer than the current k-th best.
+
+        Returns:
+            (distance_miles, key) pairs, nearest first
+        """
+        if k <= 0 or not self._slots:
+            return []
+
+        row, col = self._cell(lat, lon)
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance, slot)
+        max_ring = max(self._rows, self._columns // 2)
+        measured = 0
+
+        for n in range(max_ring + 1):
+            ring_floor = self._ring_floor(lat, n)
+
+            if len(best) == k and ring_floor > -best[0][0]:
+                break
+            if max_miles is not None and ring_floor > max_miles:
+                break
+
+            # Every point already measured: nothing further can improve
+            if measured >= len(self._slots):
+                break
+
+            slots = []
+            for cell in self._ring(row, col, n):
+                slots.extend(self.cells.get(cell, ()))
+            measured += len(slots)
+
+            for d, slot in self._measure(lat, lon, slots):
+                d = float(d)
+                if max_miles is not None and d > max_miles:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-d, slot))
+                elif d < -best[0][0]:
+                    heapq.heapreplace(best, (-d, slot))
+
+        return [(d, self.keys[s]) for d, s in sorted((-nd, s) for nd, s in best)]
+
+
+class SegmentGrid(_CellGrid):
+    """
+    Grid index over line segments, for nearest-line distances
+
+    A segment is listed in every cell its bounding box covers, so the
+    cell holding a segment's closest point to a query always knows about
+    it. Points (substations) are stored as zero-length segments.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1):
+        """
+        Args:
+            cell_degrees: Cell size in degrees (0.1° is about 7 miles)
+        """
+        super().__init__(cell_degrees)
+        self.lats1 = array('d')
+        self.lons1 = array('d')
+        self.lats2 = array('d')
+        self.lons2 = array('d')
+
+    def __len__(self) -> int:
+        return len(self.lats1)
+
+    def add(self, lat1: float, lon1: float, lat2: float, lon2: float) -> int:
+        """Add the segment (lat1, lon1)-(lat2, lon2); returns its number"""
+        segment = len(self.lats1)
+        self.lats1.append(lat1)
+        self.lons1.append(lon1)
+        self.lats2.append(lat2)
+        self.lons2.append(lon2)
+
+        row_lo, col_lo = self._cell(min(lat1, lat2), min(lon1, lon2))
+        row_hi, col_hi = self._cell(max(lat1, lat2), max(lon1, lon2))
+        for r in range(row_lo, row_hi + 1):
+            for c in range(col_lo, col_hi + 1):
+                self.cells.setdefault((r, c), []).append(segment)
+        return segment
+
+    def add_point(self, lat: float, lon: float) -> int:
+        return self.add(lat, lon, lat, lon)
+
+    def add_line(self, points: Sequence[Tuple[float, float]]):
+        """Add a polyline given as (lat, lon) vertices"""
+        if len(points) == 1:
+            self.add_point(*points[0])
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:]):
+            self.add(lat1, lon1, lat2, lon2)
+
+    def _groups(self, lats, lons) -> List[Tuple[Tuple[int, int], List[int]]]:
+        """Query points grouped by cell"""
+        if np is not None:
+            lats = np.asarray(lats, dtype=float)
+            lons = np.asarray(lons, dtype=float)
+            rows = np.clip((lats + 90) // self.cell_degrees, 0, self._rows - 1).astype(np.int64)
+            cols = ((lons + 180) // self.cell_degrees).astype(np.int64) % self._columns
+            keys = rows * self._columns + cols
+            order = np.argsort(keys, kind='stable')
+            starts = np.flatnonzero(np.diff(keys[order])) + 1
+            return [((int(keys[idx[0]] // self._columns), int(keys[idx[0]] % self._columns)), idx)
+                    for idx in np.split(order, starts) if len(idx)]
+
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for i, (lat, lon) in enumerate(zip(lats, lons)):
+            groups.setdefault(self._cell(lat, lon), []).append(i)
+        return list(groups.items())
+
+    def _min_distances(self, lats, lons, segments: List[int]):
+        """Distance from each point to the closest of `segments`"""
+        ends = [[column[s] for s in segments]
+                for column in (self.lats1, self.lons1, self.lats2, self.lons2)]
+        rows = max(1, SEGMENT_BLOCK_SIZE // len(segments))
+        if np is not None:
+            return np.concatenate([
+                segment_distance_matrix(lats[i:i + rows], lons[i:i + rows], *ends).min(axis=1)
+                for i in range(0, len(lats), rows)])
+        return [min(row) for i in range(0, len(lats), rows)
+                for row in segment_distance_matrix(lats[i:i + rows], lons[i:i + rows], *ends)]
+
+    def nearest_distances(self, lats: Sequence[float], lons: Sequence[float],
+                          max_miles: float = None):
+        """
+        Distance in miles from each point to its closest segment
+
+        Points sharing a cell are measured together: rings of cells are
+        searched outward until no unvisited cell can hold a segment
+        closer than the group's current worst best distance.
+
+        Returns:
+            One distance per point (NumPy array when available, else a
+            list); infinity where nothing lies within max_miles
+        """
+        count = len(lats)
+        if np is not None:
+            lats = np.asarray(lats, dtype=float)
+            lons = np.asarray(lons, dtype=float)
+            result = np.full(count, math.inf)
+        else:
+            lats, lons = list(lats), list(lons)
+            result = [math.inf] * count
+        if not len(self):
+            return result
+
+        max_ring = max(self._rows, self._columns // 2)
+        for (row, col), members in self._groups(lats, lons):
+            if np is not None:
+                group_lats, group_lons = lats[members], lons[members]
+                edge_lat = float(np.abs(group_lats).max())
+            else:
+                group_lats = [lats[i] for i in members]
+                group_lons = [lons[i] for i in members]
+                edge_lat = max(abs(lat) for lat in group_lats)
+
+            best = None
+            seen = set()
+            for n in range(max_ring + 1):
+                ring_floor = self._ring_floor(edge_lat, n)
+                if best is not None and ring_floor > worst:
+                    break
+                if max_miles is not None and ring_floor > max_miles:
+                    break
+                if len(seen) >= len(self):
+                    break
+
+                segments = []
+                for cell in self._ring(row, col, n):
+                    for segment in self.cells.get(cell, ()):
+                        if segment not in seen:
+                            seen.add(segment)
+                            segments.append(segment)
+                if not segments:
+                    continue
+
+                found = self._min_distances(group_lats, group_lons, segments)
+                if np is not None:
+                    best = found if best is None else np.minimum(best, found)
+                    worst = float(best.max())
+                else:
+                    best = found if best is None else [min(a, b) for a, b in zip(best, found)]
+                    worst = max(best)
+
+            if best is None:
+                continue
+            for i, distance in zip(members.tolist() if np is not None else members,
+                                   best.tolist() if np is not None else best):
+                if max_miles is None or distance <= max_miles:
+                    result[i] = distance
+
+        return result
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Classifier Tests
+Unit tests for batch parcel classification
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import afz_classifier
+import parcel_store
+from afz_classifier import AFZClassifier, AFZStatistics
+from benchmark_afz import synthetic_roll
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Run batch tests against NumPy (when installed) and pure Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(afz_classifier, 'np', None)
+        monkeypatch.setattr(parcel_store, 'np', None)
+    return request.param
+
+
+def scalar_reference(columns):
+    classifier = AFZClassifier()
+    names = list(columns)
+    return [classifier.classify_parcel(**dict(zip(names, values)))
+            for values in zip(*columns.values())]
+
+
+def test_classify_many_matches_classify_parcel(backend):
+    """Dict-of-lists input scores exactly like the scalar path"""
+    columns = synthetic_roll(3000, seed=5)
+    # Boundary values for every threshold
+    columns['avg_rainfall'][:4] = [20.0, 19.99, 20, 0]
+    columns['nearest_substation'][:4] = [5.0, 1.0, 5.01, 1.01]
+    columns['nearest_transmission'][:4] = [20, 20, 1.0, 5]
+
+    classifier = AFZClassifier()
+    positions = classifier.classify_many(columns)
+
+    assert positions == range(3000)
+    assert list(classifier.parcels) == scalar_reference(columns)
+
+
+def test_classify_many_records_and_defaults(backend):
+    """Record iterators are chunked; missing optional fields use defaults"""
+    records = [
+        {'parcel_id': 'P1', 'name': 'One', 'county': 'Bosque', 'state': 'TX',
+         'lat': 31.9, 'lon': -97.6, 'acres': 500, 'soil_quality': 'marginal',
+         'nearest_substation': 0.5},
+        # AFZParcel field names are accepted too
+        {'id': 'P2', 'name': 'Two', 'county': 'Pecos', 'state': 'TX',
+         'latitude': 31.0, 'longitude': -103.5, 'acres': 1200.5,
+         'avg_rainfall_inches': 12.0, 'is_brownfield': True},
+        {'parcel_id': 'P3', 'name': 'Three', 'county': 'Harris', 'state': 'TX',
+         'lat': 29.7, 'lon': -95.2, 'acres': 80},
+    ]
+    classifier = AFZClassifier()
+    classifier.classify_many(iter(records), chunk_rows=2)
+
+    expected = AFZClassifier()
+    expected.classify_parcel('P1', 'One', 'Bosque', 'TX', 31.9, -97.6, 500,
+                             soil_quality='marginal', nearest_substation=0.5)
+    expected.classify_parcel('P2', 'Two', 'Pecos', 'TX', 31.0, -103.5, 1200.5,
+                             avg_rainfall=12.0, is_brownfield=True)
+    expected.classify_parcel('P3', 'Three', 'Harris', 'TX', 29.7, -95.2, 80)
+
+    assert list(classifier.parcels) == list(expected.parcels)
+
+    with pytest.raises(ValueError, match='acres'):
+        classifier.classify_many([{'parcel_id': 'P4', 'name': 'No size', 'county': 'Bosque',
+                                   'state': 'TX', 'lat': 31.9, 'lon': -97.6}])
+    assert len(classifier.parcels) == 3
+
+
+def test_classify_many_arrays_and_dataframe():
+    """NumPy columns and pandas DataFrames give the same parcels"""
+    np = pytest.importorskip('numpy')
+    columns = synthetic_roll(500, seed=9)
+    reference = scalar_reference(columns)
+
+    classifier = AFZClassifier()
+    classifier.classify_many({name: np.asarray(values) for name, values in columns.items()})
+    assert list(classifier.parcels) == reference
+
+    pd = pytest.importorskip('pandas')
+    classifier = AFZClassifier()
+    classifier.classify_many(pd.DataFrame(columns))
+    assert list(classifier.parcels) == reference
+
+
+@pytest.mark.parametrize('min_score,group_by', [
+    (30, ('county', 'soil_quality')),
+    (0, ('current_use', 'state')),
+    (75, ()),
+    (500, ('county',)),
+])
+def test_statistics_match_parcel_by_parcel_totals(backend, min_score, group_by):
+    """Column-wise statistics equal AFZStatistics, down to int/float totals and key order"""
+    columns = synthetic_roll(2000, seed=11)
+    columns['acres'] = [a + 0.25 if i % 3 == 0 else a for i, a in enumerate(columns['acres'])]
+    classifier = AFZClassifier()
+    classifier.classify_many(columns)
+
+    reference = AFZStatistics(min_score, group_by)
+    reference.add_many(classifier.parcels)
+    assert json.dumps(classifier.get_statistics(min_score, group_by)) == \
+        json.dumps(reference.to_dict())
+
+
+def test_statistics_cached_until_parcels_change(monkeypatch):
+    classifier = AFZClassifier()
+    assert classifier.get_statistics() == AFZStatistics().to_dict()
+    classifier.classify_many(synthetic_roll(200, seed=2))
+
+    calls = []
+    compute = classifier._compute_statistics
+    monkeypatch.setattr(classifier, '_compute_statistics',
+                        lambda *args: calls.append(args) or compute(*args))
+
+    first = classifier.get_statistics()
+    first['by_county'].clear()
+    assert classifier.get_statistics()['by_county']
+    assert len(calls) == 1
+
+    classifier.get_statistics(min_score=60)
+    assert len(calls) == 2
+
+    classifier.classify_parcel('AFZ-NEW', 'New', 'Bosque', 'TX', 31.9, -97.6, 40)
+    assert classifier.get_statistics()['total_parcels'] == 201
+    assert len(calls) == 3
+
+
+def test_merged_statistics_keep_parcel_order():
+    """Partial statistics merged out of order list keys as if added in turn"""
+    classifier = AFZClassifier()
+    classifier.classify_many(synthetic_roll(900, seed=6))
+    parcels = list(classifier.parcels)
+
+    reference = AFZStatistics()
+    reference.add_many(parcels)
+
+    merged = AFZStatistics()
+    for remainder in (2, 0, 1):
+        rows = list(range(remainder, len(parcels), 3))
+        partial = AFZStatistics()
+        partial.add_many(parcels[row] for row in rows)
+        merged.merge(partial, rows)
+    assert json.dumps(merged.to_dict()) == json.dumps(reference.to_dict())
+
+    with pytest.raises(ValueError):
+        merged.merge(AFZStatistics(min_score=60))
+
+
+def test_statistics_reject_unknown_group():
+    with pytest.raises(ValueError):
+        AFZClassifier().get_statistics(group_by=('name',))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Export Tests
+Unit tests for streaming JSON/GeoJSON export
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import gzip
+import json
+from dataclasses import asdict
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from afz_classifier import AFZClassifier
+from afz_export import StreamingListWriter, parcel_feature
+from benchmark_afz import synthetic_roll
+
+
+@pytest.fixture
+def classifier():
+    classifier = AFZClassifier()
+    classifier.classify_many(synthetic_roll(300, seed=3))
+    return classifier
+
+
+def expected_json(classifier, min_score):
+    """The document the original all-in-memory export built"""
+    eligible = classifier.get_eligible_parcels(min_score)
+    return {
+        'metadata': {
+            'total_parcels': len(eligible),
+            'total_acres': sum(p.acres for p in eligible),
+            'min_score': min_score,
+            'generated_by': 'AFZ Classifier v1.0'
+        },
+        'statistics': classifier.get_statistics(),
+        'parcels': [asdict(p) for p in eligible]
+    }
+
+
+def expected_geojson(classifier, min_score):
+    eligible = classifier.get_eligible_parcels(min_score)
+    return {
+        'type': 'FeatureCollection',
+        'metadata': {
+            'total_parcels': len(eligible),
+            'total_acres': sum(p.acres for p in eligible)
+        },
+        'features': [parcel_feature(p) for p in eligible]
+    }
+
+
+def test_default_export_byte_identical(classifier, tmp_path):
+    """Default streaming output is exactly json.dump(..., indent=2)"""
+    classifier.export_to_json(str(tmp_path / 'afz.json'), min_score=60)
+    classifier.export_to_geojson(str(tmp_path / 'afz.geojson'), min_score=60)
+
+    assert (tmp_path / 'afz.json').read_text() == \
+        json.dumps(expected_json(classifier, 60), indent=2)
+    assert (tmp_path / 'afz.geojson').read_text() == \
+        json.dumps(expected_geojson(classifier, 60), indent=2)
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+@pytest.mark.parametrize('trailer', [False, True])
+def test_compact_gzip_and_trailer(classifier, tmp_path, trailer):
+    """Compact, gzipped and trailer layouts decode to the same documents"""
+    json_file = str(tmp_path / 'afz.json.gz')
+    geojson_file = str(tmp_path / 'afz.geojson.gz')
+    classifier.export_to_json(json_file, indent=None, trailer=trailer)
+    classifier.export_to_geojson(geojson_file, indent=None, trailer=trailer)
+
+    with gzip.open(json_file, 'rt') as f:
+        text = f.read()
+    assert json.loads(text) == expected_json(classifier, 30)
+    assert '\n' not in text and '": ' not in text
+    assert text.startswith('{"parcels":[' if trailer else '{"metadata":')
+
+    with gzip.open(geojson_file, 'rt') as f:
+        assert json.load(f) == expected_geojson(classifier, 30)
+
+    # Fixed gzip timestamp: same parcels, same bytes
+    classifier.export_to_json(str(tmp_path / 'again.json.gz'), indent=None, trailer=trailer)
+    assert (tmp_path / 'again.json.gz').read_bytes() == (tmp_path / 'afz.json.gz').read_bytes()
+
+
+@pytest.mark.parametrize('indent', [None, 2, 4])
+@pytest.mark.parametrize('trailer', [False, True])
+def test_empty_and_nested_lists(tmp_path, indent, trailer):
+    """Writer output equals json.dumps for empty and non-empty lists"""
+    items = [{'a': [1, 2], 'b': {'c': []}}, {'a': [], 'b': {}}]
+    for count in (0, 1, 2):
+        path = tmp_path / f'out-{count}.json'
+        writer = StreamingListWriter(path, 'items', prefix={'type': 'X'},
+                                     indent=indent, trailer=trailer)
+        for item in items[:count]:
+            writer.write_item(item)
+        writer.finish({'total': count, 'tags': []})
+
+        if trailer:
+            document = {'type': 'X', 'items': items[:count], 'total': count, 'tags': []}
+        else:
+            document = {'type': 'X', 'total': count, 'tags': [], 'items': items[:count]}
+        kwargs = {'separators': (',', ':')} if indent is None else {'indent': indent}
+        assert path.read_text() == json.dumps(document, **kwargs)
+
+
+def test_failed_export_keeps_previous_file(classifier, tmp_path, monkeypatch):
+    """An error while streaming leaves the old export in place"""
+    target = tmp_path / 'afz.json'
+    target.write_text('previous')
+
+    def explode(parcel):
+        raise RuntimeError('disk full')
+    monkeypatch.setattr('afz_export.ParcelJSONWriter.add', lambda self, parcel: explode(parcel))
+
+    with pytest.raises(RuntimeError):
+        classifier.export_to_json(str(target))
+    assert target.read_text() == 'previous'
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Query Tests
+Unit tests for composable, ranked parcel queries
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import afz_classifier
+import afz_query
+import afz_rules
+import parcel_store
+from afz_classifier import AFZClassifier
+from benchmark_afz import synthetic_roll
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def classifier(request, monkeypatch):
+    """Classifier over a synthetic roll, with NumPy (when installed) and pure Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        for module in (afz_classifier, afz_query, afz_rules, parcel_store):
+            monkeypatch.setattr(module, 'np', None)
+    classifier = AFZClassifier()
+    classifier.classify_many(synthetic_roll(3000, seed=17))
+    return classifier
+
+
+def test_ranked_query_matches_filter_and_sort(classifier, monkeypatch):
+    """'The 50 best parcels in county X with grid access above N acres'"""
+    monkeypatch.setattr(afz_query, 'QUERY_CHUNK', 64)
+    query = (classifier.query()
+             .where('county', '==', 'Bosque')
+             .with_criteria('Grid Access')
+             .where('acres', '>', 1000)
+             .order_by('-score')
+             .limit(50))
+
+    expected = sorted((p for p in classifier.filter_by_county('Bosque')
+                       if 'Grid Access' in p.afz_criteria and p.acres > 1000),
+                      key=lambda p: -p.score)
+    assert list(query) == expected[:50]
+    assert query.count() == len(expected)
+    assert list(query.offset(40)) == expected[40:90]
+
+
+def test_multi_key_order_uses_heap_selection(classifier):
+    parcels = list(classifier.parcels)
+    query = classifier.query().where('score', '>=', 30).order_by('-score', 'county', '-acres')
+    expected = sorted((p for p in parcels if p.score >= 30),
+                      key=lambda p: (-p.score, p.county, -p.acres))
+
+    assert list(query) == expected
+    assert list(query.offset(7).limit(25)) == expected[7:32]
+    assert list(classifier.query().order_by('-name').limit(5)) == \
+        sorted(parcels, key=lambda p: p.name, reverse=True)[:5]
+
+
+def test_conditions_on_any_field(classifier):
+    parcels = list(classifier.parcels)
+    query = (classifier.query()
+             .where({'any': [{'field': 'is_arid', 'op': '==', 'value': True},
+                             {'field': 'soil_quality', 'op': 'in', 'value': ['marginal']}]})
+             .where('name', 'contains', 'parcel 1')
+             .where('current_use', '!=', 'industrial'))
+    expected = [p for p in parcels
+                if (p.is_arid or p.soil_quality == 'marginal')
+                and 'parcel 1' in p.name.lower() and p.current_use != 'industrial']
+    assert list(query) == expected
+    assert classifier.query().where('id', '==', parcels[5].id).first() == parcels[5]
+    assert classifier.query().where('acres', '<', 0).first() is None
+
+
+def test_radius_query_ordered_by_distance(classifier):
+    lat, lon, radius = 31.5, -99.0, 120
+    nearby = classifier.parcels_within(lat, lon, radius)
+    query = classifier.query().within(lat, lon, radius).where('score', '>=', 50)
+
+    expected = [p for _, p in nearby if p.score >= 50]
+    assert list(query.order_by('distance')) == expected
+    assert list(query.order_by('-distance').limit(3)) == \
+        [p for _, p in sorted(((d, p) for d, p in nearby if p.score >= 50),
+                              key=lambda item: -item[0])][:3]
+    # Without an order, results come in store order
+    assert [p.id for p in query] == sorted(p.id for p in expected)
+
+
+def test_results_are_lazy_and_queries_immutable(classifier):
+    base = classifier.query().order_by('-score')
+    results = iter(base.limit(2))
+    first = next(results)
+    assert first.score == max(p.score for p in classifier.parcels)
+
+    limited = base.limit(1)
+    assert len(list(limited)) == 1
+    assert len(list(base)) == len(classifier.parcels)
+
+
+def test_sorted_index_follows_store_changes(classifier):
+    query = classifier.query().order_by('-acres').limit(1)
+    assert query.first().acres == max(p.acres for p in classifier.parcels)
+
+    classifier.classify_parcel('AFZ-BIG', 'Biggest', 'Bosque', 'TX', 31.9, -97.6, 99_999)
+    assert query.first().id == 'AFZ-BIG'
+
+
+@pytest.mark.parametrize('build', [
+    lambda q: q.where('acres', '~', 1),
+    lambda q: q.where('unknown', '==', 1),
+    lambda q: q.where('name', '<', 'A'),
+    lambda q: q.order_by('afz_criteria'),
+    lambda q: q.limit(-1),
+])
+def test_bad_queries_rejected(classifier, build):
+    with pytest.raises(ValueError):
+        build(classifier.query())
+
+
+def test_distance_order_needs_radius(classifier):
+    with pytest.raises(ValueError):
+        list(classifier.query().order_by('distance'))
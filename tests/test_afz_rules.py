@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Rules Tests
+Unit tests for the declarative scoring rules engine
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import afz_classifier
+import afz_rules
+import parcel_store
+from afz_classifier import AFZClassifier
+from afz_rules import RuleError, RuleSet, load_rule_sets
+from benchmark_afz import synthetic_roll
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Run rule evaluation against NumPy (when installed) and pure Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        for module in (afz_classifier, afz_rules, parcel_store):
+            monkeypatch.setattr(module, 'np', None)
+    return request.param
+
+
+def scalar_parcels(rules, columns):
+    classifier = AFZClassifier(rules)
+    names = list(columns)
+    for values in zip(*columns.values()):
+        classifier.classify_parcel(**dict(zip(names, values)))
+    return list(classifier.parcels)
+
+
+def test_shipped_default_matches_classifier_constants():
+    """config/afz_rules/default.json is the built-in scoring"""
+    shipped = load_rule_sets()['default']
+    assert shipped.document == AFZClassifier().rules.document
+
+
+def test_rule_sets_score_alike_on_every_path(backend):
+    """Scalar, batch and re-scored parcels agree for every shipped rule set"""
+    columns = synthetic_roll(1500, seed=21)
+    for name, rules in load_rule_sets().items():
+        batch = AFZClassifier(rules)
+        batch.classify_many(columns)
+
+        rescored = AFZClassifier()
+        rescored.classify_many(columns)
+        rescored.rescore(rules)
+
+        assert list(batch.parcels) == scalar_parcels(rules, columns), name
+        assert list(rescored.parcels) == list(batch.parcels), name
+
+
+def test_operators_and_combinators(backend):
+    rules = RuleSet({
+        'name': 'custom',
+        'max_score': 50,
+        'criteria': [
+            {'name': 'Dry Grazing', 'points': 30, 'flag': 'is_arid',
+             'when': {'all': [{'field': 'current_use', 'op': 'in', 'value': ['grazing', 'vacant']},
+                              {'field': 'avg_rainfall_inches', 'op': '<=', 'value': 25}]}},
+            {'name': 'Not Pecos', 'points': 15,
+             'when': {'not': {'field': 'county', 'op': '==', 'value': 'Pecos'}}},
+            {'name': 'Odd Elevation', 'points': 10,
+             'when': {'field': 'elevation_ft', 'op': 'not_in', 'value': [100, 200]}},
+        ],
+        'bonuses': [
+            {'name': 'Big', 'points': 20, 'when': {'field': 'acres', 'op': '>', 'value': 2500}},
+        ],
+    })
+    columns = synthetic_roll(800, seed=4)
+    classifier = AFZClassifier(rules)
+    classifier.classify_many(columns)
+
+    parcels = list(classifier.parcels)
+    assert parcels == scalar_parcels(rules, columns)
+    for parcel in parcels:
+        dry = parcel.current_use in ('grazing', 'vacant') and parcel.avg_rainfall_inches <= 25
+        expected = 30 * dry + 15 * (parcel.county != 'Pecos') + 10 + 20 * (parcel.acres > 2500)
+        assert parcel.score == min(expected, 50)
+        assert parcel.is_arid == dry
+        assert parcel.has_grid_access is False
+
+
+def test_rescore_invalidates_statistics():
+    classifier = AFZClassifier()
+    classifier.classify_many(synthetic_roll(500, seed=8))
+    before = classifier.get_statistics()
+
+    classifier.rescore(load_rule_sets()['grid_first'])
+    after = classifier.get_statistics()
+    assert after != before
+    assert after['grid_access_count'] == sum(p.has_grid_access for p in classifier.parcels
+                                             if p.score >= 30)
+
+
+def test_compare_rules_leaves_parcels_unchanged(backend):
+    classifier = AFZClassifier()
+    classifier.classify_many(synthetic_roll(1000, seed=13))
+    original = list(classifier.parcels)
+    rule_sets = load_rule_sets()
+
+    results = classifier.compare_rules(rule_sets, min_score=60)
+    assert list(classifier.parcels) == original
+    assert results['default']['changed_parcels'] == 0
+    assert results['default']['eligible_parcels'] == classifier.get_statistics(60)['eligible_parcels']
+
+    for name, rules in rule_sets.items():
+        scenario = AFZClassifier(rules)
+        scenario.classify_many(synthetic_roll(1000, seed=13))
+        stats = scenario.get_statistics(60)
+        assert results[name]['eligible_parcels'] == stats['eligible_parcels']
+        assert results[name]['total_acres'] == pytest.approx(stats['total_acres'])
+        assert results[name]['avg_score'] == pytest.approx(stats['avg_score'])
+        assert results[name]['by_criteria'] == {
+            criterion: stats['by_criteria'].get(criterion, 0) for criterion in results[name]['by_criteria']}
+        assert results[name]['changed_parcels'] == sum(
+            a.score != b.score for a, b in zip(original, scenario.parcels))
+
+
+@pytest.mark.parametrize('document', [
+    {'criteria': [{'name': 'X', 'when': {'field': 'score', 'op': '>', 'value': 1}}]},
+    {'criteria': [{'name': 'X', 'when': {'field': 'acres', 'op': '~', 'value': 1}}]},
+    {'criteria': [{'name': 'X', 'when': {'field': 'acres', 'op': '>', 'value': 'big'}}]},
+    {'criteria': [{'name': 'X', 'when': {'field': 'county', 'op': '<', 'value': 'A'}}]},
+    {'criteria': [{'name': 'X', 'when': {'any': []}}]},
+    {'criteria': [{'name': 'X', 'flag': 'score', 'when': {'field': 'acres', 'op': '>', 'value': 1}}]},
+    {'criteria': [{'name': 'X', 'when': {'field': 'acres', 'op': '>', 'value': 1}}] * 2},
+    {'bonuses': [{'name': 'X', 'points': 1.5, 'when': {'field': 'acres', 'op': '>', 'value': 1}}]},
+])
+def test_malformed_rules_rejected(document):
+    with pytest.raises(RuleError):
+        RuleSet(document)
+
+
+def test_load_names_rule_set_after_file(tmp_path):
+    path = tmp_path / 'scenario.json'
+    path.write_text(json.dumps({'criteria': []}))
+    assert RuleSet.load(path).name == 'scenario'
+
+    path.write_text('{not json')
+    with pytest.raises(RuleError):
+        RuleSet.load(path)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - AFZ Tile Tests
+Unit tests for zoom-level tile export
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import gzip
+import json
+import math
+import sqlite3
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import afz_tiles
+from afz_classifier import AFZClassifier
+from afz_tiles import mercator
+from benchmark_afz import synthetic_roll
+
+
+@pytest.fixture
+def classifier():
+    classifier = AFZClassifier()
+    classifier.classify_many(synthetic_roll(400, seed=5))
+    return classifier
+
+
+def read_dir_tiles(root):
+    return {tuple(int(part) for part in path.relative_to(root).with_suffix('').parts):
+            json.loads(path.read_text())
+            for path in Path(root).glob('*/*/*.json')}
+
+
+def tile_of(lat, lon, z):
+    x, y = mercator(lat, lon)
+    return int(x * (1 << z)), int(y * (1 << z))
+
+
+def test_mercator_matches_slippy_map_formula():
+    lat, lon, z = 31.9, -97.65, 10
+    n = 1 << z
+    expected_x = int((lon + 180) / 360 * n)
+    expected_y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    assert tile_of(lat, lon, z) == (expected_x, expected_y)
+
+
+def test_clusters_sum_to_eligible_parcels(classifier, tmp_path):
+    index = classifier.export_tiles(tmp_path / 'tiles', min_score=50, min_zoom=3,
+                                    max_zoom=7, workers=1)
+    tiles = read_dir_tiles(tmp_path / 'tiles')
+    eligible = classifier.get_eligible_parcels(50)
+
+    for z in range(3, 7):
+        clusters = [c for (tz, _, _), tile in tiles.items() if tz == z for c in tile['clusters']]
+        assert sum(c['count'] for c in clusters) == len(eligible)
+        assert sum(c['acres'] for c in clusters) == pytest.approx(sum(p.acres for p in eligible))
+        assert sum(c['avg_score'] * c['count'] for c in clusters) == pytest.approx(
+            sum(p.score for p in eligible), abs=0.05 * len(clusters))
+        assert index['tiles'][str(z)] == len([key for key in tiles if key[0] == z])
+
+    assert index['metadata']['total_parcels'] == len(eligible)
+    assert index['statistics'] == classifier.get_statistics(50)
+    assert index['statistics']['eligible_parcels'] == len(eligible)
+
+
+def test_detail_tiles_hold_each_parcel_in_its_tile(classifier, tmp_path):
+    classifier.export_tiles(tmp_path / 'tiles', min_score=30, min_zoom=8, max_zoom=9, workers=1)
+    tiles = read_dir_tiles(tmp_path / 'tiles')
+
+    expected = {}
+    for parcel in classifier.get_eligible_parcels(30):
+        x, y = tile_of(parcel.latitude, parcel.longitude, 9)
+        expected.setdefault((9, x, y), []).append(asdict(parcel))
+
+    assert {key: tile['parcels'] for key, tile in tiles.items() if key[0] == 9} == expected
+
+
+def test_parallel_build_is_identical(classifier, tmp_path, monkeypatch):
+    monkeypatch.setattr(afz_tiles, 'PARALLEL_MIN_TASKS', 1)
+    monkeypatch.setattr(afz_tiles, 'PARCELS_PER_TASK', 25)
+    classifier.export_tiles(tmp_path / 'serial', min_zoom=4, max_zoom=9, workers=1)
+    classifier.export_tiles(tmp_path / 'parallel', min_zoom=4, max_zoom=9, workers=2)
+
+    serial = sorted(p.relative_to(tmp_path / 'serial') for p in (tmp_path / 'serial').rglob('*.json'))
+    parallel = sorted(p.relative_to(tmp_path / 'parallel') for p in (tmp_path / 'parallel').rglob('*.json'))
+    assert serial == parallel
+    for path in serial:
+        assert (tmp_path / 'serial' / path).read_bytes() == (tmp_path / 'parallel' / path).read_bytes()
+
+
+def test_units_split_zoom_levels_by_tile_column(classifier, monkeypatch):
+    monkeypatch.setattr(afz_tiles, 'PARCELS_PER_TASK', 25)
+    parcels = classifier.parcels
+    positions = parcels.positions(parcels.score_mask(30))
+    source = afz_tiles.TileSource(parcels, positions)
+
+    for z in (6, 9):
+        units = source.units(z, detail=False)
+        assert len(units) > 1
+        members = [source.members(z, x_start, x_end).tolist() for _, x_start, x_end, _ in units]
+        assert sorted(i for unit in members for i in unit) == list(range(len(positions)))
+        for (_, x_start, x_end, _), unit in zip(units, members):
+            assert all(x_start <= int(source.xs[i] * (1 << z)) < x_end for i in unit)
+
+
+def test_pure_python_build_is_identical(classifier, tmp_path, monkeypatch):
+    classifier.export_tiles(tmp_path / 'numpy', min_zoom=4, max_zoom=9, workers=1)
+    monkeypatch.setattr(afz_tiles, 'np', None)
+    monkeypatch.setattr(afz_tiles, 'PARCELS_PER_TASK', 25)
+    classifier.export_tiles(tmp_path / 'python', min_zoom=4, max_zoom=9, workers=1)
+
+    numpy_tiles = sorted((tmp_path / 'numpy').rglob('*.json'))
+    assert len(numpy_tiles) > 1
+    for path in numpy_tiles:
+        other = tmp_path / 'python' / path.relative_to(tmp_path / 'numpy')
+        assert other.read_bytes() == path.read_bytes()
+
+
+def test_pool_holds_a_bounded_window_of_tasks():
+    from concurrent.futures import Future
+
+    class InlinePool:
+        def submit(self, fn, task):
+            future = Future()
+            future.set_result(fn(task))
+            return future
+
+    drawn = []
+
+    def tasks():
+        for n in range(20):
+            drawn.append(n)
+            yield n
+
+    built = afz_tiles._build_in_pool(InlinePool(), lambda n: [(0, 0, n, b'')], tasks(), window=4)
+    first = next(built)
+    assert len(drawn) == 4
+    assert sorted(y for _, _, y, _ in [first, *built]) == list(range(20))
+
+
+def test_mbtiles_matches_directory_output(classifier, tmp_path):
+    classifier.export_tiles(tmp_path / 'tiles', min_zoom=5, max_zoom=8, workers=1)
+    index = classifier.export_tiles(tmp_path / 'afz.mbtiles', min_zoom=5, max_zoom=8,
+                                    tile_format='mbtiles', workers=1)
+
+    conn = sqlite3.connect(str(tmp_path / 'afz.mbtiles'))
+    rows = conn.execute('SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles').fetchall()
+    metadata = dict(conn.execute('SELECT name, value FROM metadata'))
+    conn.close()
+
+    # TMS rows count from the south
+    tiles = {(z, x, (1 << z) - 1 - row): json.loads(gzip.decompress(data))
+             for z, x, row, data in rows}
+    assert tiles == read_dir_tiles(tmp_path / 'tiles')
+    assert metadata['minzoom'] == '5' and metadata['maxzoom'] == '8'
+    assert json.loads(metadata['json']) == index
+    assert not (tmp_path / 'afz.mbtiles.tmp').exists()
+
+
+def test_rejects_bad_options(classifier, tmp_path):
+    with pytest.raises(ValueError):
+        classifier.export_tiles(tmp_path / 'tiles', tile_format='png')
+    with pytest.raises(ValueError):
+        classifier.export_tiles(tmp_path / 'tiles', min_zoom=9, max_zoom=4)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Clerk Cache Tests
+Unit tests for the clerk records response cache
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from clerk_cache import ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_normalize_query_parameters():
+    assert cache_key('texasfile', name='  John   SMITH ', type='Deed') == \
+        cache_key('texasfile', type='deed', name='john smith')
+    assert cache_key('texasfile', name='smith') != cache_key('kofile', name='smith')
+    assert cache_key('texasfile', name='smith') != cache_key('texasfile', name='smithe')
+
+
+def test_hits_return_copies_until_ttl_expires():
+    clock = Clock()
+    cache = ResponseCache(ttls={'texasfile': 60, 'kofile': 600}, clock=clock)
+    assert cache.get('texasfile', name='Smith') is None
+
+    cache.put('texasfile', [{'id': 1}], name='Smith')
+    cache.put('kofile', [], name='Smith')
+    hit = cache.get('texasfile', name='smith')
+    assert hit == [{'id': 1}]
+    hit.append('changed')
+    assert cache.get('texasfile', name='SMITH') == [{'id': 1}]
+
+    clock.now += 61
+    assert cache.get('texasfile', name='smith') is None
+    assert cache.get('kofile', name='smith') == []
+
+    metrics = cache.metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['expirations']) == (3, 2, 1)
+    assert metrics['by_source']['texasfile'] == {'hits': 2, 'disk_hits': 0, 'misses': 2}
+
+
+def test_least_recently_used_evicted_by_bytes():
+    value = ['x' * 400]
+    cache = ResponseCache(max_bytes=1500)
+    for name in ('a', 'b', 'c'):
+        cache.put('texasfile', value, name=name)
+    cache.get('texasfile', name='a')
+    cache.put('texasfile', value, name='d')
+
+    assert cache.get('texasfile', name='b') is None
+    assert all(cache.get('texasfile', name=name) == value for name in 'acd')
+    metrics = cache.metrics()
+    assert metrics['evictions'] == 1 and metrics['entries'] == 3
+    assert metrics['bytes'] <= 1500
+
+    # Responses larger than the whole cache are not kept in memory
+    cache.put('texasfile', ['x' * 2000], name='huge')
+    assert cache.get('texasfile', name='huge') is None
+    assert cache.metrics()['entries'] == 3
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(disk_path=path, clock=clock)
+    cache.put('texasfile_document', {'id': 'D-1', 'images': []}, id='D-1')
+    cache.put('texasfile', [], name='gone')
+    cache.close()
+
+    clock.now += 20 * 60
+    restarted = ResponseCache(disk_path=path, clock=clock)
+    assert restarted.metrics()['disk']['entries'] == 1
+    assert restarted.get('texasfile_document', id='d-1') == {'id': 'D-1', 'images': []}
+    assert restarted.get('texasfile_document', id='D-1') is not None
+    assert restarted.metrics()['by_source']['texasfile_document'] == \
+        {'hits': 1, 'disk_hits': 1, 'misses': 0}
+
+    restarted.clear()
+    assert restarted.get('texasfile_document', id='D-1') is None
+    assert restarted.metrics()['disk']['entries'] == 0
+
+
+def test_scraper_searches_hit_cache():
+    pytest.importorskip('requests')
+    pytest.importorskip('bs4')
+    from clerk_scraper import BosqueClerkScraper
+
+    class Response:
+        status_code = 200
+        headers = {}
+        text = ('<div class="record-item" data-id="7"><span class="doc-type">Deed</span>'
+                '<span class="instrument">2024-1</span><span class="filed-date">2024-01-02</span>'
+                '<span class="grantor">Smith</span><span class="grantee">Jones</span>'
+                '<div class="legal-desc">Lot 1</div><span class="volume">9</span>'
+                '<span class="page">10</span></div>')
+
+    calls = []
+    scraper = BosqueClerkScraper(cache=ResponseCache())
+    scraper.session.get = lambda url, **kwargs: calls.append(url) or Response()
+
+    first = scraper.search_by_name('Smith', 'deed')
+    assert first[0]['instrument_number'] == '2024-1'
+    assert scraper.search_by_name(' smith ', 'DEED') == first
+
+    # TexasFile is answered from the cache; KoFile's empty (unparsed)
+    # results are not cached, so it is asked again
+    assert sorted('/search' in url for url in calls) == [False, False, True]
+    metrics = scraper.cache.metrics()
+    assert metrics['by_source']['texasfile']['hits'] == 1
+    assert metrics['by_source']['kofile']['misses'] == 2
+    assert metrics['entries'] == 1
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Clerk HTTP Client Tests
+Unit tests for rate limiting, retries, revalidation and request coalescing
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from clerk_http import ClerkHTTPClient, DeadlineExceeded, TokenBucket
+
+
+class StubPortal(BaseHTTPRequestHandler):
+    """
+    /flaky answers with the queued statuses before a 200, /etag supports
+    If-None-Match, /slow takes a moment; every request is logged
+    """
+
+    failures = []
+    hits = []
+    delay = 0.3
+
+    def do_GET(self):
+        StubPortal.hits.append((self.path, dict(self.headers)))
+        if self.path.startswith('/flaky') and StubPortal.failures:
+            status = StubPortal.failures.pop(0)
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+
+        if self.path.startswith('/etag') and self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        if self.path.startswith('/slow'):
+            time.sleep(StubPortal.delay)
+
+        body = f'page {self.path}'.encode()
+        self.send_response(200)
+        if self.path.startswith('/etag'):
+            self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def portal():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPortal)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubPortal.failures = []
+    StubPortal.hits = []
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2.0, burst=2, clock=lambda: now[0], sleep=sleep)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.5, 0.5]
+    now[0] += 10  # Idle time refills only up to the burst
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.5]
+    assert waits == [0.5, 0.5, 0.5]
+
+
+def test_retries_429_and_5xx_with_backoff(portal):
+    delays = []
+    client = ClerkHTTPClient(default_rate=(1000.0, 10), backoff=0.25, sleep=delays.append)
+
+    StubPortal.failures = [503, 429, 502]
+    response = client.get(f'{portal}/flaky', params={'name': 'smith'})
+    assert response.status_code == 200
+    assert response.text == 'page /flaky?name=smith'
+    assert delays == [0.25, 0.5, 1.0]
+
+    StubPortal.failures = [500] * 5
+    assert client.get(f'{portal}/flaky').status_code == 500
+    assert client.metrics()['retries'] == 6
+
+
+def test_connection_errors_are_retried_then_raised():
+    import requests
+
+    delays = []
+    client = ClerkHTTPClient(max_retries=2, backoff=0.1, sleep=delays.append)
+    with pytest.raises(requests.ConnectionError):
+        client.get('http://127.0.0.1:9/closed', timeout=1)
+    assert delays == [0.1, 0.2]
+
+
+def test_deadline_bounds_retries_and_slow_responses(portal):
+    delays = []
+    client = ClerkHTTPClient(default_rate=(1000.0, 10), backoff=0.25, sleep=delays.append)
+
+    # Retries stop once the next backoff would end past the deadline
+    StubPortal.failures = [503] * 5
+    response = client.get(f'{portal}/flaky', deadline=time.monotonic() + 0.6)
+    assert response.status_code == 503
+    assert delays == [0.25, 0.5]
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.get(f'{portal}/slow', deadline=started + 0.1)
+    assert time.monotonic() - started < 0.25
+
+
+def test_follower_outlives_leader_deadline(portal):
+    client = ClerkHTTPClient(default_rate=(1000.0, 10))
+    outcome = {}
+
+    def leader():
+        try:
+            client.get(f'{portal}/slow', deadline=time.monotonic() + 0.1)
+        except DeadlineExceeded as e:
+            outcome['leader'] = e
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    time.sleep(0.05)
+    follower = client.get(f'{portal}/slow')
+    thread.join()
+
+    assert isinstance(outcome['leader'], DeadlineExceeded)
+    assert follower.text == 'page /slow'
+
+
+def test_conditional_requests_reuse_stored_page(portal):
+    client = ClerkHTTPClient(default_rate=(1000.0, 10))
+    first = client.get(f'{portal}/etag/doc/7')
+    second = client.get(f'{portal}/etag/doc/7')
+
+    assert second.status_code == 200 and second.text == first.text == 'page /etag/doc/7'
+    assert 'If-None-Match' not in StubPortal.hits[0][1]
+    assert StubPortal.hits[1][1]['If-None-Match'] == '"v1"'
+    assert client.metrics()['not_modified'] == 1
+
+
+def test_identical_in_flight_requests_are_sent_once(portal):
+    client = ClerkHTTPClient(default_rate=(1000.0, 10))
+    responses = []
+
+    def fetch():
+        responses.append(client.get(f'{portal}/slow', params={'name': 'smith'}))
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(StubPortal.hits) == 1
+    assert [r.text for r in responses] == ['page /slow?name=smith'] * 5
+    assert client.metrics()['coalesced'] == 4
+
+    # Once finished, the same request goes to the portal again
+    client.get(f'{portal}/slow', params={'name': 'smith'})
+    assert len(StubPortal.hits) == 2
+
+
+def test_rate_limit_applies_per_host(portal):
+    client = ClerkHTTPClient(default_rate=(20.0, 1))
+    start = time.monotonic()
+    for page in range(4):
+        client.get(f'{portal}/page/{page}')
+    assert time.monotonic() - start >= 0.14
+    metrics = client.metrics()
+    assert metrics['requests'] == 4
+    assert metrics['throttled_seconds'] > 0
+    assert metrics['hosts'] == ['127.0.0.1']
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Clerk Index Tests
+Unit tests for the local clerk-records index and its incremental sync
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from clerk_index import ClerkIndex, ClerkSync, iso_date
+
+
+def record(number, filed, grantor='John Smith', grantee='Bosque Land LLC',
+           document_type='Deed', legal='Lot 4 Block 2 Meridian Original Town R10442',
+           volume='812', page='33'):
+    return {'id': f'TF-{number}', 'document_type': document_type, 'instrument_number': f'2024-{number}',
+            'filed_date': filed, 'grantor': grantor, 'grantee': grantee,
+            'legal_description': legal, 'volume': volume, 'page': page,
+            'source': 'TexasFile', 'county': 'Bosque'}
+
+
+@pytest.fixture
+def index():
+    index = ClerkIndex()
+    index.add_records([
+        record(1, '2024-01-05'),
+        record(2, '01/20/2024', grantor='Mary Jones', document_type='Deed of Trust',
+               legal='Abstract 17 Survey Clifton', volume='813', page='1'),
+        record(3, '2024-02-11', grantee='John Q. Smith Jr', document_type='Release'),
+        {'document_type': 'Deed'},  # Unparseable record without an id
+    ])
+    return index
+
+
+def test_name_and_type_searches(index):
+    assert [r['id'] for r in index.search_name('smith')] == ['TF-3', 'TF-1']
+    assert [r['id'] for r in index.search_name('SMITH  john', 'release')] == ['TF-3']
+    assert [r['id'] for r in index.search_name('jones', 'deed_of_trust')] == ['TF-2']
+    assert index.search_name('smith jones') == []
+    assert index.search_name('  ') == []
+
+
+def test_date_instrument_volume_and_legal_searches(index):
+    assert [r['id'] for r in index.search_date_range('2024-01-01', '2024-01-31')] == ['TF-2', 'TF-1']
+    assert index.search_date_range('2024-01-01', '2024-12-31', 'deed')[0]['id'] == 'TF-1'
+    with pytest.raises(ValueError):
+        index.search_date_range('last week', '2024-01-31')
+
+    assert index.search_instrument(' 2024-2 ')[0]['grantor'] == 'Mary Jones'
+    assert [r['id'] for r in index.search_volume_page('812', '33')] == ['TF-3', 'TF-1']
+    assert [r['id'] for r in index.search_legal('r10442')] == ['TF-3', 'TF-1']
+    assert [r['id'] for r in index.search_legal('clifton survey')] == ['TF-2']
+
+
+def test_updates_replace_records_and_tokens(index):
+    assert len(index) == 3
+    index.add_records([record(1, '2024-01-05', grantor='Ann Brown')])
+    assert len(index) == 3
+    assert [r['id'] for r in index.search_name('john smith')] == ['TF-3']
+    assert index.search_name('brown')[0]['grantor'] == 'Ann Brown'
+    assert iso_date('2/3/2024') == '2024-02-03' and iso_date('soon') == ''
+
+
+def test_sync_lease_is_exclusive(tmp_path):
+    path = str(tmp_path / 'index.db')
+    first, second = ClerkIndex(path), ClerkIndex(path)
+    assert first.claim_sync('texasfile', 60)
+    assert not second.claim_sync('texasfile', 60)
+    first.finish_sync('texasfile', '2024-03-01')
+    assert second.claim_sync('texasfile', 60)
+    assert second.watermark('texasfile') == '2024-03-01'
+
+
+class StubListing(BaseHTTPRequestHandler):
+    """TexasFile listing: records filed on/after filed_after, newest first, 2 per page"""
+
+    records = []
+    requests = []
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        StubListing.requests.append(query)
+        since = query.get('filed_after', '')
+        rows = sorted((r for r in StubListing.records if r['filed_date'] >= since),
+                      key=lambda r: r['filed_date'], reverse=True)
+        page = int(query.get('page', 1))
+        body = ''.join(
+            f'<div class="record-item" data-id="{r["id"]}"><span class="doc-type">{r["document_type"]}</span>'
+            f'<span class="instrument">{r["instrument_number"]}</span>'
+            f'<span class="filed-date">{r["filed_date"]}</span><span class="grantor">{r["grantor"]}</span>'
+            f'<span class="grantee">{r["grantee"]}</span><div class="legal-desc">{r["legal_description"]}</div>'
+            f'<span class="volume">{r["volume"]}</span><span class="page">{r["page"]}</span></div>'
+            for r in rows[(page - 1) * 2:page * 2])
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def test_incremental_sync_answers_searches_locally():
+    pytest.importorskip('requests')
+    pytest.importorskip('bs4')
+    from clerk_scraper import BosqueClerkScraper
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubListing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubListing.records = [record(n, f'2024-01-{n:02d}') for n in range(1, 6)]
+    StubListing.requests = []
+
+    index = ClerkIndex()
+    scraper = BosqueClerkScraper(index=index)
+    scraper.sources['texasfile'] = f'http://127.0.0.1:{server.server_address[1]}/texasfile'
+    try:
+        # Before the first sync, local searches have nothing to answer from,
+        # but malformed dates are still rejected
+        assert scraper.search_by_date_range('2024-01-01', '2024-01-31') == []
+        with pytest.raises(ValueError):
+            scraper.search_by_date_range('last week', '2024-01-31')
+
+        sync = ClerkSync(scraper, index)
+        summary = sync.run_once()
+        assert (summary['stored'], summary['watermark']) == (5, '2024-01-05')
+        assert 'filed_after' not in StubListing.requests[0]
+
+        StubListing.records.append(record(6, '2024-01-09', grantor='New Owner'))
+        StubListing.requests = []
+        summary = sync.run_once()
+        assert StubListing.requests[0]['filed_after'] == '2024-01-05'
+        assert (summary['fetched'], summary['watermark']) == (2, '2024-01-09')
+        assert len(index) == 6
+
+        assert [r['id'] for r in scraper.search_by_name('new owner')] == ['TF-6']
+        assert len(scraper.search_by_date_range('2024-01-02', '2024-01-04')) == 3
+        assert scraper.search_by_instrument('2024-3')[0]['id'] == 'TF-3'
+        assert len(scraper.search_by_property(property_id='R10442')) == 6
+    finally:
+        scraper.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_sync_resumes_after_page_limit():
+    pytest.importorskip('requests')
+    pytest.importorskip('bs4')
+    from clerk_scraper import BosqueClerkScraper
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubListing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StubListing.records = [record(n, f'2024-01-{n:02d}') for n in range(1, 6)]
+    StubListing.requests = []
+
+    index = ClerkIndex()
+    scraper = BosqueClerkScraper(index=index)
+    scraper.sources['texasfile'] = f'http://127.0.0.1:{server.server_address[1]}/texasfile'
+    sync = ClerkSync(scraper, index, page_limit=2)
+    try:
+        # The backfill stops at the page limit: no watermark, so searches
+        # are not answered from the partial index
+        summary = sync.run_once()
+        assert (summary['pages'], summary['stored'], summary['completed']) == (2, 4, False)
+        assert summary['watermark'] is None
+        assert index.sync_cursor('texasfile') == {'since': None, 'page': 3, 'newest': '2024-01-05',
+                                                  'started': date.today().isoformat()}
+
+        # The next run continues from page 3 and finishes the listing
+        StubListing.requests = []
+        summary = sync.run_once()
+        assert [q['page'] for q in StubListing.requests] == ['3', '4']
+        assert (summary['completed'], summary['watermark']) == (True, '2024-01-05')
+        assert len(index) == 5 and index.sync_cursor('texasfile') is None
+
+        # Incremental runs keep records whose filed date cannot be read
+        StubListing.records.append(record(7, 'pending', grantor='Late Filer'))
+        StubListing.records.append(record(6, '2024-01-08'))
+        sync.page_limit = 10
+        summary = sync.run_once()
+        assert summary['watermark'] == '2024-01-08'
+        assert [r['id'] for r in index.search_name('late filer')] == ['TF-7']
+    finally:
+        scraper.close()
+        server.shutdown()
+        server.server_close()
+
+
+class StubScraper:
+    """Serves listing pages from a list, optionally taking a while per page"""
+
+    def __init__(self, pages, delay=0.0, on_page=None):
+        self.pages = pages
+        self.delay = delay
+        self.on_page = on_page
+        self.calls = []
+
+    def _crawl_texasfile(self, since, page):
+        self.calls.append((since, page))
+        if self.on_page:
+            self.on_page(page)
+        time.sleep(self.delay)
+        return self.pages[page - 1] if page <= len(self.pages) else []
+
+
+def test_sync_without_readable_dates_sets_watermark():
+    index = ClerkIndex()
+    scraper = StubScraper([[record(1, 'pending'), record(2, '')]])
+    sync = ClerkSync(scraper, index)
+
+    summary = sync.run_once()
+    today = date.today().isoformat()
+    assert (summary['completed'], summary['stored'], summary['watermark']) == (True, 2, today)
+
+    # The next run is incremental instead of crawling the whole listing again
+    scraper.calls = []
+    sync.run_once()
+    assert scraper.calls[0] == (today, 1)
+
+
+def test_sync_lease_renewed_while_fetching(tmp_path):
+    path = str(tmp_path / 'index.db')
+    other = ClerkIndex(path)
+    claims = []
+
+    def other_worker_claims(page):
+        if page > 1:
+            claims.append(other.claim_sync('texasfile', 60))
+
+    pages = [[record(n, f'2024-01-{n:02d}')] for n in range(5, 0, -1)]
+    scraper = StubScraper(pages, delay=0.15, on_page=other_worker_claims)
+    sync = ClerkSync(scraper, ClerkIndex(path), lease=0.2)
+
+    # The run outlasts its lease several times over, but never loses it
+    assert sync.run_once()['completed']
+    assert claims == [False] * 5
+    assert other.claim_sync('texasfile', 60)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Clerk Parser Tests
+Unit tests for the lxml and html.parser clerk page parsers
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+pytest.importorskip('bs4')
+
+import clerk_parser
+from benchmark_parser import FIXTURES, legacy_records
+from clerk_parser import ClerkPageParser
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture(params=['lxml', 'html.parser'])
+def parser(request):
+    if request.param == 'lxml' and clerk_parser.etree is None:
+        pytest.skip('lxml not installed')
+    return ClerkPageParser(request.param)
+
+
+def test_records_match_original_parser(parser):
+    html = fixture('texasfile_search.html')
+    records = parser.records(html)
+    assert len(records) == 100
+    assert records == legacy_records(html)
+
+
+def test_record_fields_in_any_markup(parser):
+    html = ('<div class="record-item" data-id="A"><p><span class="grantor"> Smith &amp; Sons\n</span>'
+            '<span class="grantor">Second</span></p><span class="legal-desc">not a div</span>'
+            '<div class="legal-desc x">Lot <b>4</b></div></div>'
+            '<div class="record-item"></div><span class="grantor">Outside</span>')
+    assert parser.records(html) == [
+        {'data-id': 'A', 'grantor': 'Smith & Sons', 'legal-desc': 'Lot 4'},
+        {'data-id': ''},
+    ]
+    assert parser.records('') == [] and parser.records('<p>No results</p>') == []
+
+
+def test_document_page(parser):
+    document = parser.document(fixture('texasfile_document.html'))
+    assert document['full_text'].startswith('KNOW ALL MEN BY THESE PRESENTS')
+    assert document['images'] == [f'/images/2019-04412/{i}.png' for i in range(1, 5)]
+    assert document['metadata']['instrument_number'] == '2019-04412'
+    assert document['metadata']['consideration'] == '$10.00 and OVC'
+    assert len(document['metadata']) == 10
+    assert parser.document(fixture('texasfile_search.html')) == {}
+
+
+def test_backends_agree_on_documents():
+    if clerk_parser.etree is None:
+        pytest.skip('lxml not installed')
+    html = fixture('texasfile_document.html')
+    assert ClerkPageParser('lxml').document(html) == ClerkPageParser('html.parser').document(html)
+
+
+def test_xhtml_encoding_declaration(parser):
+    declaration = '<?xml version="1.0" encoding="utf-8"?>\n'
+    search = fixture('texasfile_search.html')
+    document = fixture('texasfile_document.html')
+
+    assert parser.records(declaration + search) == legacy_records(search)
+    assert parser.document(declaration + document) == parser.document(document)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        ClerkPageParser('html5lib')
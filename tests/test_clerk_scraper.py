@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Clerk Scraper Tests
+Concurrent multi-source searches against a local stub portal
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from clerk_cache import ResponseCache
+from clerk_scraper import BosqueClerkScraper
+
+
+RECORD = ('<div class="record-item" data-id="{id}"><span class="doc-type">Deed</span>'
+          '<span class="instrument">{id}</span><span class="filed-date">2024-01-02</span>'
+          '<span class="grantor">Smith</span><span class="grantee">Jones</span>'
+          '<div class="legal-desc">Lot 1</div><span class="volume">9</span>'
+          '<span class="page">10</span></div>')
+
+
+class StubPortal(BaseHTTPRequestHandler):
+    """TexasFile search at /texasfile/search, KoFile at /kofile/; delays set per path"""
+
+    delays = {}
+    requests = []
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        StubPortal.requests.append(path)
+        time.sleep(StubPortal.delays.get(path, 0))
+        body = RECORD.format(id='TF-1') if path.startswith('/texasfile') else '<html></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def portal():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPortal)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubPortal.delays = {}
+    StubPortal.requests = []
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraper(portal):
+    scraper = BosqueClerkScraper(cache=ResponseCache(), deadline=2.0)
+    scraper.sources.update(texasfile=f'{portal}/texasfile', kofile=f'{portal}/kofile/')
+    yield scraper
+    scraper.close()
+
+
+def test_sources_queried_concurrently(scraper):
+    StubPortal.delays = {'/texasfile/search': 0.5, '/kofile/': 0.5}
+    started = time.monotonic()
+    results = scraper.search_by_name('Smith', 'deed')
+    elapsed = time.monotonic() - started
+
+    assert [record['instrument_number'] for record in results] == ['TF-1']
+    assert results.timed_out == []
+    assert elapsed < 0.9
+    assert sorted(StubPortal.requests) == ['/kofile/', '/texasfile/search']
+
+
+def test_slow_source_gives_partial_results(scraper):
+    StubPortal.delays = {'/texasfile/search': 1.5}
+    started = time.monotonic()
+    results = scraper.search_by_name('Smith', deadline=0.5)
+
+    assert time.monotonic() - started < 1.2
+    assert results == []
+    assert results.timed_out == ['texasfile']
+
+    # The abandoned request is not cached; the next search asks again
+    StubPortal.delays = {}
+    complete = scraper.search_by_name('smith')
+    assert complete.timed_out == []
+    assert [record['id'] for record in complete] == ['TF-1']
+
+
+def test_timed_out_searches_release_their_threads(portal):
+    scraper = BosqueClerkScraper(cache=ResponseCache(), max_workers=2, deadline=0.5)
+    scraper.sources.update(texasfile=f'{portal}/texasfile', kofile=f'{portal}/kofile/')
+    try:
+        # Both sources hang well past the deadline (and would be retried)
+        StubPortal.delays = {'/texasfile/search': 3, '/kofile/': 3}
+        stalled = scraper.search_by_name('Smith')
+        assert stalled == [] and stalled.timed_out
+
+        # Healthy sources answer the next search; the stragglers gave up
+        # at the deadline instead of holding both search threads
+        StubPortal.delays = {}
+        started = time.monotonic()
+        results = scraper.search_by_name('Jones', deadline=1.0)
+        assert results.timed_out == []
+        assert [record['id'] for record in results] == ['TF-1']
+        assert time.monotonic() - started < 0.5
+    finally:
+        scraper.close()
+
+
+def test_queries_not_started_by_deadline_are_cancelled(portal):
+    scraper = BosqueClerkScraper(cache=ResponseCache(), max_workers=1, deadline=0.3)
+    scraper.sources.update(texasfile=f'{portal}/texasfile', kofile=f'{portal}/kofile/')
+    try:
+        StubPortal.delays = {'/texasfile/search': 1}
+        results = scraper.search_by_name('Smith')
+        assert results.timed_out == ['texasfile', 'kofile']
+
+        # Without cancelling, KoFile would be sent once TexasFile ends (1s)
+        time.sleep(1.2)
+        assert StubPortal.requests == ['/texasfile/search']
+    finally:
+        scraper.close()
+
+
+def test_property_search_combines_queries(scraper):
+    results = scraper.search_by_property(property_id='R123', address='1 Main St')
+    assert results == [] and results.timed_out == []
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Geodesy Tests
+Unit tests for scalar and batched haversine distances
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geodesy
+from geodesy import haversine
+from gps_utils import GPSManager
+from afz_classifier import calculate_distance
+
+
+MERIDIAN = (31.8749, -97.6428)
+WACO = (31.5493, -97.1467)
+POINTS = [MERIDIAN, WACO, (31.0156, -103.4918), (29.7234, -95.2145)]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Run batched tests against NumPy (when installed) and pure Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(geodesy, 'np', None)
+    return request.param
+
+
+def test_single_radius_everywhere():
+    """GPSManager and the AFZ helper agree exactly"""
+    gps = GPSManager().calculate_distance(*MERIDIAN, *WACO)
+    afz = calculate_distance(*MERIDIAN, *WACO)
+    assert gps == afz == haversine(*MERIDIAN, *WACO)
+    assert 30 < gps < 40
+
+
+def test_batched_matches_scalar(backend):
+    """Pairs, one-to-many and chunked matrix equal the scalar formula"""
+    lats = [p[0] for p in POINTS]
+    lons = [p[1] for p in POINTS]
+
+    pairs = geodesy.haversine_pairs(lats, lons, lats[::-1], lons[::-1])
+    for i, d in enumerate(pairs):
+        assert d == pytest.approx(haversine(lats[i], lons[i], lats[-1 - i], lons[-1 - i]))
+
+    many = geodesy.distances_from(*MERIDIAN, lats, lons)
+    assert [round(d, 6) for d in many] == [round(haversine(*MERIDIAN, *p), 6) for p in POINTS]
+
+    matrix = geodesy.distance_matrix(lats, lons, lats[:3], lons[:3], chunk_rows=3)
+    for i, origin in enumerate(POINTS):
+        for j, target in enumerate(POINTS[:3]):
+            assert matrix[i][j] == pytest.approx(haversine(*origin, *target))
+
+    nearest = geodesy.nearest_distances(lats, lons, lats[1:2], lons[1:2], chunk_rows=2)
+    assert list(nearest) == pytest.approx([haversine(*p, *WACO) for p in POINTS])
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Grid Infrastructure Tests
+Unit tests for substation/transmission distances and their use in AFZ scoring
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import json
+import random
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import afz_classifier
+import afz_rules
+import geodesy
+import infrastructure
+import parcel_store
+import spatial_index
+from afz_classifier import AFZClassifier
+from benchmark_afz import synthetic_roll
+from geodesy import haversine, point_segment_distance
+from infrastructure import InfrastructureError, InfrastructureLayer, read_geometry
+from spatial_index import SegmentGrid
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Run against NumPy (when installed) and pure Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        for module in (afz_classifier, afz_rules, geodesy, infrastructure, parcel_store,
+                       spatial_index):
+            monkeypatch.setattr(module, 'np', None)
+    return request.param
+
+
+def random_lines(rng, count, vertices=4):
+    lines = []
+    for _ in range(count):
+        lat, lon = rng.uniform(26, 36), rng.uniform(-106, -94)
+        line = [(lat, lon)]
+        for _ in range(vertices - 1):
+            lat, lon = lat + rng.uniform(-0.4, 0.4), lon + rng.uniform(-0.4, 0.4)
+            line.append((lat, lon))
+        lines.append(line)
+    return lines
+
+
+def brute_force(lines, lat, lon):
+    return min(point_segment_distance(lat, lon, *a, *b) if len(line) > 1 else haversine(lat, lon, *a)
+               for line in lines for a, b in (zip(line, line[1:]) if len(line) > 1 else [(line[0], line[0])]))
+
+
+def test_point_segment_distance():
+    # Perpendicular foot inside the segment, and clamped to either end
+    assert point_segment_distance(31.0, -97.5, 30.0, -98.0, 30.0, -97.0) == \
+        pytest.approx(haversine(31.0, -97.5, 30.0, -97.5), rel=1e-3)
+    assert point_segment_distance(30.0, -99.0, 30.0, -98.0, 30.0, -97.0) == \
+        pytest.approx(haversine(30.0, -99.0, 30.0, -98.0))
+    assert point_segment_distance(30.0, -97.0, 30.0, -97.0, 30.0, -97.0) == 0.0
+
+
+def test_segment_grid_matches_brute_force(backend):
+    rng = random.Random(3)
+    lines = random_lines(rng, 40) + [[(rng.uniform(26, 36), rng.uniform(-106, -94))] for _ in range(20)]
+    grid = SegmentGrid(cell_degrees=0.25)
+    for line in lines:
+        grid.add_line(line)
+
+    points = [(rng.uniform(25, 37), rng.uniform(-107, -93)) for _ in range(400)]
+    found = list(grid.nearest_distances([p[0] for p in points], [p[1] for p in points]))
+    for (lat, lon), distance in zip(points, found):
+        assert distance == pytest.approx(brute_force(lines, lat, lon), abs=1e-9)
+
+
+def test_empty_layers_keep_input_distances(backend):
+    layer = InfrastructureLayer()
+    assert layer.distances([31.0], [-97.0]) == (None, None)
+    layer.add_substation(31.0, -97.0)
+    substation, transmission = layer.nearest(31.0, -97.0)
+    assert substation == 0.0 and transmission is None
+
+
+def test_distances_are_cached_per_coordinate(backend):
+    layer = InfrastructureLayer(cache_limit=3)
+    layer.add_line([(31.0, -98.0), (31.0, -97.0)])
+    layer.add_substation(31.5, -97.5)
+
+    first = layer.distances([31.2, 31.2, 31.3], [-97.5, -97.5, -97.5])
+    assert (layer.cache_misses, layer.cache_hits) == (2, 1)
+    assert layer.distances([31.3, 31.2], [-97.5, -97.5]) == (
+        [first[0][2], first[0][0]], [first[1][2], first[1][0]])
+    assert (layer.cache_misses, layer.cache_hits) == (2, 3)
+
+    # The oldest coordinates are dropped past cache_limit
+    layer.distances([30.0, 30.1], [-97.0, -97.0])
+    assert len(layer._cache) == 3 and (31.2, -97.5) not in layer._cache
+
+    # New geometry invalidates cached distances
+    layer.add_substation(31.3, -97.5)
+    assert layer.nearest(31.3, -97.5)[0] == 0.0
+
+
+def test_loads_geojson_and_csv(tmp_path):
+    geojson = tmp_path / 'lines.geojson'
+    geojson.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'kv': 345},
+         'geometry': {'type': 'LineString', 'coordinates': [[-98.0, 31.0], [-97.0, 31.0]]}},
+        {'type': 'Feature', 'properties': {},
+         'geometry': {'type': 'MultiLineString',
+                      'coordinates': [[[-99.0, 30.0], [-99.0, 30.5]], [[-96.0, 32.0], [-96.5, 32.0]]]}},
+    ]}))
+    csv_lines = tmp_path / 'lines.csv'
+    csv_lines.write_text('id,WKT\n1,"LINESTRING (-98 31, -97 31)"\n'
+                         '2,"MULTILINESTRING ((-99 30, -99 30.5), (-96 32, -96.5 32))"\n')
+    csv_points = tmp_path / 'substations.csv'
+    csv_points.write_text('name,Latitude,Longitude\nMeridian,31.92,-97.65\nClifton,31.78,-97.58\n')
+
+    assert list(read_geometry(geojson)) == list(read_geometry(csv_lines)) == [
+        [(31.0, -98.0), (31.0, -97.0)], [(30.0, -99.0), (30.5, -99.0)], [(32.0, -96.0), (32.0, -96.5)]]
+
+    layer = InfrastructureLayer.load(csv_points, geojson)
+    assert len(layer.substations) == 2 and len(layer.transmission) == 3
+    substation, transmission = layer.nearest(31.92, -97.65)
+    assert substation == 0.0
+    assert transmission == pytest.approx(haversine(31.92, -97.65, 31.0, -97.65), rel=1e-3)
+
+
+@pytest.mark.parametrize('name, content', [
+    ('bad.csv', 'name,kv\nA,345\n'),
+    ('bad.geojson', '{"type": "FeatureCollection", "features": [{"geometry": {"type": "Polygon"}}]}'),
+    ('bad.geojson', '{"type": "FeatureCollection", "features": [{'),
+    ('bad.shp', ''),
+])
+def test_unreadable_files_rejected(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    with pytest.raises(InfrastructureError):
+        InfrastructureLayer.load(transmission=path)
+
+
+def test_classifier_measures_grid_access(backend):
+    rng = random.Random(11)
+    layer = InfrastructureLayer()
+    for line in random_lines(rng, 30):
+        layer.add_line(line)
+    for _ in range(25):
+        layer.add_substation(rng.uniform(26, 36), rng.uniform(-106, -94))
+
+    columns = synthetic_roll(1200, seed=5)
+    batch = AFZClassifier(infrastructure=layer)
+    batch.classify_many(columns)
+
+    scalar = AFZClassifier(infrastructure=layer)
+    names = list(columns)
+    for values in zip(*columns.values()):
+        scalar.classify_parcel(**dict(zip(names, values)))
+
+    parcels = list(batch.parcels)
+    assert parcels == list(scalar.parcels)
+    substation, transmission = layer.distances([p.latitude for p in parcels],
+                                               [p.longitude for p in parcels])
+    for parcel, to_substation, to_line in zip(parcels, substation, transmission):
+        assert parcel.nearest_substation_miles == to_substation
+        assert parcel.nearest_transmission_miles == to_line
+        assert parcel.has_grid_access == (min(to_substation, to_line) <= 5.0)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Parcel Source Tests
+Unit tests for streaming parcel readers and the AFZ generation pipeline
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import io
+import json
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from afz_classifier import AFZClassifier
+from afz_rules import load_rule_sets
+from generate_afz_data import generate_afz_database
+from parcel_sources import ParcelSourceError, read_parcels
+from record_sources import iter_geojson_features
+
+
+TEXAS_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'data', 'sources',
+                            'texas_afz_parcels.jsonl')
+
+
+def test_csv_and_shapefile_csv(tmp_path):
+    """Plain and ogr2ogr-style CSV rows become typed classify_parcel arguments"""
+    plain = tmp_path / 'parcels.csv'
+    plain.write_text(
+        'parcel_id,name,county,state,lat,lon,acres,is_brownfield,avg_rainfall,elevation\n'
+        'P1,One,Bosque,TX,31.9,-97.6,500,false,12.0,800\n'
+        'P2,Two,Bosque,TX,31.8,-97.5,,yes,30,750\n'
+    )
+    records = list(read_parcels(plain))
+    assert records[0] == (1, {
+        'parcel_id': 'P1', 'name': 'One', 'county': 'Bosque', 'state': 'TX',
+        'lat': 31.9, 'lon': -97.6, 'acres': 500, 'is_brownfield': False,
+        'avg_rainfall': 12.0, 'elevation': 800})
+    assert type(records[0][1]['acres']) is int
+    assert isinstance(records[1][1], ParcelSourceError)
+    assert 'acres' in str(records[1][1])
+
+    shapefile = tmp_path / 'bosque_roll.csv'
+    shapefile.write_text(
+        'WKT,PROP_ID,CNTY_NM,STATE,GIS_ACRES,SOIL_QUAL,SUBST_MI\n'
+        '"POLYGON ((-97.7 31.8,-97.6 31.8,-97.6 31.9,-97.7 31.9,-97.7 31.8))",'
+        '12345,Bosque,TX,160.5,marginal,0.8\n'
+        '"POINT (-97.65 31.85)",12346,Bosque,TX,40,moderate,6\n'
+    )
+    (_, polygon), (_, point) = read_parcels(shapefile)
+    assert polygon['parcel_id'] == polygon['name'] == '12345'
+    assert polygon['lon'] == pytest.approx(-97.65)
+    assert polygon['lat'] == pytest.approx(31.85)
+    assert polygon['nearest_substation'] == 0.8
+    assert (point['lon'], point['lat']) == (-97.65, 31.85)
+
+
+def test_jsonl_and_geojson(tmp_path):
+    """JSON-lines and GeoJSON readers report bad records and carry on"""
+    jsonl = tmp_path / 'parcels.jsonl'
+    jsonl.write_text(
+        '{"parcel_id": "P1", "name": "One", "county": "Pecos", "state": "TX",'
+        ' "lat": 31.0, "lon": -103.5, "acres": 1200}\n'
+        '{not json\n'
+    )
+    records = list(read_parcels(jsonl))
+    assert records[0][1]['acres'] == 1200
+    assert isinstance(records[1][1], ParcelSourceError)
+
+    geojson = tmp_path / 'parcels.geojson'
+    geojson.write_text(json.dumps({
+        'type': 'FeatureCollection',
+        'metadata': {'note': 'features are streamed'},
+        'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [-103.5, 31.0]},
+             'properties': {'id': 'G1', 'name': 'Desert', 'county': 'Pecos', 'state': 'TX',
+                            'acres': 900, 'avg_rainfall': 11.5}},
+            {'type': 'Feature', 'geometry': {'type': 'LineString', 'coordinates': []},
+             'properties': {}},
+        ]
+    }))
+    (_, first), (_, second) = read_parcels(geojson)
+    assert first['parcel_id'] == 'G1'
+    assert (first['lat'], first['lon']) == (31.0, -103.5)
+    assert isinstance(second, ParcelSourceError)
+
+
+def test_geojson_features_streamed_across_reads():
+    """Features split over many small reads decode the same as json.load"""
+    collection = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'n': i, 'text': 'x' * i}} for i in range(50)
+    ]}
+    text = json.dumps(collection, indent=2)
+
+    features = list(iter_geojson_features(io.StringIO(text), chunk_size=7))
+    assert features == collection['features']
+
+
+def test_pipeline_matches_in_memory_export(tmp_path):
+    """Chunked streaming output is identical to classifying everything at once"""
+    records = [record for _, record in read_parcels(TEXAS_SOURCE)]
+    classifier = AFZClassifier()
+    for record in records:
+        classifier.classify_parcel(**record)
+    classifier.export_to_json(str(tmp_path / 'expected.json'), min_score=60)
+    classifier.export_to_geojson(str(tmp_path / 'expected.geojson'), min_score=60)
+
+    result = generate_afz_database([TEXAS_SOURCE], tmp_path / 'out', min_score=60, chunk_rows=4)
+
+    assert result['statistics'] == classifier.get_statistics()
+    assert result['skipped'] == []
+    for name in ('json', 'geojson'):
+        with open(tmp_path / f'expected.{name}', 'rb') as expected, \
+                open(tmp_path / 'out' / f'afz_parcels.{name}', 'rb') as actual:
+            assert actual.read() == expected.read()
+
+
+def test_parallel_generation_is_byte_identical(tmp_path):
+    """County shards classified in worker processes give the serial output"""
+    rules = load_rule_sets()['grid_first']
+    outputs = []
+    for workers in (1, 3):
+        out = tmp_path / f'workers-{workers}'
+        result = generate_afz_database([TEXAS_SOURCE], out, chunk_rows=7, rules=rules,
+                                       workers=workers)
+        outputs.append((result['statistics'],
+                        [(out / f'afz_parcels.{name}').read_bytes() for name in ('json', 'geojson')]))
+    assert outputs[0] == outputs[1]
+
+    classifier = AFZClassifier(rules)
+    for _, record in read_parcels(TEXAS_SOURCE):
+        classifier.classify_parcel(**record)
+    assert json.dumps(outputs[0][0]) == json.dumps(classifier.get_statistics())
+
+    with pytest.raises(ValueError):
+        generate_afz_database([TEXAS_SOURCE], tmp_path / 'none', workers=0)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Parcel Store Tests
+Unit tests for columnar AFZ parcel storage
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import random
+from dataclasses import asdict
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import parcel_store
+from afz_classifier import AFZClassifier, AFZParcel
+
+
+COUNTIES = ['Bosque', 'Pecos', 'Harris', 'El Paso', 'Deaf Smith']
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    """Run filter tests against NumPy (when installed) and pure Python"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(parcel_store, 'np', None)
+    return request.param
+
+
+def build_classifier(count=500, seed=11):
+    """Classifier plus the AFZParcel objects classify_parcel returned"""
+    rng = random.Random(seed)
+    classifier = AFZClassifier()
+    returned = []
+    for i in range(count):
+        returned.append(classifier.classify_parcel(
+            parcel_id=f'AFZ-TX-{i:05d}',
+            name=f'Parcel {i}',
+            county=rng.choice(COUNTIES),
+            state='TX',
+            lat=rng.uniform(26, 36),
+            lon=rng.uniform(-106, -94),
+            acres=rng.choice([rng.randint(10, 5000), rng.uniform(10, 5000)]),
+            soil_quality=rng.choice(['marginal', 'moderate', 'prime']),
+            is_brownfield=rng.random() < 0.2,
+            avg_rainfall=rng.choice([12, 30.0, rng.uniform(8, 50)]),
+            nearest_substation=rng.uniform(0, 15),
+            nearest_transmission=rng.uniform(0, 15),
+            current_use=rng.choice(['vacant', 'grazing', 'industrial']),
+            elevation=rng.randint(0, 4000),
+            notes='' if i % 3 else 'Rocky terrain'
+        ))
+    return classifier, returned
+
+
+def test_parcels_round_trip_exactly():
+    """Materialized parcels equal the originals, int/float types included"""
+    classifier, returned = build_classifier()
+
+    assert len(classifier.parcels) == len(returned)
+    for stored, original in zip(classifier.parcels, returned):
+        assert stored == original
+        assert asdict(stored) == asdict(original)
+        assert type(stored.acres) is type(original.acres)
+        assert type(stored.avg_rainfall_inches) is type(original.avg_rainfall_inches)
+
+    assert classifier.parcels[-1] == returned[-1]
+    assert classifier.parcels[10:13] == returned[10:13]
+    with pytest.raises(IndexError):
+        classifier.parcels[len(returned)]
+
+
+def test_filters_match_list_scan(backend):
+    """Vectorized masks select exactly what a loop over the parcels would"""
+    classifier, returned = build_classifier()
+
+    for min_score in (0, 30, 60, 90):
+        assert classifier.get_eligible_parcels(min_score) == \
+            [p for p in returned if p.score >= min_score]
+
+    for criterion in parcel_store.CRITERIA + ('Not A Criterion',):
+        assert classifier.filter_by_criteria(criterion) == \
+            [p for p in returned if criterion in p.afz_criteria]
+
+    for county in ('bosque', 'DEAF SMITH', 'Travis'):
+        assert classifier.filter_by_county(county) == \
+            [p for p in returned if p.county.lower() == county.lower()]
+
+
+def test_criteria_order_preserved():
+    """Criteria decode in classify_parcel order whichever is seen first"""
+    classifier = AFZClassifier()
+    classifier.classify_parcel('P1', 'Arid only', 'Pecos', 'TX', 31.0, -103.5, 100,
+                               avg_rainfall=10)
+    both = classifier.classify_parcel('P2', 'Both', 'Pecos', 'TX', 31.0, -103.5, 100,
+                                      soil_quality='marginal', avg_rainfall=10)
+
+    assert classifier.parcels[1].afz_criteria == both.afz_criteria == \
+        ['Marginal Land', 'Arid Region']
+
+
+def test_bad_value_leaves_store_aligned():
+    """A parcel that cannot be stored is rejected without partial writes"""
+    store = parcel_store.ParcelStore(AFZParcel)
+    classifier, returned = build_classifier(count=2)
+    store.append(returned[0])
+
+    bad = AFZParcel(**dict(asdict(returned[1]), elevation_ft='high'))
+    with pytest.raises(ValueError):
+        store.append(bad)
+
+    assert len(store) == 1
+    assert all(len(column) == 1 for column in store.columns.values())
+    assert all(len(column) == 1 for column in store.codes.values())
+    assert store[0] == returned[0]
@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Site Manager Tests
+Unit tests for site database storage
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import json
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from site_manager import SiteManager, migrate_to_sqlite
+
+
+def make_site(name, site_type='solar', acres=100):
+    """Build a minimal site record"""
+    return {
+        'name': name,
+        'site_type': site_type,
+        'acres': acres,
+        'location_context': {'territory': 'Bosque County (Oncor Territory)'},
+        'notes': f'{name} field notes'
+    }
+
+
+def test_journal_write_and_replay(tmp_path):
+    """Writes land in the journal and are replayed on load"""
+    manager = SiteManager(str(tmp_path))
+    site_id = manager.add_site(make_site('Meridian Ridge'))
+
+    manager.update_site(site_id, {'acres': 250})
+
+    # Snapshot untouched, journal holds two operations
+    with open(manager.db_file) as f:
+        assert json.load(f)['sites'] == []
+    assert manager.store.count_journal_entries() == 2
+
+    reopened = SiteManager(str(tmp_path))
+    site = reopened.get_site(site_id)
+    assert site['acres'] == 250
+    assert site['name'] == 'Meridian Ridge'
+
+    assert reopened.delete_site(site_id)
+    assert reopened.get_site(site_id) is None
+    assert not reopened.delete_site(site_id)
+
+
+def test_compaction_folds_journal(tmp_path):
+    """Compaction rewrites the snapshot and empties the journal"""
+    manager = SiteManager(str(tmp_path))
+    site_id = manager.add_site(make_site('Clifton Flats'))
+    manager.update_site(site_id, {'notes': 'revisited'})
+
+    manager.compact()
+
+    assert manager.store.count_journal_entries() == 0
+    with open(manager.db_file) as f:
+        sites = json.load(f)['sites']
+    assert len(sites) == 1
+    assert sites[0]['notes'] == 'revisited'
+
+
+def test_save_interrupted_before_journal_reset(tmp_path):
+    """A snapshot swapped in without resetting the journal is not replayed twice"""
+    SiteManager.clear_cache()
+    manager = SiteManager(str(tmp_path))
+    first = manager.add_site(make_site('Kopperl Bend'))
+    manager.add_site(make_site('Morgan Mill'))
+    manager.update_site(first, {'acres': 320})
+
+    # Crash between os.replace of the snapshot and the journal reset
+    with open(manager.store.journal_file) as f:
+        journal = f.read()
+    manager.compact()
+    with open(manager.store.journal_file, 'w') as f:
+        f.write(journal)
+
+    SiteManager.clear_cache()
+    reopened = SiteManager(str(tmp_path))
+    sites = reopened.list_sites()
+    assert sorted(site['name'] for site in sites) == ['Kopperl Bend', 'Morgan Mill']
+    assert reopened.get_site(first)['acres'] == 320
+    assert reopened.store.count_journal_entries() == 0
+
+    # Writes after recovery are replayed normally
+    third = reopened.add_site(make_site('Valley Mills'))
+    SiteManager.clear_cache()
+    assert len(SiteManager(str(tmp_path)).list_sites()) == 3
+    assert SiteManager(str(tmp_path)).get_site(third)['name'] == 'Valley Mills'
+
+
+def test_replayed_add_is_idempotent(tmp_path):
+    """An add already in the snapshot (pre-generation journal) is not duplicated"""
+    SiteManager.clear_cache()
+    manager = SiteManager(str(tmp_path))
+    site_id = manager.add_site(make_site('Laguna Park'))
+    with open(manager.store.journal_file) as f:
+        add = [line for line in f if '"add"' in line]
+    manager.compact()
+
+    # Legacy journal without a begin record, still holding the folded add
+    with open(manager.store.journal_file, 'w') as f:
+        f.writelines(add)
+
+    SiteManager.clear_cache()
+    sites = SiteManager(str(tmp_path)).list_sites()
+    assert [site['site_id'] for site in sites] == [site_id]
+
+
+def test_torn_journal_entry_is_skipped(tmp_path):
+    """A partially written trailing entry does not break loading"""
+    manager = SiteManager(str(tmp_path))
+    site_id = manager.add_site(make_site('Walnut Springs'))
+
+    with open(manager.store.journal_file, 'a') as f:
+        f.write('{"op": "delete", "site_id"')
+
+    assert SiteManager(str(tmp_path)).get_site(site_id) is not None
+
+
+def test_legacy_database_is_loaded(tmp_path):
+    """An existing full-file JSON database is read as the snapshot"""
+    legacy = {
+        'metadata': {'created': '2024-01-01T00:00:00', 'version': '1.0'},
+        'sites': [dict(make_site('Legacy Tract'), site_id='HH-20240101-000000',
+                       created='2024-01-01T00:00:00')]
+    }
+    with open(tmp_path / 'hh_holdings_sites.json', 'w') as f:
+        json.dump(legacy, f)
+
+    manager = SiteManager(str(tmp_path))
+    assert manager.get_site('HH-20240101-000000')['name'] == 'Legacy Tract'
+    assert manager.update_site('HH-20240101-000000', {'acres': 40})
+    assert SiteManager(str(tmp_path)).get_site('HH-20240101-000000')['acres'] == 40
+
+
+def test_cache_serves_repeated_reads(tmp_path):
+    """Repeated reads hit the cache; own writes keep it warm"""
+    SiteManager.clear_cache()
+    manager = SiteManager(str(tmp_path))
+    site_id = manager.add_site(make_site('Iredell Bluff'))
+
+    manager.list_sites()
+    misses = SiteManager.cache_stats()['misses']
+
+    manager.get_site(site_id)
+    manager.search_sites('iredell')
+    manager.get_statistics()
+    manager.update_site(site_id, {'acres': 80})
+
+    stats = SiteManager.cache_stats()
+    assert stats['misses'] == misses
+    assert stats['hits'] >= 4
+    assert manager.get_site(site_id)['acres'] == 80
+
+
+def test_cache_invalidated_by_external_write(tmp_path):
+    """A change made by another process forces a re-parse"""
+    SiteManager.clear_cache()
+    manager = SiteManager(str(tmp_path))
+    site_id = manager.add_site(make_site('Cranfills Gap'))
+    manager.get_site(site_id)
+    misses = SiteManager.cache_stats()['misses']
+
+    # Simulate another process appending to the journal
+    with open(manager.store.journal_file, 'a') as f:
+        f.write(json.dumps({'op': 'update', 'site_id': site_id,
+                            'updates': {'notes': 'edited elsewhere'}}) + '\n')
+
+    assert manager.get_site(site_id)['notes'] == 'edited elsewhere'
+    assert SiteManager.cache_stats()['misses'] == misses + 1
+
+
+def test_cached_site_not_aliased_to_caller(tmp_path):
+    """Mutating the dict passed to add_site does not leak into the cache"""
+    manager = SiteManager(str(tmp_path))
+    manager.list_sites()
+
+    site = make_site('Morgan Mill')
+    site_id = manager.add_site(site)
+    site['name'] = 'changed after save'
+
+    assert manager.get_site(site_id)['name'] == 'Morgan Mill'
+
+
+def write_legacy_database(tmp_path, sites):
+    """Write a full-file JSON database as produced by older versions"""
+    legacy = {'metadata': {'created': '2024-01-01T00:00:00', 'version': '1.0'}, 'sites': sites}
+    with open(tmp_path / 'hh_holdings_sites.json', 'w') as f:
+        json.dump(legacy, f)
+
+
+def test_indexes_follow_writes(tmp_path):
+    """ID, type and creation-date indexes stay current across writes"""
+    write_legacy_database(tmp_path, [
+        dict(make_site('Solar A', 'solar'), site_id='A', created='2025-01-01T00:00:00'),
+        dict(make_site('DC', 'datacenter'), site_id='D', created='2025-01-02T00:00:00'),
+        dict(make_site('Solar B', 'solar'), site_id='B', created='2025-01-03T00:00:00'),
+    ])
+    manager = SiteManager(str(tmp_path))
+    solar_b, dc = 'B', 'D'
+
+    assert [s['name'] for s in manager.list_sites()] == ['Solar B', 'DC', 'Solar A']
+    assert [s['name'] for s in manager.list_sites('solar')] == ['Solar B', 'Solar A']
+
+    # Changing type moves the site between buckets
+    manager.update_site(solar_b, {'site_type': 'datacenter'})
+    assert [s['name'] for s in manager.list_sites('solar')] == ['Solar A']
+    assert [s['name'] for s in manager.list_sites('datacenter')] == ['Solar B', 'DC']
+
+    manager.delete_site(dc)
+    assert manager.get_site(dc) is None
+    assert [s['name'] for s in manager.list_sites('datacenter')] == ['Solar B']
+
+    # Fresh load rebuilds identical indexes from disk
+    SiteManager.clear_cache()
+    assert [s['name'] for s in manager.list_sites()] == ['Solar B', 'Solar A']
+
+
+def test_list_sites_stable_for_equal_dates(tmp_path):
+    """Sites sharing a creation date keep database order"""
+    write_legacy_database(tmp_path, [
+        dict(make_site(name), site_id=f'HH-{i}', created='2024-01-01T00:00:00')
+        for i, name in enumerate(['first', 'second', 'third'])
+    ])
+
+    names = [s['name'] for s in SiteManager(str(tmp_path)).list_sites()]
+    assert names == ['first', 'second', 'third']
+
+
+def test_search_matches_substring_scan(tmp_path):
+    """Indexed search returns exactly what a substring scan would"""
+    write_legacy_database(tmp_path, [
+        dict(make_site('Meridian Solar Ridge'), site_id='A', notes='near brazos'),
+        dict(make_site('Clifton Data Hall', 'datacenter'), site_id='B', notes='fiber on FM 219'),
+        dict(make_site('Valley Mills Tract'), site_id='C', notes='solar ready',
+             location_context={'territory': 'Outside Bosque County'}),
+    ])
+    manager = SiteManager(str(tmp_path))
+
+    def scan(query):
+        from site_index import searchable_text
+        return {s['site_id'] for s in manager.list_sites() if query.lower() in searchable_text(s)}
+
+    for query in ['solar', 'OLAR', 'ri', 'fm 219', 'ridge near', 'outside', 'zzz', ' ', '']:
+        assert {s['site_id'] for s in manager.search_sites(query)} == scan(query), query
+
+    # Name hits rank ahead of notes hits
+    assert [s['site_id'] for s in manager.search_sites('solar')] == ['A', 'C']
+
+
+def test_search_index_follows_writes(tmp_path):
+    """Text index is updated incrementally by update and delete"""
+    write_legacy_database(tmp_path, [dict(make_site('Kopperl Ranch'), site_id='K')])
+    manager = SiteManager(str(tmp_path))
+
+    assert manager.search_sites('kopp', prefix=True)
+    manager.update_site('K', {'name': 'Morgan Ranch', 'notes': ''})
+    assert not manager.search_sites('kopperl')
+    assert [s['site_id'] for s in manager.search_sites('morg ran', prefix=True)] == ['K']
+
+    manager.delete_site('K')
+    assert not manager.search_sites('morgan')
+    assert not manager.search_sites('ranch', prefix=True)
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    """SQLite backend supports the same API and persists across managers"""
+    manager = SiteManager(str(tmp_path), backend='sqlite')
+    site_id = manager.add_site(make_site('Laguna Park', 'datacenter', acres=42))
+
+    assert manager.update_site(site_id, {'acres': 64})
+    assert manager.list_sites('datacenter')[0]['site_id'] == site_id
+
+    SiteManager.clear_cache()
+    other = SiteManager(str(tmp_path), backend='sqlite')
+    assert other.get_site(site_id)['acres'] == 64
+    assert other.search_sites('laguna')[0]['site_id'] == site_id
+
+    conn = other.store._conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('SELECT acres FROM sites WHERE site_id = ?', (site_id,)).fetchone()[0] == 64
+
+    assert other.delete_site(site_id)
+    assert manager.get_site(site_id) is None
+
+
+def test_sqlite_site_ids_unique_across_processes(tmp_path):
+    """An ID taken by another process between pick and insert is renumbered"""
+    import sqlite3
+    import pytest
+
+    manager = SiteManager(str(tmp_path), backend='sqlite')
+    other = sqlite3.connect(str(manager.db_file), isolation_level=None)
+    pick = manager._add_entry
+
+    def racing_add_entry(site_data, index, reserved):
+        # Another process adds a site with the same second-resolution ID
+        entry = pick(site_data, index, reserved)
+        other.execute("INSERT INTO sites (site_id, document) VALUES (?, '{}')",
+                      (entry['site_id'],))
+        return entry
+
+    manager._add_entry = racing_add_entry
+    site_id = manager.add_site(make_site('Iredell Bluff'))
+    taken = other.execute('SELECT site_id FROM sites ORDER BY row').fetchone()[0]
+    assert site_id == f'{taken}-001'
+
+    del manager._add_entry
+    batch = manager.add_sites([make_site('Hico Road'), make_site('Walnut Springs')])['added']
+    assert len(set(batch)) == 2 and taken not in batch
+    SiteManager.clear_cache()
+    assert SiteManager(str(tmp_path), backend='sqlite').get_site(site_id)['name'] == 'Iredell Bluff'
+
+    with pytest.raises(sqlite3.IntegrityError):
+        other.execute("INSERT INTO sites (site_id, document) VALUES (?, '{}')", (site_id,))
+
+
+def test_sqlite_sees_other_connection_writes(tmp_path):
+    """A commit from another connection invalidates the cache"""
+    import sqlite3
+
+    manager = SiteManager(str(tmp_path), backend='sqlite')
+    site_id = manager.add_site(make_site('Hico Road'))
+    manager.get_site(site_id)
+
+    other = sqlite3.connect(str(manager.db_file))
+    other.execute('DELETE FROM sites')
+    other.commit()
+    other.close()
+
+    assert manager.get_site(site_id) is None
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    """Migration copies snapshot and journaled changes into SQLite"""
+    write_legacy_database(tmp_path, [
+        dict(make_site('Legacy One'), site_id='L1', created='2024-01-01T00:00:00'),
+        dict(make_site('Legacy Two'), site_id='L2', created='2024-01-02T00:00:00'),
+    ])
+    SiteManager(str(tmp_path)).update_site('L1', {'acres': 7})
+
+    assert migrate_to_sqlite(str(tmp_path)) == 2
+    assert migrate_to_sqlite(str(tmp_path)) == 0
+
+    SiteManager.clear_cache()
+    manager = SiteManager(str(tmp_path), backend='sqlite')
+    assert [s['site_id'] for s in manager.list_sites()] == ['L2', 'L1']
+    assert manager.get_site('L1')['acres'] == 7
+
+
+def test_migrate_renumbers_duplicate_ids(tmp_path, capsys):
+    """Legacy databases with repeated site IDs migrate with the repeats renumbered"""
+    write_legacy_database(tmp_path, [
+        dict(make_site('First'), site_id='HH-20240101-120000', created='2024-01-01T12:00:00'),
+        dict(make_site('Second'), site_id='HH-20240101-120000', created='2024-01-01T12:00:00'),
+        dict(make_site('Taken'), site_id='HH-20240101-120000-001', created='2024-01-02T00:00:00'),
+        dict(make_site('Manual A'), site_id='L1', created='2024-01-03T00:00:00'),
+        dict(make_site('Manual B'), site_id='L1', created='2024-01-04T00:00:00'),
+    ])
+
+    assert migrate_to_sqlite(str(tmp_path)) == 5
+    output = capsys.readouterr().out
+    assert 'HH-20240101-120000 renumbered to HH-20240101-120000-002' in output
+    assert 'L1 renumbered to L1-001' in output
+
+    SiteManager.clear_cache()
+    manager = SiteManager(str(tmp_path), backend='sqlite')
+    sites = {s['site_id']: s['name'] for s in manager.list_sites()}
+    assert sites == {
+        'HH-20240101-120000': 'First',
+        'HH-20240101-120000-002': 'Second',
+        'HH-20240101-120000-001': 'Taken',
+        'L1': 'Manual A',
+        'L1-001': 'Manual B',
+    }
+
+
+def test_export_csv_flattens_and_filters(tmp_path):
+    """CSV export flattens nested analyses and honours type/date filters"""
+    import csv
+    import gzip
+
+    write_legacy_database(tmp_path, [
+        dict(make_site('Old Solar'), site_id='S1', created='2024-03-01T08:00:00',
+             solar_analysis={'mw_capacity': 50}),
+        dict(make_site('New Solar'), site_id='S2', created='2024-06-15T08:00:00',
+             solar_analysis={'mw_capacity': 75}),
+        dict(make_site('Hall', 'datacenter'), site_id='D1', created='2024-06-20T08:00:00'),
+    ])
+    manager = SiteManager(str(tmp_path))
+
+    path = manager.export_to_csv(str(tmp_path / 'all.csv'))
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [r['site_id'] for r in rows] == ['S1', 'S2', 'D1']
+    assert rows[1]['solar_analysis.mw_capacity'] == '75'
+    assert rows[1]['location_context.territory'] == 'Bosque County (Oncor Territory)'
+    assert rows[2]['solar_analysis.mw_capacity'] == ''
+
+    path = manager.export_to_csv(str(tmp_path / 'subset.csv.gz'), site_type='solar',
+                                 start_date='2024-06-01', end_date='2024-06-15')
+    with gzip.open(path, 'rt', newline='') as f:
+        assert [r['site_id'] for r in csv.DictReader(f)] == ['S2']
+
+    assert manager.export_to_csv(str(tmp_path / 'none.csv'), start_date='2030-01-01') is None
+
+    # Schema shrinks when the only site with a column goes away
+    manager.delete_site('S1')
+    manager.delete_site('S2')
+    assert 'solar_analysis.mw_capacity' not in manager._load_index().schema()
+
+
+def check_statistics(manager):
+    """Maintained aggregates equal a full recomputation"""
+    from site_index import SiteAggregates
+
+    recomputed = SiteAggregates()
+    for site in manager.list_sites():
+        recomputed.apply(site)
+
+    stats = manager.get_statistics()
+    assert stats['total_sites'] == recomputed.total_sites
+    assert stats['by_type'] == recomputed.by_type
+    assert stats['by_territory'] == recomputed.by_territory
+    assert stats['total_acres_analyzed'] == round(recomputed.total_acres, 2)
+    assert stats['total_solar_capacity_mw'] == round(recomputed.total_solar_mw, 2)
+    assert stats['total_datacenter_capacity_mw'] == round(recomputed.total_datacenter_mw, 2)
+    return stats
+
+
+def test_statistics_maintained_incrementally(tmp_path):
+    """Aggregates follow writes and are persisted for both backends"""
+    for backend in ('journal', 'sqlite'):
+        data_dir = tmp_path / backend
+        manager = SiteManager(str(data_dir), backend=backend)
+        solar = manager.add_site(dict(make_site('Solar', acres=150),
+                                      solar_analysis={'mw_capacity': 75}))
+        manager.update_site(solar, {'site_id': 'SOLAR'})
+        datacenter = manager.add_site(dict(make_site('Hall', 'datacenter', acres=20),
+                                           datacenter_analysis={'total_facility_mw': 12.5}))
+        manager.update_site(datacenter, {'acres': 30})
+
+        stats = check_statistics(manager)
+        assert stats['total_sites'] == 2
+        assert stats['acres_by_type'] == {'solar': 150, 'datacenter': 30}
+        assert stats['total_datacenter_capacity_mw'] == 12.5
+        assert stats['by_territory'] == {'Bosque County (Oncor Territory)': 2}
+
+        manager.delete_site('SOLAR')
+        manager.compact()
+
+        # Reload from disk uses the persisted totals
+        SiteManager.clear_cache()
+        stats = check_statistics(SiteManager(str(data_dir), backend=backend))
+        assert stats['by_type'] == {'datacenter': 1}
+        assert stats['total_solar_capacity_mw'] == 0
+
+
+def test_add_sites_single_write_unique_ids(tmp_path):
+    """A batch is one journal write with collision-free IDs"""
+    manager = SiteManager(str(tmp_path))
+    result = manager.add_sites([
+        make_site('One'),
+        {'site_type': 'solar'},
+        make_site('Two'),
+        dict(make_site('Three'), acres='lots'),
+        make_site('Four'),
+    ])
+
+    assert len(result['added']) == 3
+    assert len(set(result['added'])) == 3
+    assert [e['record'] for e in result['errors']] == [2, 4]
+    assert manager.store.count_journal_entries() == 3
+
+    # A single add in the same second does not reuse a batch ID
+    assert manager.add_site(make_site('Five')) not in result['added']
+
+
+def test_update_sites_reports_missing(tmp_path):
+    """Batch updates apply valid entries and report the rest"""
+    write_legacy_database(tmp_path, [
+        dict(make_site('A'), site_id='A'),
+        dict(make_site('B'), site_id='B'),
+    ])
+    migrate_to_sqlite(str(tmp_path))
+    manager = SiteManager(str(tmp_path), backend='sqlite')
+
+    result = manager.update_sites({
+        'A': {'acres': 10},
+        'B': {'acres': -5},
+        'Z': {'acres': 1},
+    })
+    assert result['updated'] == ['A']
+    assert [e['site_id'] for e in result['errors']] == ['B', 'Z']
+    assert manager.get_site('A')['acres'] == 10
+    check_statistics(manager)
+
+
+def test_import_csv_jsonl_geojson(tmp_path):
+    """Bulk importers read each format and keep going past bad records"""
+    manager = SiteManager(str(tmp_path / 'db'))
+
+    csv_file = tmp_path / 'survey.csv'
+    csv_file.write_text(
+        'name,site_type,acres,solar_analysis.mw_capacity\n'
+        'Survey North,solar,120,60\n'
+        ',solar,5,1\n'
+    )
+    jsonl_file = tmp_path / 'survey.jsonl'
+    jsonl_file.write_text(
+        json.dumps(make_site('Line One')) + '\n'
+        '{not json}\n'
+        + json.dumps(make_site('Line Three')) + '\n'
+    )
+    geojson_file = tmp_path / 'survey.geojson'
+    geojson_file.write_text(json.dumps({
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [-97.64, 31.87]},
+             'properties': {'name': 'Point Site', 'site_type': 'solar'}},
+            {'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': []},
+             'properties': {'name': 'Area Site'}},
+        ]
+    }))
+
+    result = manager.import_sites(str(csv_file))
+    assert len(result['added']) == 1 and result['errors'][0]['record'] == 2
+    site = manager.get_site(result['added'][0])
+    assert site['acres'] == 120 and site['solar_analysis'] == {'mw_capacity': 60}
+
+    result = manager.import_sites(str(jsonl_file))
+    assert len(result['added']) == 2 and result['errors'][0]['record'] == 2
+
+    result = manager.import_sites(str(geojson_file))
+    assert len(result['added']) == 1 and result['errors'][0]['record'] == 2
+    assert manager.get_site(result['added'][0])['location_context']['latitude'] == 31.87
+
+    assert manager.get_statistics()['total_sites'] == 4
+
+
+def test_import_csv_keeps_text_fields_as_text(tmp_path):
+    """Only numeric fields are parsed as numbers; non-finite values are rejected"""
+    manager = SiteManager(str(tmp_path / 'db'))
+    csv_file = tmp_path / 'survey.csv'
+    csv_file.write_text(
+        'name,site_type,acres,notes,solar_analysis.mw_capacity,solar_analysis.methodology\n'
+        '1905,solar,12.5,007,6,2024\n'
+        'Bad Acres,solar,nan,,,\n'
+        'Infinite,solar,40,,inf,\n'
+        'Wordy,solar,forty,,,\n'
+    )
+
+    result = manager.import_sites(str(csv_file))
+    assert [error['record'] for error in result['errors']] == [2, 3, 4]
+    assert 'acres' in result['errors'][0]['error']
+    site = manager.get_site(result['added'][0])
+    assert site['name'] == '1905' and site['notes'] == '007'
+    assert site['acres'] == 12.5
+    assert site['solar_analysis'] == {'mw_capacity': 6, 'methodology': '2024'}
+
+
+def test_import_geojson_reports_malformed_features(tmp_path):
+    """Malformed GeoJSON features are reported one by one, not fatal"""
+    manager = SiteManager(str(tmp_path / 'db'))
+    geojson_file = tmp_path / 'survey.geojson'
+    point = {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [-97.64, 31.87]},
+             'properties': {'name': 'Good Site'}}
+    geojson_file.write_text(json.dumps({
+        'type': 'FeatureCollection',
+        'features': [
+            dict(point, geometry={'type': 'Point', 'coordinates': []}),
+            dict(point, geometry={'type': 'Point', 'coordinates': ['west', 'north']}),
+            dict(point, geometry=None),
+            'not a feature',
+            dict(point, properties=['not', 'an', 'object']),
+            dict(point, geometry='POINT (-97.64 31.87)'),
+            point,
+        ]
+    }))
+
+    result = manager.import_sites(str(geojson_file))
+    assert len(result['added']) == 1
+    assert [error['record'] for error in result['errors']] == [1, 2, 3, 4, 5, 6]
+    assert 'coordinates' in result['errors'][0]['error']
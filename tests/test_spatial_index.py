@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+HH Holdings Energy Intel - Spatial Index Tests
+Unit tests for grid radius and nearest-neighbor queries
+
+Author: Bevans Real Estate / HH Holdings
+Location: Bosque County, Texas
+"""
+
+import sys
+import os
+import random
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from geodesy import haversine
+from spatial_index import GeoGrid
+from afz_classifier import AFZClassifier
+from site_manager import SiteManager
+
+
+MERIDIAN = (31.8749, -97.6428)
+
+
+def random_points(count, seed=7):
+    """Points scattered across Texas"""
+    rng = random.Random(seed)
+    return [(i, rng.uniform(26.0, 36.5), rng.uniform(-106.5, -93.5)) for i in range(count)]
+
+
+def brute_force(points, lat, lon):
+    return sorted((haversine(lat, lon, p_lat, p_lon), key) for key, p_lat, p_lon in points)
+
+
+def test_within_matches_brute_force():
+    """Radius query returns exactly the points a full scan finds"""
+    points = random_points(5000)
+    grid = GeoGrid()
+    for key, lat, lon in points:
+        grid.insert(key, lat, lon)
+
+    for radius in (5, 25, 150):
+        expected = [key for d, key in brute_force(points, *MERIDIAN) if d <= radius]
+        assert [key for _, key in grid.within(*MERIDIAN, radius)] == expected
+
+
+def test_nearest_matches_brute_force():
+    """kNN agrees with a full scan, including sparse and capped searches"""
+    points = random_points(3000)
+    grid = GeoGrid()
+    for key, lat, lon in points:
+        grid.insert(key, lat, lon)
+
+    expected = brute_force(points, *MERIDIAN)
+    assert [key for _, key in grid.nearest(*MERIDIAN, k=10)] == [k for _, k in expected[:10]]
+
+    # Far outside Texas the search has to expand many rings
+    far = brute_force(points, 45.0, -120.0)
+    assert grid.nearest(45.0, -120.0, k=3)[0][1] == far[0][1]
+
+    capped = grid.nearest(*MERIDIAN, k=50, max_miles=20)
+    assert [key for _, key in capped] == [k for d, k in expected if d <= 20][:50]
+
+
+def test_insert_moves_and_remove():
+    """Re-inserting a key moves it; removed keys are never returned"""
+    grid = GeoGrid()
+    grid.insert('a', *MERIDIAN)
+    grid.insert('b', 31.5493, -97.1467)
+    grid.insert('a', 29.7234, -95.2145)
+
+    assert len(grid) == 2
+    assert grid.nearest(*MERIDIAN)[0][1] == 'b'
+    assert grid.remove('b')
+    assert not grid.remove('b')
+    assert [key for _, key in grid.nearest(*MERIDIAN, k=5)] == ['a']
+    assert grid.within(*MERIDIAN, 50) == []
+
+
+def test_classifier_spatial_queries():
+    """Parcels classified after the index is built are picked up"""
+    classifier = AFZClassifier()
+    classifier.classify_parcel('P1', 'Near', 'Bosque', 'TX', 31.88, -97.64, 100)
+    assert classifier.nearest_parcels(*MERIDIAN, k=1)[0][1].id == 'P1'
+
+    classifier.classify_parcel('P2', 'Nearer', 'Bosque', 'TX', 31.875, -97.643, 100)
+    classifier.classify_parcel('P3', 'Far', 'Reeves', 'TX', 31.0156, -103.4918, 100)
+
+    assert [p.id for _, p in classifier.nearest_parcels(*MERIDIAN, k=2)] == ['P2', 'P1']
+    assert [p.id for _, p in classifier.parcels_within(*MERIDIAN, 10)] == ['P2', 'P1']
+
+
+def test_site_manager_spatial_queries(tmp_path):
+    """Site coordinates are indexed on add, update and delete"""
+    manager = SiteManager(data_dir=tmp_path)
+    near = manager.add_site({'name': 'Near', 'location_context': {
+        'latitude': 31.88, 'longitude': -97.64}})
+    far = manager.add_site({'name': 'Far', 'latitude': 31.5493, 'longitude': -97.1467})
+    manager.add_site({'name': 'No GPS'})
+
+    assert [s['name'] for _, s in manager.nearest_sites(*MERIDIAN, k=5)] == ['Near', 'Far']
+    assert [s['name'] for _, s in manager.sites_within(*MERIDIAN, 5)] == ['Near']
+
+    manager.update_site(far, {'latitude': 31.8750, 'longitude': -97.6430})
+    assert manager.nearest_sites(*MERIDIAN, k=1)[0][1]['name'] == 'Far'
+
+    manager.delete_site(far)
+    assert [s['site_id'] for _, s in manager.sites_within(*MERIDIAN, 100)] == [near]